@@ -8,6 +8,7 @@
         import { animateCoins, calculateStats, formatStats } from './src/multi_coin_flip.js';
         import { pregenerateCoinGames, createCoinGamesPlot, updateCoinGamesPlot } from './src/coin_games.js';
         import { createHistogram } from './src/histogram.js';
+        import { loadScatterIndex, loadScatterSequences, loadRollingAverages, loadHistograms } from './src/scatter_data.js';
         import * as Plot from "https://cdn.jsdelivr.net/npm/@observablehq/plot@0.6/+esm";
         // import * as Plot from "./assets/plot@0.6.esm.js";
 
@@ -549,7 +550,7 @@
             document.getElementById('early-voting-loading').style.display = 'block';
             
             try {
-                const data = await getEarlyVotingData();
+                const data = await getEarlyVotingSummary();
                 document.getElementById('early-voting-loading').style.display = 'none';
                 globalVisualizationData.earlyVotingData = data;
                 createEarlyVotingScatterPlot(data);
@@ -832,8 +833,7 @@
             document.getElementById('election-day-loading').style.display = 'block';
             
             // Fetch the election day scatter data
-            fetch('data/processed_data/election_day_votes_scatter_data.json')
-                .then(response => response.json())
+            loadScatterIndex('data/processed_data/election_day_votes_scatter_index.json')
                 .then(scatterData => {
                     // Hide loading indicator
                     document.getElementById('election-day-loading').style.display = 'none';
@@ -1094,7 +1094,7 @@
             document.getElementById('smoking-gun-loading').style.display = 'block';
             
             try {
-                const data = await getEarlyVotingData();
+                const data = await getEarlyVotingRollingAverages();
                 globalVisualizationData.smokingGunData = data;
                 document.getElementById('smoking-gun-loading').style.display = 'none';
                 updateSmokingGunPlot(data);
@@ -1130,13 +1130,16 @@
             }
         }
         
-        function updateSmokingGunPlot(scatterData) {
+        async function updateSmokingGunPlot(rollingAverages) {
             const colorMode = document.querySelector('input[name="globalColorMode"]:checked')?.value || 'binary';
             const lineCount = ButtonGroup.getActiveValue('.smoking-gun-line-count-btn') || '50';
             const selectionMethod = ButtonGroup.getActiveValue('.smoking-gun-selection-btn') || 'longest';
             const windowSize = parseInt(document.getElementById('smokingGunWindowSize').value);
             const fakeDataMode = document.getElementById('smokingGunFakeToggle').checked;
             
+            // Window sizes that were not precomputed are computed from the vote histories
+            const scatterData = rollingAverages.windows[windowSize] ? null : await getEarlyVotingData();
+            
             import('./src/rolling_average.js').then(module => {
                 const { createRollingAveragePlot } = module;
                 createRollingAveragePlot('smoking-gun-plot', scatterData, {
@@ -1145,7 +1148,8 @@
                     selectionMethod,
                     windowSize,
                     selectedRandomTabulators: smokingGunSelectedRandomTabulators,
-                    fakeDataMode
+                    fakeDataMode,
+                    rollingAverages
                 });
             }).catch(error => {
                 console.error('Error loading rolling average module:', error);
@@ -1440,9 +1444,8 @@
         // Early Voting Histogram Initialization
         async function initEarlyVotingHistogram() {
             try {
-                const response = await fetch('data/processed_data/early_votes_scatter_data.json');
-                const scatterData = await response.json();
-                const data = scatterData.data;
+                // Pre-binned counts and statistics (scripts/histograms.py)
+                const data = await loadHistograms('data/processed_data/early_votes_histograms.json');
                 
                 globalVisualizationData.earlyVotingHistogramData = data;
                 
@@ -1466,7 +1469,8 @@
             const colorMode = document.querySelector('input[name="earlyVotingColorMode"]:checked')?.value || 'binary';
             
             const plotContainer = document.getElementById('early-voting-histogram-plot');
-            createHistogram(plotContainer, globalVisualizationData.earlyVotingHistogramData, {
+            createHistogram(plotContainer, null, {
+                histograms: globalVisualizationData.earlyVotingHistogramData,
                 displayMode,
                 colorMode,
                 title: '2024 Early Voting in Clark County, NV for Trump'
@@ -1476,9 +1480,8 @@
         // Election Day Histogram Initialization
         async function initElectionDayHistogram() {
             try {
-                const response = await fetch('data/processed_data/election_day_votes_scatter_data.json');
-                const scatterData = await response.json();
-                const data = scatterData.data;
+                // Pre-binned counts and statistics (scripts/histograms.py)
+                const data = await loadHistograms('data/processed_data/election_day_votes_histograms.json');
                 
                 globalVisualizationData.electionDayHistogramData = data;
                 
@@ -1506,7 +1509,8 @@
             const colorMode = ButtonGroup.getActiveValue('.election-day-color-btn') || 'binary';
             
             const plotContainer = document.getElementById('election-day-histogram-plot');
-            createHistogram(plotContainer, globalVisualizationData.electionDayHistogramData, {
+            createHistogram(plotContainer, null, {
+                histograms: globalVisualizationData.electionDayHistogramData,
                 displayMode,
                 colorMode,
                 title: '2024 Election Day Voting in Clark County, NV for Trump'
@@ -1544,20 +1548,37 @@
                 }
             });
         
-        // Cached Data Loader
+        // Cached Data Loaders
+        let cachedEarlyVotingSummary = null;
         let cachedEarlyVotingData = null;
         
+        // Per-tabulator summary fields only, for the scatter plot
+        async function getEarlyVotingSummary() {
+            if (cachedEarlyVotingSummary) {
+                return cachedEarlyVotingSummary;
+            }
+            
+            const scatterIndex = await loadScatterIndex('data/processed_data/early_votes_scatter_index.json');
+            cachedEarlyVotingSummary = scatterIndex.data;
+            return cachedEarlyVotingSummary;
+        }
+        
+        // Summary fields plus vote_history and urban_voter, fetched from the shards on first use
         async function getEarlyVotingData() {
             if (cachedEarlyVotingData) {
                 return cachedEarlyVotingData;
             }
             
-            const response = await fetch('data/processed_data/early_votes_scatter_data.json');
-            const scatterData = await response.json();
+            const scatterData = await loadScatterSequences('data/processed_data/early_votes_scatter_index.json');
             cachedEarlyVotingData = scatterData.data;
             return cachedEarlyVotingData;
         }
         
+        // Rolling-average series precomputed for a set of window sizes
+        async function getEarlyVotingRollingAverages() {
+            return loadRollingAverages('data/processed_data/early_votes_rolling_averages.json');
+        }
+        
         // Global Color Control Management
         let globalVisualizationData = {
             earlyVotingData: null,
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark CSV parsing and cleaning of a CVR export.
+
+Generates a synthetic export in the Clark County layout (4 header rows,
+Excel-style ="..." metadata, many contests) and compares the original ingest
+path, which parsed every column and regex-cleaned every text column of every
+chunk, with parsing only the projected columns, with and without unwrapping
+="..." while tokenizing.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import pandas as pd
+
+from process_election_data import (CHUNK_SIZE, HEADER_ROWS, all_metadata_headers, build_projection, create_custom_headers,
+                                   detect_columns, encode_chunk, find_data_start, new_dictionaries, open_data_rows, read_chunks)
+
+
+def write_synthetic_export(path, num_rows, num_contests, seed=1):
+    """
+    Write a synthetic CVR export.
+
+    Args:
+        path: Output CSV path
+        num_rows: Number of ballots
+        num_contests: Number of two-choice contests after president and senate
+        seed: Random seed
+    """
+    rng = random.Random(seed)
+    contests = [("President", ["Harris, Kamala D.", "Trump, Donald J.", "Oliver, Chase"], ["DEM", "REP", "LIB"]),
+                ("Senate", ["Rosen, Jacky", "Brown, Sam", "Cunningham, Chris"], ["DEM", "REP", "IAP"])]
+    contests += [(f"Question {k}", ["Yes", "No"], ["", ""]) for k in range(num_contests)]
+
+    contest_row, candidate_row, party_row = [""] * len(all_metadata_headers), [""] * len(all_metadata_headers), list(all_metadata_headers)
+    for name, candidates, parties in contests:
+        contest_row += [name] * len(candidates)
+        candidate_row += candidates
+        party_row += parties
+    election_row = ["24G"] + [""] * (len(party_row) - 1)
+
+    groups = ["Early Voting", "Mail", "Election Day", "Provisional"]
+    with open(path, "w") as f:
+        for row in (election_row, contest_row, candidate_row, party_row):
+            f.write(",".join(f'"{cell}"' if "," in cell else cell for cell in row) + "\n")
+        for i in range(num_rows):
+            tabulator = 100000 + rng.randrange(40)
+            precinct = rng.choice([1000, 1234, 2048, 2065, 3364, 4420, 5513, 6033])
+            cells = [f'="{i}"', f'="{tabulator}"', '="1"', f'="{7000000 + i}"', '=""',
+                     rng.choices(groups, [40, 40, 19, 1])[0], f'="{precinct} ({precinct}|00)"',
+                     '="135727|3|00 (135727|3|00)"', f'="D:\\NAS\\Tab{tabulator}\\img_{i}*.*"', "ScanVote", "1", "0",
+                     f'="{rng.randrange(10000000)}"', f'="English_Default_{precinct}.pdf"', f'="915_{i:08x}"', f'="{tabulator}_sess"']
+            for _, candidates, _ in contests:
+                pick = rng.randrange(len(candidates))
+                cells += ["1" if j == pick else "0" for j in range(len(candidates))]
+            f.write(",".join(cells) + "\n")
+
+
+def legacy_ingest(input_file, custom_headers, plan):
+    """Parse and clean the export the way process_csv_chunks originally did."""
+    rows = 0
+    for chunk in pd.read_csv(input_file, skiprows=HEADER_ROWS, names=custom_headers, chunksize=CHUNK_SIZE):
+        for col in chunk.columns:
+            # Text columns (object dtype, or str dtype on pandas 3)
+            if pd.api.types.is_string_dtype(chunk[col]):
+                chunk[col] = chunk[col].astype(str)
+                chunk[col] = chunk[col].str.replace(r'^="(.*)"$', r'\1', regex=True)
+        for col in plan['metadata_cols']:
+            chunk[col].astype(str).str.strip('="')
+        rows += len(chunk)
+    return rows
+
+
+def projected_regex_ingest(input_file, custom_headers, plan):
+    """Parse only the projected columns, but clean ="..." with regexes after parsing."""
+    projection = build_projection(custom_headers, plan)
+    rows = 0
+    for chunk in pd.read_csv(input_file, skiprows=HEADER_ROWS, names=custom_headers, chunksize=CHUNK_SIZE, usecols=projection['usecols']):
+        for col in chunk.columns:
+            if pd.api.types.is_string_dtype(chunk[col]):
+                chunk[col] = chunk[col].astype(str)
+                chunk[col] = chunk[col].str.replace(r'^="(.*)"$', r'\1', regex=True)
+        for col in plan['metadata_cols']:
+            chunk[col].astype(str).str.strip('="')
+        rows += len(chunk)
+    return rows
+
+
+def projected_ingest(input_file, custom_headers, plan):
+    """Parse the export with the projection plan and parse-time unwrapping."""
+    projection = build_projection(custom_headers, plan)
+    dictionaries = new_dictionaries(plan)
+    rows = 0
+    with open_data_rows(input_file, find_data_start(input_file), os.path.getsize(input_file)) as reader:
+        for chunk in read_chunks(reader, custom_headers, projection):
+            encode_chunk(chunk, plan, dictionaries)
+            rows += len(chunk)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark CVR CSV parsing on a synthetic export')
+    parser.add_argument('--rows', type=int, default=50000, help='Number of synthetic ballots')
+    parser.add_argument('--contests', type=int, default=100, help='Number of extra two-choice contests')
+    parser.add_argument('--input-file', help='Benchmark an existing export instead of a synthetic one')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_file = args.input_file
+        if input_file is None:
+            input_file = os.path.join(tmp_dir, 'synthetic_cvr.csv')
+            print(f"Writing synthetic export with {args.rows} rows and {args.contests + 2} contests...")
+            write_synthetic_export(input_file, args.rows, args.contests)
+        print(f"Input size: {os.path.getsize(input_file) / 1e6:.1f} MB")
+
+        first_rows = pd.read_csv(input_file, header=None, nrows=5, dtype=str)
+        custom_headers, counting_group_col = create_custom_headers(first_rows)
+        plan = detect_columns(custom_headers, 16, counting_group_col)
+
+        results = {}
+        variants = [
+            ('all columns, regex cleaning', legacy_ingest),
+            ('projected, regex cleaning', projected_regex_ingest),
+            ('projected, parse-time unwrapping', projected_ingest),
+        ]
+        for name, ingest in variants:
+            start = time.perf_counter()
+            rows = ingest(input_file, custom_headers, plan)
+            results[name] = time.perf_counter() - start
+            print(f"{name:>32}: {results[name]:.2f}s ({rows / results[name]:,.0f} rows/s)")
+
+        baseline = results['all columns, regex cleaning']
+        for name, _ in variants[1:]:
+            print(f"Speedup of {name}: {baseline / results[name]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
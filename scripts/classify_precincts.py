@@ -8,346 +8,72 @@ import json
 import os
 import re
 import argparse
+import functools
+import glob
+import itertools
+import multiprocessing
 from pathlib import Path
-from typing import Dict, List, Set, Tuple, Any, Optional
+from typing import AbstractSet, Dict, FrozenSet, List, Sequence, Set, Tuple, Any, Optional, Iterator
 import csv
+from collections import Counter
+
+from columnar_store import is_vote_table, open_vote_table
+from json_stream import is_ndjson, iter_json_array, iter_ndjson
+from histograms import write_histograms
+from packed_bits import pack_scatter_data
+from rolling_averages import MAX_WINDOW_SIZE, WINDOW_SIZES, parse_window_sizes, write_rolling_averages
+from scatter_shards import write_scatter_shards
+
+HARRIS_COL = "Harris, Kamala D. (DEM)"
+TRUMP_COL = "Trump, Donald J. (REP)"
+
+# Vote record fields used for the classification
+RECORD_COLUMNS = ["PrecinctPortion", "TabulatorNum", HARRIS_COL, TRUMP_COL]
 
 # Define known urban centers in Clark County
-# Las Vegas, North Las Vegas, Henderson, and parts of Paradise are considered urban
-# These precincts are rural, as determined by hand, using factors such as: looking at a map, checking the party affiliation of the sitting assemblymember (they are all Rebublicans)
-# note, a lot of these are probably more appropriately called "suburban" but here it's the voting patterns that count more than the density
-rural_precincts = [
-# district 2
-3364,
-3370,
-3373,
-3374,
-3382,
-3557,
-3565,
-3576,
-6033,
-6471,
-6512,
-6514,
-6517,
-6520,
-6522,
-6545,
-6652,
-6695,
-6707,
-6727,
-6728,
-
-# district 4
-2065,
-2066,
-2073,
-2352,
-2371,
-2372,
-2384,
-2387,
-2651,
-2675,
-2676,
-2681,
-2682,
-2683,
-2684,
-2691,
-2693,
-2694,
-2695,
-2696,
-2700,
-2703,
-2704,
-2706,
-2711,
-3048,
-3050,
-3051,
-3053,
-3055,
-3065,
-3066,
-3067,
-3418,
-3457,
-3518,
-3532,
-3559,
-3562,
-3578,
-3579,
-3581,
-3584,
-3587,
-3604,
-3606,
-3609,
-3709,
-3712,
-3715,
-3716,
-3717,
-3757,
-3786,
-4420,
-4421,
-# District 12
-2045,
-2126,
-2444,
-2733,
-2743,
-5042,
-5324,
-5330,
-5403,
-5405,
-5412,
-5417,
-5501,
-5504,
-5513,
-5530,
-5531,
-5547,
-5612,
-5652,
-5656,
-7017,
-7019,
-7024,
-
-# district 13
-2056,
-2067,
-2072,
-2079,
-2080,
-2081,
-2082,
-2479,
-2600,
-2602,
-2605,
-2611,
-2614,
-2622,
-2623,
-2625,
-2631,
-2632,
-2633,
-2641,
-2642,
-2643,
-2644,
-2645,
-2654,
-2662,
-2663,
-2666,
-2673,
-3546,
-3547,
-3564,
-3602,
-3607,
-3613,
-3730,
-3735,
-# district 17 #this one has a democrat, mrybe it should be removed. its semi-urban, near Nellis AFB
-# 2074,
-# 2077,
-# 2086,
-# 2087,
-# 2088,
-# 2417,
-# 2464,
-# 2715,
-# 2717,
-# 2720,
-# 2730,
-# 2737,
-# 4013,
-# 4043,
-# 4044,
-# 4400,
-# 4401,
-# 4402,
-# 4404,
-# 4405,
-# 4406,
-# 4407,
-# 4408,
-# 4458,
-# 4505,
-# 4512,
-# 4609,
-# 4716,
-# district 19
-2057,
-2060,
-2445,
-2465,
-2466,
-2469,
-2473,
-2477,
-2503,
-2725,
-2726,
-2731,
-2770,
-2775,
-2776,
-5023,
-5024,
-5025,
-5037,
-5539,
-5550,
-5556,
-7039,
-7040,
-7361,
-7542,
-7582,
-7592,
-7595,
-7601,
-7603,
-
-# district 22
-1000,
-1411,
-1514,
-1517,
-1672,
-1674,
-7041,
-7042,
-7352,
-7355,
-7366,
-7378,
-7430,
-7569,
-7570,
-7604,
-7611,
-7625,
-7641,
-7643,
-7651,
-7652,
-7746,
-# District 23
-1012,
-1067,
-1072,
-1074,
-1394,
-1510,
-1518,
-1525,
-1550,
-1606,
-1671,
-1712,
-1715,
-1717,
-1719,
-1750,
-1751,
-1753,
-6001,
-6003,
-6004,
-6022,
-6154,
-6161,
-6309,
-6374,
-6376,
-6377,
-6378,
-6381,
-6509,
-6528,
-6552,
-6741,
-6742,
-6754,
-7052,
-7545,
-7552,
-7553,
-7562,
-# district 35
-6036,
-6037,
-6042,
-6490,
-6493,
-6497,
-6530,
-6538,
-6539,
-6540,
-6547,
-6600,
-6609,
-6610,
-6666,
-6731,
-6750,
-6751,
-6753,
-# district 36
-2042,
-2051,
-2052,
-2053,
-2501,
-2601,
-3535,
-3540,
-3544,
-3571,
-3583,
-3588,
-3605,
-3700,
-3705,
-3706,
-3729,
-3740,
-3781,
-3793,
-6000,
-6023,
-6043,
-6047,
-6365,
-6487,
-6488,
-6498,
-6500,
-6722,
-
-]
-
-
-
-# The rest of Clark County is considered rural
-# Including places like Moapa Valley, Mesquite, Bunkerville, etc.
+# Las Vegas, North Las Vegas, Henderson, and parts of Paradise are considered urban.
+# The rural precincts were determined by hand and are listed in rural_precincts.txt;
+# the rest of Clark County is considered urban.
+RURAL_PRECINCTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rural_precincts.txt")
+
+# Output files of this script, which are not vote files
+CLASSIFICATION_SUFFIXES = ("_precinct_classifications.json", "_precinct_stats.json", "_precinct_analysis.csv",
+                           "_scatter_data.json", "_scatter_index.json", "_scatter_shards", "_rolling_averages.json",
+                           "_histograms.json", "_sample.json",
+                           "precinct_summary.json")
+
+# PrecinctPortion takes a few thousand distinct values, so parsing is memoized
+PRECINCT_CACHE_SIZE = 1 << 16
+
+PRECINCT_BEFORE_PAREN = re.compile(r'(\d+)\s*\(')
+PRECINCT_ANY_NUMBER = re.compile(r'(\d+)')
+
+def load_rural_precincts(path: str = RURAL_PRECINCTS_FILE) -> FrozenSet[int]:
+    """
+    Load the rural precinct numbers from a data file.
+    
+    Args:
+        path: Text file with one precinct number per line; blank lines and lines
+            starting with # are ignored
+        
+    Returns:
+        Frozen set of rural precinct numbers
+    """
+    precincts = set()
+    with open(path, 'r') as f:
+        for line_num, line in enumerate(f, 1):
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            try:
+                precincts.add(int(line))
+            except ValueError:
+                raise ValueError(f"Invalid precinct number on line {line_num} of {path}: {line!r}")
+    return frozenset(precincts)
+
+rural_precincts = load_rural_precincts()
 
+@functools.lru_cache(maxsize=PRECINCT_CACHE_SIZE)
 def extract_precinct_number(precinct_portion: str) -> Optional[int]:
     """
     Extract the precinct number from the PrecinctPortion field.
@@ -362,232 +88,382 @@ def extract_precinct_number(precinct_portion: str) -> Optional[int]:
         return None
         
     # Try to extract the number before the parenthesis
-    match = re.search(r'(\d+)\s*\(', precinct_portion)
+    match = PRECINCT_BEFORE_PAREN.search(precinct_portion)
     if match:
         return int(match.group(1))
     
     # If that fails, try to extract any number
-    match = re.search(r'(\d+)', precinct_portion)
+    match = PRECINCT_ANY_NUMBER.search(precinct_portion)
     if match:
         return int(match.group(1))
     
     return None
 
-def is_urban_precinct(precinct_number: int) -> bool:
+def is_urban_precinct(precinct_number: int, rural: Optional[AbstractSet[int]] = None) -> bool:
     """
     Determine if a precinct is in an urban area based on its number.
     
     Args:
         precinct_number: Precinct number
+        rural: Rural precinct numbers (default: those in rural_precincts.txt)
         
     Returns:
         True if the precinct is in an urban area, False otherwise
     """
-    # Check if the precinct is in our rural precincts list
-    if precinct_number in rural_precincts:
-        return False
-    return True
+    # Check if the precinct is in our rural precincts set
+    return precinct_number not in (rural_precincts if rural is None else rural)
 
-def process_vote_data(vote_file: str, output_dir: str, max_records: int = None, by_tabulator: bool = True) -> Dict[str, Any]:
+def iter_vote_records(vote_file: str, start: int = 0, stop: Optional[int] = None) -> Iterator[Dict[str, Any]]:
     """
-    Process vote data and classify precincts as urban or rural.
+    Open a vote file and return an iterator over its records.
+    
+    Accepts a JSON array file, a newline-delimited JSON file (.ndjson, optionally
+    .gz) or a columnar vote table directory written by process_election_data.py.
+    Columnar tables are memory-mapped and only the columns used for
+    classification are decoded.
     
     Args:
-        vote_file: Path to the vote data JSON file
-        output_dir: Directory to save the output files
-        max_records: Maximum number of records to process (for testing)
+        vote_file: Path to a vote data JSON/NDJSON file or columnar vote table directory
+        start: Start of a shard from plan_shards (row for tables, byte offset for NDJSON)
+        stop: End of a shard from plan_shards (default: end of the file)
         
     Returns:
-        Dictionary with statistics and classifications
+        Iterator over vote record dictionaries
+        
+    Raises:
+        ValueError: If the file is not a vote table, an NDJSON file or a JSON array,
+            or a shard is requested from a file that cannot be split
     """
-    print(f"Processing {vote_file}...")
+    if is_vote_table(vote_file):
+        return open_vote_table(vote_file).iter_records(columns=RECORD_COLUMNS, start=start, stop=stop)
+    if is_ndjson(vote_file):
+        return iter_ndjson(vote_file, start, stop)
+    if start or stop is not None:
+        raise ValueError(f"Cannot read part of JSON array file {vote_file}")
     
-    # Initialize counters and collections
-    urban_precincts_found = set()
-    rural_precincts_found = set()
-    precinct_classifications = {}
-    precinct_vote_counts = {}
-    precinct_trump_percentages = {}
+    records = iter_json_array(vote_file)
+    # Start the generator so a file that is not a JSON array fails here
+    first = next(records, None)
+    return records if first is None else itertools.chain([first], records)
+
+def plan_shards(vote_file: str, num_shards: int) -> Optional[List[Tuple[int, Optional[int]]]]:
+    """
+    Split a vote file into contiguous shards that can be read independently.
     
-    # Keep track of tabulator numbers
-    tabulator_to_precinct = {}
+    Columnar tables are split by row and uncompressed NDJSON files by byte
+    offset. JSON arrays and compressed files can only be read from the start.
     
-    # Data for the scatter plot (votes per machine vs Trump percentage)
-    scatter_data = []
+    Args:
+        vote_file: Path to a vote data file or columnar vote table directory
+        num_shards: Number of shards to split into
+        
+    Returns:
+        List of (start, stop) pairs for iter_vote_records in file order,
+        or None if the file cannot be split
+    """
+    if is_vote_table(vote_file):
+        size = len(open_vote_table(vote_file))
+    elif is_ndjson(vote_file) and not vote_file.endswith('.gz'):
+        size = os.path.getsize(vote_file)
+    else:
+        return None
+    bounds = [size * i // num_shards for i in range(num_shards + 1)]
+    return [(start, stop) for start, stop in zip(bounds, bounds[1:]) if stop > start]
+
+class PrecinctAggregator:
+    """
+    Per-tabulator and per-precinct totals for process_vote_data.
     
-    # Tabulator data for machine-level analysis
-    tabulator_data = {}
+    Aggregates of consecutive shards of the vote records can be merged in file
+    order to get exactly the state of a single pass over the whole file: counts
+    are added, vote_history/urban_voter segments are concatenated, and every
+    dictionary keeps the first-seen order of a single pass.
+    """
     
-    # Count votes by candidate and area type
-    urban_votes = {"Harris, Kamala D. (DEM)": 0, "Trump, Donald J. (REP)": 0}
-    rural_votes = {"Harris, Kamala D. (DEM)": 0, "Trump, Donald J. (REP)": 0}
+    def __init__(self, by_tabulator: bool = True, rural: Optional[AbstractSet[int]] = None):
+        """
+        Args:
+            by_tabulator: Track per-tabulator data for the scatter plot
+            rural: Rural precinct numbers (default: those in rural_precincts.txt)
+        """
+        self.by_tabulator = by_tabulator
+        self.rural = rural
+        self.record_count = 0
+        self.precinct_classifications = {}
+        self.precinct_vote_counts = {}
+        # Last precinct seen on each tabulator
+        self.tabulator_to_precinct = {}
+        # Tabulator data for machine-level analysis
+        self.tabulator_data = {}
+        # Count votes by candidate and area type
+        self.urban_votes = {"Harris, Kamala D. (DEM)": 0, "Trump, Donald J. (REP)": 0}
+        self.rural_votes = {"Harris, Kamala D. (DEM)": 0, "Trump, Donald J. (REP)": 0}
     
-    # Process the file line by line to avoid loading the entire file into memory
-    record_count = 0
+    def add(self, vote_record: Dict[str, Any]) -> None:
+        """
+        Add one vote record.
+        
+        Args:
+            vote_record: Vote record dictionary
+        """
+        self.add_vote(vote_record.get("PrecinctPortion", ""), vote_record.get("TabulatorNum", ""),
+                      vote_record.get(HARRIS_COL, 0), vote_record.get(TRUMP_COL, 0))
     
-    with open(vote_file, 'r') as f:
-        # Check if the file starts with a JSON array
-        first_char = f.read(1)
-        if first_char != '[':
-            print(f"Error: File {vote_file} does not start with a JSON array")
-            return {}
+    def add_votes(self, precinct_portions: Sequence[Any], tabulator_nums: Sequence[Any],
+                  harris_votes: Sequence[int], trump_votes: Sequence[int]) -> None:
+        """
+        Add a batch of ballots given as columns, in ballot order.
         
-        # Reset file pointer and skip the opening bracket
-        f.seek(1)
+        Args:
+            precinct_portions: PrecinctPortion of each ballot (None if missing)
+            tabulator_nums: TabulatorNum of each ballot (None if missing)
+            harris_votes: 0/1 Harris vote of each ballot
+            trump_votes: 0/1 Trump vote of each ballot
+        """
+        for ballot in zip(precinct_portions, tabulator_nums, harris_votes, trump_votes):
+            self.add_vote(*ballot)
+    
+    def add_vote(self, precinct_portion: Any, tabulator_num: Any, harris_vote: int, trump_vote: int) -> None:
+        """
+        Add one ballot.
         
-        # Process each JSON object in the array
-        depth = 0
-        current_object = ""
-        in_string = False
-        escape_next = False
+        Ballots of a tabulator with no Harris or Trump vote are only used to
+        register the tabulator, and are not counted in record_count.
         
-        for char in f.read():
-            # Handle escape sequences
-            if escape_next:
-                escape_next = False
-                current_object += char
-                continue
-                
-            if char == '\\':
-                escape_next = True
-                current_object += char
-                continue
-                
-            current_object += char
-            
-            # Handle string literals
-            if char == '"' and not escape_next:
-                in_string = not in_string
+        Args:
+            precinct_portion: PrecinctPortion of the ballot
+            tabulator_num: TabulatorNum of the ballot
+            harris_vote: 1 for a Harris vote, else 0
+            trump_vote: 1 for a Trump vote, else 0
+        """
+        # Extract precinct information
+        precinct_number = extract_precinct_number(precinct_portion)
+
+        # Track votes by tabulator for the scatter plot
+        if self.by_tabulator and tabulator_num:
+            if tabulator_num not in self.tabulator_data:
+                self.tabulator_data[tabulator_num] = {
+                    "total_votes": 0,
+                    "trump_votes": 0,
+                    "harris_votes": 0,
+                    "precincts": Counter(),  # Votes per precinct, in first-seen order
+                    "is_urban": None,  # Will be set based on the majority of its precincts
+                    "vote_history": [],  # List to store the sequence of votes (0 for Harris, 1 for Trump)
+                    "urban_voter": [],  # List to track if each voter is from an urban precinct (1) or rural (0)
+                    "urban_votes": 0,  # Count of votes from urban precincts
+                    "rural_votes": 0   # Count of votes from rural precincts
+                }
+            tabulator = self.tabulator_data[tabulator_num]
+
+            # Skip if neither candidate received a vote in this record
+            if harris_vote == 0 and trump_vote == 0:
+                return
+
+            # Determine if this is an urban or rural precinct
+            is_urban_vote = False
+            if precinct_number:
+                is_urban_vote = is_urban_precinct(precinct_number, self.rural)
+                tabulator["precincts"][precinct_number] += 1
+
+            # Record a Trump vote (1) or, failing that, a Harris vote (0)
+            if trump_vote > 0 or harris_vote > 0:
+                tabulator["total_votes"] += 1
+                if trump_vote > 0:
+                    tabulator["trump_votes"] += 1
+                    tabulator["vote_history"].append(1)
+                else:
+                    tabulator["harris_votes"] += 1
+                    tabulator["vote_history"].append(0)
+                tabulator["urban_voter"].append(1 if is_urban_vote else 0)
+
+                # Update urban/rural counts
+                if is_urban_vote:
+                    tabulator["urban_votes"] += 1
+                else:
+                    tabulator["rural_votes"] += 1
+
+        if precinct_number:
+            # Classify the precinct
+            is_urban = is_urban_precinct(precinct_number, self.rural)
+            self.precinct_classifications[precinct_number] = "urban" if is_urban else "rural"
+
+            # Map tabulator to precinct
+            if tabulator_num:
+                self.tabulator_to_precinct[tabulator_num] = precinct_number
+
+            # Update vote counts by area type
+            area_votes = self.urban_votes if is_urban else self.rural_votes
+            area_votes["Harris, Kamala D. (DEM)"] += harris_vote
+            area_votes["Trump, Donald J. (REP)"] += trump_vote
+
+            # Update precinct vote counts
+            if precinct_number not in self.precinct_vote_counts:
+                self.precinct_vote_counts[precinct_number] = {
+                    "Harris, Kamala D. (DEM)": 0,
+                    "Trump, Donald J. (REP)": 0,
+                    "total": 0
+                }
+
+            counts = self.precinct_vote_counts[precinct_number]
+            counts["Harris, Kamala D. (DEM)"] += harris_vote
+            counts["Trump, Donald J. (REP)"] += trump_vote
+            counts["total"] += harris_vote + trump_vote
+
+        self.record_count += 1
+    
+    def merge(self, other: "PrecinctAggregator") -> None:
+        """
+        Add the aggregate of the shard that follows this one.
+        
+        Args:
+            other: Aggregate of the records right after the ones added to this one
+        """
+        self.record_count += other.record_count
+        for precinct, classification in other.precinct_classifications.items():
+            self.precinct_classifications.setdefault(precinct, classification)
+        # Later shards saw each tabulator's precinct last
+        self.tabulator_to_precinct.update(other.tabulator_to_precinct)
+
+        for tabulator_num, theirs in other.tabulator_data.items():
+            ours = self.tabulator_data.setdefault(tabulator_num, theirs)
+            if ours is theirs:
                 continue
-                
-            # Only process structural characters outside of strings
-            if not in_string:
-                if char == '{':
-                    depth += 1
-                elif char == '}':
-                    depth -= 1
-                    if depth == 0:
-                        # We've reached the end of a complete JSON object
-                        try:
-                            # Parse the JSON object
-                            vote_record = json.loads(current_object)
-                            
-                            # Extract precinct information
-                            precinct_portion = vote_record.get("PrecinctPortion", "")
-                            precinct_number = extract_precinct_number(precinct_portion)
-                            
-                            # Extract tabulator information
-                            tabulator_num = vote_record.get("TabulatorNum", "")
-                                                        # Track votes by tabulator for the scatter plot
-                            if by_tabulator and tabulator_num:
-                                if tabulator_num not in tabulator_data:
-                                    tabulator_data[tabulator_num] = {
-                                        "total_votes": 0,
-                                        "trump_votes": 0,
-                                        "harris_votes": 0,
-                                        "precincts": [],
-                                        "is_urban": None,  # Will be set based on the majority of its precincts
-                                        "vote_history": [],  # List to store the sequence of votes (0 for Harris, 1 for Trump)
-                                        "urban_voter": [],  # List to track if each voter is from an urban precinct (1) or rural (0)
-                                        "urban_votes": 0,  # Count of votes from urban precincts
-                                        "rural_votes": 0   # Count of votes from rural precincts
-                                    }
-                                
-                                # Check if this record has a vote for either Harris or Trump
-                                # Note: In the vote record, a value of 1 indicates a vote for that candidate
-                                harris_vote = vote_record.get("Harris, Kamala D. (DEM)", 0)
-                                trump_vote = vote_record.get("Trump, Donald J. (REP)", 0)
-                                
-                                # Skip if neither candidate received a vote in this record
-                                if harris_vote == 0 and trump_vote == 0:
-                                    continue
-                                
-                                # Determine if this is an urban or rural precinct
-                                is_urban_vote = False
-                                if precinct_number:
-                                    is_urban_vote = is_urban_precinct(precinct_number)
-                                    tabulator_data[tabulator_num]["precincts"].append(precinct_number)
-                                
-                                # Process a Trump vote
-                                if trump_vote > 0:
-                                    tabulator_data[tabulator_num]["total_votes"] += 1
-                                    tabulator_data[tabulator_num]["trump_votes"] += 1
-                                    tabulator_data[tabulator_num]["vote_history"].append(1)  # 1 for Trump
-                                    tabulator_data[tabulator_num]["urban_voter"].append(1 if is_urban_vote else 0)
-                                    
-                                    # Update urban/rural counts
-                                    if is_urban_vote:
-                                        tabulator_data[tabulator_num]["urban_votes"] += 1
-                                    else:
-                                        tabulator_data[tabulator_num]["rural_votes"] += 1
-                                
-                                # Process a Harris vote
-                                elif harris_vote > 0:
-                                    tabulator_data[tabulator_num]["total_votes"] += 1
-                                    tabulator_data[tabulator_num]["harris_votes"] += 1
-                                    tabulator_data[tabulator_num]["vote_history"].append(0)  # 0 for Harris
-                                    tabulator_data[tabulator_num]["urban_voter"].append(1 if is_urban_vote else 0)
-                                    
-                                    # Update urban/rural counts
-                                    if is_urban_vote:
-                                        tabulator_data[tabulator_num]["urban_votes"] += 1
-                                    else:
-                                        tabulator_data[tabulator_num]["rural_votes"] += 1
-                            
-                            if precinct_number:
-                                # Classify the precinct
-                                is_urban = is_urban_precinct(precinct_number)
-                                
-                                # Store classification
-                                if is_urban:
-                                    urban_precincts_found.add(precinct_number)
-                                else:
-                                    rural_precincts_found.add(precinct_number)
-                                
-                                precinct_classifications[precinct_number] = "urban" if is_urban else "rural"
-                                
-                                # Map tabulator to precinct
-                                if tabulator_num:
-                                    tabulator_to_precinct[tabulator_num] = precinct_number
-                                
-                                # Get vote counts for Harris and Trump
-                                harris_votes = vote_record.get("Harris, Kamala D. (DEM)", 0)
-                                trump_votes = vote_record.get("Trump, Donald J. (REP)", 0)
-                                
-                                # Update vote counts by area type
-                                if is_urban:
-                                    urban_votes["Harris, Kamala D. (DEM)"] += harris_votes
-                                    urban_votes["Trump, Donald J. (REP)"] += trump_votes
-                                else:
-                                    rural_votes["Harris, Kamala D. (DEM)"] += harris_votes
-                                    rural_votes["Trump, Donald J. (REP)"] += trump_votes
-                                
-                                # Update precinct vote counts
-                                if precinct_number not in precinct_vote_counts:
-                                    precinct_vote_counts[precinct_number] = {
-                                        "Harris, Kamala D. (DEM)": 0,
-                                        "Trump, Donald J. (REP)": 0,
-                                        "total": 0
-                                    }
-                                
-                                precinct_vote_counts[precinct_number]["Harris, Kamala D. (DEM)"] += harris_votes
-                                precinct_vote_counts[precinct_number]["Trump, Donald J. (REP)"] += trump_votes
-                                precinct_vote_counts[precinct_number]["total"] += harris_votes + trump_votes
-                            
-                            record_count += 1
-                            if max_records and record_count >= max_records:
-                                break
-                                
-                        except json.JSONDecodeError as e:
-                            # Skip invalid JSON objects
-                            print(f"Warning: Could not parse record: {e}")
-                        
-                        # Reset for the next object
-                        current_object = ""
-                
-                # Skip the comma and whitespace between objects
-                if depth == 0 and char in [',', ' ', '\n', '\r', '\t']:
-                    current_object = ""
+            for key in ("total_votes", "trump_votes", "harris_votes", "urban_votes", "rural_votes"):
+                ours[key] += theirs[key]
+            ours["precincts"].update(theirs["precincts"])
+            for key in ("vote_history", "urban_voter"):
+                ours[key].extend(theirs[key])
+
+        for area_votes, theirs in ((self.urban_votes, other.urban_votes), (self.rural_votes, other.rural_votes)):
+            for candidate, votes in theirs.items():
+                area_votes[candidate] += votes
+
+        for precinct, theirs in other.precinct_vote_counts.items():
+            ours = self.precinct_vote_counts.setdefault(precinct, theirs)
+            if ours is not theirs:
+                for key, votes in theirs.items():
+                    ours[key] += votes
+    
+    def precincts_found(self, classification: str) -> Set[int]:
+        """Return the set of precincts seen with a classification ("urban" or "rural"); it has no defined order."""
+        return {precinct for precinct, found in self.precinct_classifications.items() if found == classification}
+
+def aggregate_shard(task: Dict[str, Any]) -> PrecinctAggregator:
+    """
+    Aggregate one shard of a vote file (run in a worker process).
+    
+    Args:
+        task: Dictionary with vote_file, start, stop, by_tabulator and rural
+        
+    Returns:
+        PrecinctAggregator of the shard
+    """
+    aggregator = PrecinctAggregator(task['by_tabulator'], task['rural'])
+    for vote_record in iter_vote_records(task['vote_file'], task['start'], task['stop']):
+        aggregator.add(vote_record)
+    return aggregator
+
+def aggregate_vote_file(vote_file: str, max_records: int = None, by_tabulator: bool = True,
+                        rural: Optional[AbstractSet[int]] = None, workers: int = 1) -> PrecinctAggregator:
+    """
+    Aggregate a vote file, in a process pool if it can be split into shards.
+    
+    Shards are merged in file order, so the result is identical to a single pass.
+    
+    Args:
+        vote_file: Path to the vote data file or columnar vote table directory
+        max_records: Maximum number of records to process (forces a single pass)
+        by_tabulator: Track per-tabulator data for the scatter plot
+        rural: Rural precinct numbers (default: those in rural_precincts.txt)
+        workers: Number of worker processes
+        
+    Returns:
+        PrecinctAggregator over the whole file
+        
+    Raises:
+        ValueError: If the vote file cannot be read
+    """
+    shards = None
+    if workers > 1 and max_records:
+        print("--max-records counts records in file order, aggregating in a single process")
+    elif workers > 1:
+        shards = plan_shards(vote_file, workers * 4)
+        if shards is None:
+            print("Input cannot be split into shards, aggregating in a single process")
+    
+    aggregator = PrecinctAggregator(by_tabulator, rural)
+    if shards is None:
+        # Stream the records so the entire file never has to be held in memory
+        for vote_record in iter_vote_records(vote_file):
+            aggregator.add(vote_record)
+            if max_records and aggregator.record_count >= max_records:
+                break
+        return aggregator
+    
+    print(f"Aggregating {len(shards)} shards with {workers} workers...")
+    tasks = [{'vote_file': vote_file, 'start': start, 'stop': stop, 'by_tabulator': by_tabulator, 'rural': rural}
+             for start, stop in shards]
+    with multiprocessing.Pool(workers) as pool:
+        # imap returns results in shard order, which keeps the merge deterministic
+        for part in pool.imap(aggregate_shard, tasks):
+            aggregator.merge(part)
+    return aggregator
+
+def process_vote_data(vote_file: str, output_dir: str, max_records: int = None, by_tabulator: bool = True,
+                      rural: Optional[AbstractSet[int]] = None, workers: int = 1,
+                      window_sizes: Optional[Sequence[int]] = None) -> Dict[str, Any]:
+    """
+    Process vote data and classify precincts as urban or rural.
+    
+    Args:
+        vote_file: Path to the vote data JSON file or columnar vote table directory
+        output_dir: Directory to save the output files
+        max_records: Maximum number of records to process (for testing)
+        rural: Rural precinct numbers (default: those in rural_precincts.txt)
+        workers: Number of worker processes for columnar tables and NDJSON files
+        window_sizes: Rolling-average window sizes to precompute (default: WINDOW_SIZES)
+        
+    Returns:
+        Dictionary with statistics and classifications
+    """
+    print(f"Processing {vote_file}...")
+    
+    try:
+        aggregator = aggregate_vote_file(vote_file, max_records, by_tabulator, rural, workers)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return {}
+    
+    output_base = os.path.basename(os.path.normpath(vote_file)).split('.')[0]
+    return write_classification_outputs(aggregator, output_base, output_dir, window_sizes)
+
+def write_classification_outputs(aggregator: PrecinctAggregator, output_base: str, output_dir: str,
+                                 window_sizes: Optional[Sequence[int]] = None) -> Dict[str, Any]:
+    """
+    Write the precinct classification, statistics, CSV and scatter plot outputs.
+    
+    Args:
+        aggregator: PrecinctAggregator over one vote type's ballots
+        output_base: Prefix of the output file names, e.g. "early_votes"
+        output_dir: Directory to save the output files
+        window_sizes: Rolling-average window sizes to precompute (default: WINDOW_SIZES)
+        
+    Returns:
+        Dictionary with statistics and classifications
+    """
+    by_tabulator = aggregator.by_tabulator
+    
+    # Data for the scatter plot (votes per machine vs Trump percentage)
+    scatter_data = []
+    
+    urban_precincts_found = aggregator.precincts_found("urban")
+    rural_precincts_found = aggregator.precincts_found("rural")
+    precinct_classifications = aggregator.precinct_classifications
+    precinct_vote_counts = aggregator.precinct_vote_counts
+    tabulator_to_precinct = aggregator.tabulator_to_precinct
+    tabulator_data = aggregator.tabulator_data
+    urban_votes = aggregator.urban_votes
+    rural_votes = aggregator.rural_votes
     
     # Calculate Trump percentage for each precinct
     precinct_trump_percentages = {}
@@ -625,7 +501,7 @@ def process_vote_data(vote_file: str, output_dir: str, max_records: int = None,
                 "trump_percentage": trump_percentage,
                 "is_urban": is_urban,
                 "urban_percentage": urban_percentage,
-                "precincts": list(data["precincts"]),
+                "precincts": dict(data["precincts"]),
                 "vote_history": data["vote_history"],
                 "urban_voter": data["urban_voter"]
             })
@@ -645,8 +521,6 @@ def process_vote_data(vote_file: str, output_dir: str, max_records: int = None,
     print(f"Rural Votes: {rural_total} (Trump: {rural_trump_pct:.2f}%)")
     
     # Save results
-    output_base = os.path.basename(vote_file).split('.')[0]
-    
     # Save precinct classifications
     classifications_file = os.path.join(output_dir, f"{output_base}_precinct_classifications.json")
     with open(classifications_file, 'w') as f:
@@ -695,37 +569,206 @@ def process_vote_data(vote_file: str, output_dir: str, max_records: int = None,
     
     # Save scatter plot data
     if by_tabulator:
+        scatter = {
+            "data": scatter_data,
+            "vote_type": output_base,
+            "total_tabulators": len(tabulator_data)
+        }
         scatter_file = os.path.join(output_dir, f"{output_base}_scatter_data.json")
         with open(scatter_file, 'w') as f:
-            json.dump({
-                "data": scatter_data,
-                "vote_type": output_base,
-                "total_tabulators": len(tabulator_data)
-            }, f, indent=2)
+            # vote_history and urban_voter are bit-packed (see packed_bits.py)
+            json.dump(pack_scatter_data(scatter), f, indent=2)
         
         print(f"Saved scatter plot data to {scatter_file}")
+        
+        # The same data as a summary index plus sequence shards, for pages that load lazily
+        index_file = write_scatter_shards(scatter, output_dir, output_base)
+        print(f"Saved scatter index and shards to {index_file}")
+        
+        # Rolling-average series drawn by src/rolling_average.js
+        rolling_file = write_rolling_averages(scatter, output_dir, output_base, window_sizes)
+        print(f"Saved rolling averages to {rolling_file}")
+        
+        # Pre-binned histograms drawn by src/histogram.js
+        histogram_file = write_histograms(scatter, output_dir, output_base)
+        print(f"Saved histograms to {histogram_file}")
     
     return {
         "urban_precincts": len(urban_precincts_found),
         "rural_precincts": len(rural_precincts_found),
         "urban_trump_pct": urban_trump_pct,
-        "rural_trump_pct": rural_trump_pct
+        "rural_trump_pct": rural_trump_pct,
+        "urban_votes": urban_votes,
+        "rural_votes": rural_votes,
+        "precinct_classifications": precinct_classifications
     }
 
+def expand_vote_files(paths: List[str]) -> List[str]:
+    """
+    Expand glob patterns in a list of vote file paths.
+    
+    Args:
+        paths: Vote file paths or glob patterns, e.g. "processed_data/*_votes"
+        
+    Returns:
+        Vote file paths, patterns replaced by their sorted matches, without duplicates
+        
+    Raises:
+        ValueError: If a pattern matches nothing
+    """
+    vote_files = []
+    for path in paths:
+        matches = sorted(glob.glob(path)) if glob.has_magic(path) else [path]
+        # Skip files written by this script that a broad pattern may pick up
+        matches = [m for m in matches if m == path or not m.endswith(CLASSIFICATION_SUFFIXES)]
+        if not matches:
+            raise ValueError(f"No vote files match {path}")
+        vote_files.extend(m for m in matches if m not in vote_files)
+    return vote_files
+
+# Rural precinct set of a worker process, set once by the pool initializer
+worker_rural = None
+
+def init_classify_worker(rural: AbstractSet[int]) -> None:
+    """Store the shared rural precinct set in a classification worker process."""
+    global worker_rural
+    worker_rural = rural
+
+def classify_file_task(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Classify one vote file in a worker process.
+    
+    Args:
+        task: Dictionary with vote_file, output_dir, max_records, by_tabulator and window_sizes
+        
+    Returns:
+        Statistics from process_vote_data
+    """
+    return process_vote_data(task['vote_file'], task['output_dir'], task['max_records'], task['by_tabulator'], worker_rural,
+                             window_sizes=task['window_sizes'])
+
+def classify_vote_files(vote_files: List[str], output_dir: str, max_records: int = None, by_tabulator: bool = True,
+                        rural: Optional[AbstractSet[int]] = None, workers: int = 1,
+                        window_sizes: Optional[Sequence[int]] = None) -> Dict[str, Any]:
+    """
+    Classify several vote files concurrently and write a combined summary.
+    
+    Each file is classified in its own worker process, largest first, with the
+    rural precinct set sent to each worker once.
+    
+    Args:
+        vote_files: Paths to vote data files or columnar vote table directories
+        output_dir: Directory to save the output files
+        max_records: Maximum number of records to process per file (for testing)
+        by_tabulator: Generate statistics by tabulator
+        rural: Rural precinct numbers (default: those in rural_precincts.txt)
+        workers: Number of files classified at once
+        window_sizes: Rolling-average window sizes to precompute (default: WINDOW_SIZES)
+        
+    Returns:
+        Combined summary dictionary, as written to precinct_summary.json
+    """
+    rural = rural_precincts if rural is None else rural
+    
+    def input_size(path):
+        if is_vote_table(path):
+            return len(open_vote_table(path))
+        return os.path.getsize(path) if os.path.exists(path) else 0
+    
+    tasks = [{'vote_file': f, 'output_dir': output_dir, 'max_records': max_records, 'by_tabulator': by_tabulator,
+              'window_sizes': window_sizes} for f in vote_files]
+    # Start the largest files first, so the run takes about as long as the largest file
+    order = sorted(range(len(tasks)), key=lambda i: input_size(vote_files[i]), reverse=True)
+    
+    print(f"Classifying {len(vote_files)} vote files with {workers} workers...")
+    results = [None] * len(tasks)
+    with multiprocessing.Pool(workers, initializer=init_classify_worker, initargs=(rural,)) as pool:
+        for i, stats in zip(order, pool.imap(classify_file_task, [tasks[i] for i in order])):
+            results[i] = stats
+    
+    return write_combined_summary(vote_files, results, output_dir)
+
+def write_combined_summary(vote_files: List[str], results: List[Dict[str, Any]], output_dir: str) -> Dict[str, Any]:
+    """
+    Write precinct_summary.json, combining the statistics of several vote files.
+    
+    Args:
+        vote_files: Paths of the classified vote files
+        results: Statistics from process_vote_data for each file (empty if it failed)
+        output_dir: Directory to save the summary
+        
+    Returns:
+        Combined summary dictionary
+    """
+    candidates = ["Harris, Kamala D. (DEM)", "Trump, Donald J. (REP)"]
+    combined_votes = {"urban": dict.fromkeys(candidates, 0), "rural": dict.fromkeys(candidates, 0)}
+    combined_classifications = {}
+    by_vote_file = {}
+    
+    for vote_file, stats in zip(vote_files, results):
+        output_base = os.path.basename(os.path.normpath(vote_file)).split('.')[0]
+        if not stats:
+            print(f"No statistics for {vote_file}, leaving it out of the combined summary")
+            continue
+        for area in ("urban", "rural"):
+            for candidate in candidates:
+                combined_votes[area][candidate] += stats[f"{area}_votes"][candidate]
+        for precinct, classification in stats["precinct_classifications"].items():
+            combined_classifications.setdefault(precinct, classification)
+        by_vote_file[output_base] = {key: value for key, value in stats.items() if key != "precinct_classifications"}
+    
+    combined = {}
+    for area, votes in combined_votes.items():
+        total = sum(votes.values())
+        combined[f"{area}_precincts"] = sum(1 for c in combined_classifications.values() if c == area)
+        combined[f"{area}_votes"] = votes
+        combined[f"{area}_trump_pct"] = (votes["Trump, Donald J. (REP)"] / total * 100) if total > 0 else 0
+    
+    print("\nCombined Classification Results:")
+    print(f"Urban Precincts: {combined['urban_precincts']}")
+    print(f"Rural Precincts: {combined['rural_precincts']}")
+    print(f"Urban Trump: {combined['urban_trump_pct']:.2f}%, Rural Trump: {combined['rural_trump_pct']:.2f}%")
+    
+    summary = {"vote_files": by_vote_file, "combined": combined}
+    summary_file = os.path.join(output_dir, "precinct_summary.json")
+    with open(summary_file, 'w') as f:
+        json.dump(summary, f, indent=2)
+    print(f"Saved combined summary to {summary_file}")
+    return summary
+
 def main():
     parser = argparse.ArgumentParser(description='Classify precincts as urban or rural')
-    parser.add_argument('vote_file', help='Path to vote data JSON file')
+    parser.add_argument('vote_files', nargs='+', metavar='vote_file', help='Path to vote data JSON/NDJSON file or columnar vote table directory; several paths or glob patterns classify the files concurrently')
     parser.add_argument('--output-dir', default='data/processed_data', help='Directory to save output files')
     parser.add_argument('--max-records', type=int, help='Maximum number of records to process (for testing)')
     parser.add_argument('--by-precinct', action='store_true', help='Generate statistics by precinct instead of by tabulator')
+    parser.add_argument('--workers', type=int, help='Worker processes: files classified at once when given several files (default: one per file, up to the CPU count), otherwise shards of a columnar table or NDJSON file (default: 1)')
+    parser.add_argument('--rural-precincts', default=RURAL_PRECINCTS_FILE, help='Text file listing the rural precinct numbers, one per line')
+    parser.add_argument('--window-sizes', type=parse_window_sizes, default=WINDOW_SIZES, help=f'Comma-separated rolling-average window sizes to precompute (default: {",".join(map(str, WINDOW_SIZES))})')
     
     args = parser.parse_args()
+    if not all(1 <= size <= MAX_WINDOW_SIZE for size in args.window_sizes):
+        parser.error(f"--window-sizes must be between 1 and {MAX_WINDOW_SIZE}")
     
     # Ensure output directory exists
     os.makedirs(args.output_dir, exist_ok=True)
     
+    rural = load_rural_precincts(args.rural_precincts)
+    print(f"Loaded {len(rural)} rural precincts from {args.rural_precincts}")
+    
+    try:
+        vote_files = expand_vote_files(args.vote_files)
+    except ValueError as e:
+        parser.error(str(e))
+    
     # Process the vote data
-    process_vote_data(args.vote_file, args.output_dir, args.max_records, not args.by_precinct)
+    if len(vote_files) == 1:
+        process_vote_data(vote_files[0], args.output_dir, args.max_records, not args.by_precinct, rural, args.workers or 1,
+                          args.window_sizes)
+    else:
+        workers = args.workers or min(len(vote_files), os.cpu_count() or 1)
+        classify_vote_files(vote_files, args.output_dir, args.max_records, not args.by_precinct, rural, workers,
+                            args.window_sizes)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,516 @@
+#!/usr/bin/env python3
+"""
+Columnar on-disk storage for per-vote-type ballot data.
+
+Each vote type is written to its own directory (e.g. ``early_votes/``):
+
+    manifest.json   row count, column layout and metadata dictionaries
+    col_000.*       raw little-endian arrays for each column
+
+Low-cardinality metadata columns (TabulatorNum, PrecinctPortion, ...) are
+dictionary-encoded: ``col_NNN.bin`` holds int32 codes into the column's value
+list in the manifest, with -1 standing for a missing value. Other metadata
+columns (CvrNumber, ImagePath, ...) are stored as UTF-8 strings: the bytes in
+``col_NNN.bin``, int64 end offsets in ``col_NNN.ends`` and a 0/1 missing-value
+mask in ``col_NNN.nulls``. Candidate columns hold 0/1 votes as int8.
+
+Readers memory-map the column files, so downstream tools only touch the
+columns they actually use instead of re-parsing a multi-GB JSON array.
+"""
+
+import json
+import os
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+MANIFEST_NAME = "manifest.json"
+FORMAT_VERSION = 2
+
+CODE_DTYPE = np.dtype("<i4")
+VOTE_DTYPE = np.dtype("i1")
+OFFSET_DTYPE = np.dtype("<i8")
+NULL_DTYPE = np.dtype("i1")
+MISSING_CODE = -1
+
+
+class CategoryDictionary:
+    """
+    Value <-> int32 code mapping for a dictionary-encoded column.
+
+    Codes are assigned in first-seen order; missing values encode to MISSING_CODE.
+    """
+
+    def __init__(self, values: Optional[List[Any]] = None):
+        """
+        Args:
+            values: Initial values, in code order
+        """
+        self.values: List[Any] = []
+        self.lookup: Dict[Any, int] = {}
+        if values:
+            self.remap(values)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def _code(self, value: Any) -> int:
+        code = self.lookup.get(value)
+        if code is None:
+            code = len(self.values)
+            self.lookup[value] = code
+            self.values.append(value)
+        return code
+
+    def remap(self, values: List[Any]) -> np.ndarray:
+        """
+        Map another dictionary's values onto this dictionary, adding unseen values.
+
+        Args:
+            values: Values of the other dictionary, in its code order
+
+        Returns:
+            int32 array such that ``mapping[other_codes]`` gives codes in this
+            dictionary. The extra last slot maps MISSING_CODE (-1) to itself.
+        """
+        mapping = np.empty(len(values) + 1, dtype=CODE_DTYPE)
+        for i, value in enumerate(values):
+            mapping[i] = self._code(value)
+        mapping[-1] = MISSING_CODE
+        return mapping
+
+    def encode(self, values) -> np.ndarray:
+        """
+        Encode a batch of values, with None/NaN as MISSING_CODE.
+
+        Args:
+            values: Sequence or array of values
+
+        Returns:
+            int32 code array
+        """
+        local_codes, uniques = pd.factorize(np.asarray(values, dtype=object), use_na_sentinel=True)
+        return self.remap(list(uniques))[local_codes]
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """
+        Decode codes back into values.
+
+        Args:
+            codes: int32 code array
+
+        Returns:
+            Object array of values, with None for MISSING_CODE
+        """
+        # Trailing None slot so that MISSING_CODE (-1) decodes to None
+        table = np.array(self.values + [None], dtype=object)
+        return table[codes]
+
+
+class ColumnarVoteWriter:
+    """
+    Append-only writer for a columnar vote table.
+
+    Rows can be appended in any number of batches; the manifest (including the
+    metadata dictionaries) is written when the writer is closed. A writer can
+    be reopened from the state returned by checkpoint() to continue a table.
+    """
+
+    def __init__(self, directory: str, metadata_cols: List[str], candidate_cols: List[str],
+                 dictionaries: Optional[Dict[str, CategoryDictionary]] = None,
+                 resume: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            directory: Directory to write the table into (created if needed)
+            metadata_cols: Metadata columns to store
+            candidate_cols: Candidate columns to store as int8 votes
+            dictionaries: Dictionaries for the metadata columns to dictionary-encode.
+                They may be shared with other writers and the ingest code; other
+                metadata columns are stored as strings.
+            resume: State from checkpoint() of an earlier writer of the same table.
+                The column files are truncated to that state and appended to.
+        """
+        self.directory = directory
+        self.metadata_cols = list(metadata_cols)
+        self.candidate_cols = list(candidate_cols)
+        self.dictionaries = dictionaries if dictionaries is not None else {}
+        self.num_rows = resume["num_rows"] if resume else 0
+
+        os.makedirs(directory, exist_ok=True)
+        self.files = {}
+        self.handles = {}
+        self.string_bytes = {}
+        for i, col in enumerate(self.metadata_cols + self.candidate_cols):
+            name = f"col_{i:03d}"
+            self.files[col] = name
+            if self.kind(col) == "string":
+                self.string_bytes[col] = resume["string_bytes"][col] if resume else 0
+                self.handles[col] = self._open(f"{name}.bin", self.string_bytes[col], resume)
+                self.handles[(col, "ends")] = self._open(f"{name}.ends", self.num_rows * OFFSET_DTYPE.itemsize, resume)
+                self.handles[(col, "nulls")] = self._open(f"{name}.nulls", self.num_rows * NULL_DTYPE.itemsize, resume)
+            else:
+                itemsize = VOTE_DTYPE.itemsize if self.kind(col) == "votes" else CODE_DTYPE.itemsize
+                self.handles[col] = self._open(f"{name}.bin", self.num_rows * itemsize, resume)
+
+    def _open(self, filename: str, size: int, resume: Optional[Dict[str, Any]]):
+        """Open a column file for appending, truncated to size bytes when resuming."""
+        path = os.path.join(self.directory, filename)
+        if not resume:
+            return open(path, "wb")
+        handle = open(path, "r+b")
+        handle.truncate(size)
+        handle.seek(size)
+        return handle
+
+    @property
+    def path(self) -> str:
+        """Location of the table (its directory)."""
+        return self.directory
+
+    def kind(self, col: str) -> str:
+        """Return how a column is stored: 'dictionary', 'string' or 'votes'."""
+        if col in self.candidate_cols:
+            return "votes"
+        return "dictionary" if col in self.dictionaries else "string"
+
+    def _write_strings(self, col: str, values) -> None:
+        """Append a batch of strings (None for missing) to a string column."""
+        nulls = np.array([value is None for value in values], dtype=NULL_DTYPE)
+        encoded = [b"" if value is None else str(value).encode("utf-8") for value in values]
+        lengths = np.fromiter((len(b) for b in encoded), dtype=OFFSET_DTYPE, count=len(encoded))
+        ends = self.string_bytes[col] + np.cumsum(lengths, dtype=OFFSET_DTYPE)
+        if len(ends):
+            self.string_bytes[col] = int(ends[-1])
+
+        self.handles[col].write(b"".join(encoded))
+        self.handles[(col, "ends")].write(ends.tobytes())
+        self.handles[(col, "nulls")].write(nulls.tobytes())
+
+    def append_encoded(self, metadata: Dict[str, Any], votes: Dict[str, Any], num_rows: int) -> None:
+        """
+        Append a batch of rows whose dictionary columns are already encoded.
+
+        Args:
+            metadata: Mapping of metadata column to int32 codes (dictionary columns)
+                or values (string columns); absent columns are stored as missing
+            votes: Mapping of candidate column to a sequence of 0/1 votes
+            num_rows: Number of rows in the batch
+        """
+        for col in self.metadata_cols:
+            if self.kind(col) == "dictionary":
+                if col in metadata:
+                    codes = np.asarray(metadata[col], dtype=CODE_DTYPE)
+                else:
+                    codes = np.full(num_rows, MISSING_CODE, dtype=CODE_DTYPE)
+                self.handles[col].write(codes.tobytes())
+            else:
+                self._write_strings(col, metadata[col] if col in metadata else [None] * num_rows)
+
+        for col in self.candidate_cols:
+            if col in votes:
+                column = np.asarray(votes[col], dtype=VOTE_DTYPE)
+            else:
+                column = np.zeros(num_rows, dtype=VOTE_DTYPE)
+            self.handles[col].write(column.tobytes())
+
+        self.num_rows += num_rows
+
+    def append_columns(self, metadata: Dict[str, Any], votes: Dict[str, Any]) -> None:
+        """
+        Append a batch of rows given column-wise as raw values.
+
+        Args:
+            metadata: Mapping of metadata column to a sequence of raw values (None for missing)
+            votes: Mapping of candidate column to a sequence of 0/1 votes
+        """
+        lengths = {len(v) for v in metadata.values()} | {len(v) for v in votes.values()}
+        if not lengths:
+            return
+        if len(lengths) != 1:
+            raise ValueError(f"Columns have mismatched lengths: {sorted(lengths)}")
+
+        encoded = {}
+        for col, values in metadata.items():
+            if self.kind(col) == "dictionary":
+                encoded[col] = self.dictionaries[col].encode(values)
+            else:
+                encoded[col] = values
+        self.append_encoded(encoded, votes, lengths.pop())
+
+    def append_records(self, records: List[Dict[str, Any]]) -> None:
+        """
+        Append a batch of record dictionaries.
+
+        Args:
+            records: List of vote records
+        """
+        if not records:
+            return
+        metadata = {col: [record.get(col) for record in records] for col in self.metadata_cols}
+        votes = {col: [record.get(col, 0) for record in records] for col in self.candidate_cols}
+        self.append_columns(metadata, votes)
+
+    def checkpoint(self) -> Dict[str, Any]:
+        """
+        Flush the column files and return the state needed to resume the table.
+
+        Returns:
+            Dictionary with num_rows and the byte length of each string column
+        """
+        for handle in self.handles.values():
+            handle.flush()
+        return {"num_rows": self.num_rows, "string_bytes": dict(self.string_bytes)}
+
+    def close(self) -> Dict[str, Any]:
+        """
+        Flush the column files and write the manifest.
+
+        Returns:
+            The manifest dictionary
+        """
+        for handle in self.handles.values():
+            handle.close()
+
+        columns = {}
+        for col in self.metadata_cols + self.candidate_cols:
+            kind = self.kind(col)
+            spec = {"kind": kind, "file": self.files[col]}
+            if kind == "dictionary":
+                spec["dtype"] = CODE_DTYPE.str
+                spec["values"] = list(self.dictionaries[col].values)
+            elif kind == "votes":
+                spec["dtype"] = VOTE_DTYPE.str
+            columns[col] = spec
+
+        manifest = {
+            "format_version": FORMAT_VERSION,
+            "num_rows": self.num_rows,
+            "metadata_columns": self.metadata_cols,
+            "candidate_columns": self.candidate_cols,
+            "columns": columns,
+        }
+        with open(os.path.join(self.directory, MANIFEST_NAME), "w") as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+
+def write_vote_table(directory: str, records: List[Dict[str, Any]], metadata_cols: List[str], candidate_cols: List[str],
+                     dictionary_cols: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Write a list of vote records as a columnar table.
+
+    Args:
+        directory: Output directory for the table
+        records: List of vote records
+        metadata_cols: Metadata columns to store
+        candidate_cols: Candidate columns to store as int8 votes
+        dictionary_cols: Metadata columns to dictionary-encode (default: all)
+
+    Returns:
+        The manifest dictionary
+    """
+    if dictionary_cols is None:
+        dictionary_cols = metadata_cols
+    dictionaries = {col: CategoryDictionary() for col in dictionary_cols if col in metadata_cols}
+    writer = ColumnarVoteWriter(directory, metadata_cols, candidate_cols, dictionaries)
+    writer.append_records(records)
+    return writer.close()
+
+
+def concatenate_vote_tables(part_dirs: List[str], directory: str,
+                            dictionaries: Optional[Dict[str, CategoryDictionary]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Concatenate vote tables written independently (e.g. by parallel workers).
+
+    Dictionary codes are remapped onto merged dictionaries. When no dictionaries
+    are given they are built in part order, so the result is identical to
+    writing all rows through a single writer.
+
+    Args:
+        part_dirs: Table directories, in row order (missing directories are skipped)
+        directory: Output directory for the concatenated table
+        dictionaries: Dictionaries to encode against (e.g. already merged ones)
+
+    Returns:
+        The manifest dictionary, or None if none of the parts exist
+    """
+    parts = [open_vote_table(d) for d in part_dirs if is_vote_table(d)]
+    if not parts:
+        return None
+
+    first = parts[0]
+    given = dictionaries or {}
+    dictionaries = {
+        col: given.get(col, CategoryDictionary())
+        for col in first.metadata_columns if first.kind(col) == "dictionary"
+    }
+    writer = ColumnarVoteWriter(directory, first.metadata_columns, first.candidate_columns, dictionaries)
+
+    for part in parts:
+        for col in writer.metadata_cols:
+            if writer.kind(col) == "dictionary":
+                mapping = dictionaries[col].remap(part.dictionary(col))
+                writer.handles[col].write(mapping[part.array(col)].tobytes())
+            else:
+                data, ends, nulls = part.string_arrays(col)
+                writer.handles[col].write(np.asarray(data).tobytes())
+                writer.handles[(col, "ends")].write((np.asarray(ends) + writer.string_bytes[col]).tobytes())
+                writer.handles[(col, "nulls")].write(np.asarray(nulls).tobytes())
+                writer.string_bytes[col] += len(data)
+        for col in writer.candidate_cols:
+            writer.handles[col].write(np.asarray(part.array(col)).tobytes())
+        writer.num_rows += part.num_rows
+    return writer.close()
+
+
+def is_vote_table(path: str) -> bool:
+    """Return True if path is a columnar vote table directory."""
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, MANIFEST_NAME))
+
+
+class VoteTable:
+    """
+    Read-only, memory-mapped view of a columnar vote table.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory: Directory containing manifest.json and the column files
+        """
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST_NAME), "r") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported vote table format in {directory}: {self.manifest.get('format_version')}")
+
+        self.num_rows: int = self.manifest["num_rows"]
+        self.metadata_columns: List[str] = self.manifest["metadata_columns"]
+        self.candidate_columns: List[str] = self.manifest["candidate_columns"]
+        self._arrays: Dict[Any, np.ndarray] = {}
+        self._dictionaries: Dict[str, CategoryDictionary] = {}
+
+    def __len__(self) -> int:
+        return self.num_rows
+
+    @property
+    def columns(self) -> List[str]:
+        return self.metadata_columns + self.candidate_columns
+
+    def kind(self, col: str) -> str:
+        """Return how a column is stored: 'dictionary', 'string' or 'votes'."""
+        return self.manifest["columns"][col]["kind"]
+
+    def _map(self, col: str, suffix: str, dtype: np.dtype, length: int) -> np.ndarray:
+        """Memory-map one column file (cached)."""
+        key = (col, suffix)
+        if key not in self._arrays:
+            path = os.path.join(self.directory, self.manifest["columns"][col]["file"] + suffix)
+            if length == 0:
+                self._arrays[key] = np.empty(0, dtype=dtype)
+            else:
+                self._arrays[key] = np.memmap(path, dtype=dtype, mode="r", shape=(length,))
+        return self._arrays[key]
+
+    def array(self, col: str) -> np.ndarray:
+        """
+        Return the raw stored array for a dictionary or votes column, memory-mapped.
+
+        Args:
+            col: Column name
+
+        Returns:
+            Read-only numpy array of codes or votes, one entry per row
+        """
+        dtype = np.dtype(self.manifest["columns"][col]["dtype"])
+        return self._map(col, ".bin", dtype, self.num_rows)
+
+    def string_arrays(self, col: str):
+        """
+        Return the memory-mapped (data, ends, nulls) arrays of a string column.
+
+        Args:
+            col: Column name
+
+        Returns:
+            uint8 data bytes, int64 end offsets and int8 missing-value mask
+        """
+        ends = self._map(col, ".ends", OFFSET_DTYPE, self.num_rows)
+        nulls = self._map(col, ".nulls", NULL_DTYPE, self.num_rows)
+        data = self._map(col, ".bin", np.dtype("u1"), int(ends[-1]) if self.num_rows else 0)
+        return data, ends, nulls
+
+    def dictionary(self, col: str) -> List[Any]:
+        """Return the value list for a dictionary-encoded metadata column."""
+        return self.manifest["columns"][col]["values"]
+
+    def decode(self, col: str, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """
+        Decode a slice of a metadata column back into its values.
+
+        Args:
+            col: Metadata column name
+            start: First row of the slice
+            stop: Row after the last row of the slice (defaults to the end)
+
+        Returns:
+            Object array of values, with None for missing values
+        """
+        if self.kind(col) == "dictionary":
+            if col not in self._dictionaries:
+                self._dictionaries[col] = CategoryDictionary(self.dictionary(col))
+            return self._dictionaries[col].decode(self.array(col)[start:stop])
+
+        data, ends, nulls = self.string_arrays(col)
+        stop = self.num_rows if stop is None else stop
+        base = int(ends[start - 1]) if start > 0 else 0
+        raw = bytes(data[base:int(ends[stop - 1])]) if stop > start else b""
+
+        values = np.empty(stop - start, dtype=object)
+        begin = 0
+        for i, end in enumerate((ends[start:stop] - base).tolist()):
+            values[i] = None if nulls[start + i] else raw[begin:end].decode("utf-8")
+            begin = end
+        return values
+
+    def iter_records(self, columns: Optional[List[str]] = None, batch_size: int = 65536,
+                     start: int = 0, stop: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield one record dictionary per row, decoding only the requested columns.
+
+        Args:
+            columns: Columns to include (defaults to all columns)
+            batch_size: Number of rows decoded at a time
+            start: First row to yield
+            stop: Row after the last row to yield (defaults to the end)
+
+        Yields:
+            Vote record dictionaries, in row order
+        """
+        columns = [col for col in (columns or self.columns) if col in self.manifest["columns"]]
+        end = self.num_rows if stop is None else min(stop, self.num_rows)
+
+        for start in range(start, end, batch_size):
+            stop = min(start + batch_size, end)
+            values = []
+            for col in columns:
+                if self.kind(col) == "votes":
+                    values.append(self.array(col)[start:stop].tolist())
+                else:
+                    values.append(self.decode(col, start, stop).tolist())
+            for row in zip(*values):
+                yield dict(zip(columns, row))
+
+
+def open_vote_table(directory: str) -> VoteTable:
+    """
+    Open a columnar vote table for reading.
+
+    Args:
+        directory: Directory written by ColumnarVoteWriter
+
+    Returns:
+        VoteTable backed by memory-mapped column files
+    """
+    return VoteTable(directory)
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Generate the convergence experiments plotted by the coin-flip and election demos.
+
+todo.txt asks for convergence graphs over many coin-flip and election
+simulations: the x axis is the number of flips (or ballots) so far and the y
+axis the running share of heads (or Trump votes) in each simulation. The number
+of simulations in an experiment should be random and biased towards the low
+side, and because the data is large it should be fixed ahead of time.
+
+For each experiment set (one per page) and each probability on the page's
+slider, this draws several experiments with fixed seeds. All simulations of a
+probability are drawn as one 2D array of outcomes and their running shares come
+from a single cumulative sum along each row. Only a shared set of about
+MAX_POINTS positions is kept, spaced both linearly and logarithmically because
+the curves change fastest at the start. Shares are stored in tenths of a
+percent.
+
+Output: <output-dir>/<set name>.json, read by src/convergence.js.
+"""
+
+import argparse
+import json
+import os
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# Positions kept per curve
+MAX_POINTS = 120
+
+# Experiment sets: the probabilities of the page's slider, the trials (flips or
+# ballots) per simulation, the x step of the page, the experiments drawn per
+# probability and the range of simulations per experiment
+EXPERIMENT_SETS = {
+    # election-convergence-demo.html: Trump support slider 40-70%, 5000 ballots sampled every 10
+    "election_convergence": {
+        "probabilities": [p / 100 for p in range(40, 71)],
+        "trials": 5000,
+        "step": 10,
+        "experiments": 3,
+        "simulations": (1, 12),
+    },
+    # coin_games.html: heads slider 0-100% in 1% steps, up to 400 flips per game, 5-20 games
+    # per experiment; two experiments per probability keep the file under 1 MB
+    "coin_games": {
+        "probabilities": [p / 100 for p in range(0, 101)],
+        "trials": 400,
+        "step": 1,
+        "experiments": 2,
+        "simulations": (5, 20),
+    },
+    # ten_coins.html: heads slider 0-100% in 1% steps; rounds of ten coins, so positions are
+    # multiples of ten flips
+    "ten_coins": {
+        "probabilities": [p / 100 for p in range(0, 101)],
+        "trials": 1000,
+        "step": 10,
+        "experiments": 3,
+        "simulations": (1, 10),
+    },
+}
+
+DEFAULT_SEED = 2024
+
+
+def sample_positions(trials: int, step: int = 1, max_points: int = MAX_POINTS) -> np.ndarray:
+    """
+    Pick the trial counts at which the running shares are kept.
+
+    Args:
+        trials: Trials per simulation
+        step: Positions are multiples of this
+        max_points: Approximate number of positions
+
+    Returns:
+        Sorted unique positions (1-based trial counts), ending at the last multiple of step
+    """
+    last = trials // step
+    half = max(2, max_points // 2)
+    steps = np.concatenate((np.geomspace(1, last, half), np.linspace(1, last, half)))
+    return np.unique(np.ceil(steps).astype(np.int64)) * step
+
+
+def simulation_counts(rng: np.random.Generator, num_experiments: int, low: int, high: int) -> np.ndarray:
+    """
+    Draw the number of simulations of each experiment, biased towards low.
+
+    The count is low + floor((high - low + 1) * u^2) for uniform u, so about
+    half of the experiments use the lowest 30% of the range.
+
+    Args:
+        rng: Random generator
+        num_experiments: Number of experiments
+        low: Fewest simulations
+        high: Most simulations
+
+    Returns:
+        Number of simulations of each experiment
+    """
+    return low + np.floor((high - low + 1) * rng.random(num_experiments) ** 2).astype(np.int64)
+
+
+def running_shares(rng: np.random.Generator, num_simulations: int, trials: int, probability: float,
+                   positions: np.ndarray) -> np.ndarray:
+    """
+    Simulate trials and compute each simulation's running share of successes.
+
+    Args:
+        rng: Random generator
+        num_simulations: Number of simulations
+        trials: Trials per simulation
+        probability: Success probability of each trial
+        positions: Trial counts at which to keep the share
+
+    Returns:
+        (num_simulations, len(positions)) array of shares in tenths of a percent
+    """
+    outcomes = rng.random((num_simulations, trials)) < probability
+    successes = np.cumsum(outcomes, axis=1, dtype=np.int32)[:, positions - 1]
+    return np.floor(successes * 1000 / positions + 0.5).astype(np.int64)
+
+
+def generate_experiment_set(config: Dict[str, Any], seed: int = DEFAULT_SEED,
+                            max_points: int = MAX_POINTS) -> Dict[str, Any]:
+    """
+    Draw every experiment of an experiment set.
+
+    Each probability has its own random stream derived from the seed, so
+    adding probabilities does not change the others.
+
+    Args:
+        config: Experiment set (see EXPERIMENT_SETS)
+        seed: Random seed
+        max_points: Approximate positions kept per curve
+
+    Returns:
+        Experiment set dictionary in the output layout
+    """
+    positions = sample_positions(config["trials"], config["step"], max_points)
+    low, high = config["simulations"]
+
+    experiments = {}
+    for index, probability in enumerate(config["probabilities"]):
+        rng = np.random.default_rng([seed, index])
+        counts = simulation_counts(rng, config["experiments"], low, high)
+        # All simulations of this probability in one draw, then split by experiment
+        shares = running_shares(rng, int(counts.sum()), config["trials"], probability, positions)
+        bounds = np.concatenate(([0], np.cumsum(counts)))
+        experiments[f"{probability:.2f}"] = [
+            {"simulations": shares[bounds[i]:bounds[i + 1]].tolist()} for i in range(len(counts))
+        ]
+
+    return {
+        "trials": config["trials"],
+        "step": config["step"],
+        "seed": seed,
+        "scale": 1000,
+        "positions": positions.tolist(),
+        "probabilities": [f"{probability:.2f}" for probability in config["probabilities"]],
+        "experiments": experiments,
+    }
+
+
+def write_experiment_sets(output_dir: str, names: Sequence[str], seed: int = DEFAULT_SEED) -> List[Tuple[str, int]]:
+    """
+    Generate and write experiment sets.
+
+    Args:
+        output_dir: Directory to save the files
+        names: Names of the sets in EXPERIMENT_SETS
+        seed: Random seed
+
+    Returns:
+        List of (path, number of simulations) for each written file
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+    for name in names:
+        experiment_set = dict(generate_experiment_set(EXPERIMENT_SETS[name], seed), name=name)
+        path = os.path.join(output_dir, f"{name}.json")
+        with open(path, 'w') as f:
+            json.dump(experiment_set, f, separators=(',', ':'))
+        simulations = sum(len(e["simulations"]) for runs in experiment_set["experiments"].values() for e in runs)
+        written.append((path, simulations))
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate precomputed convergence experiments for the coin-flip and election demos')
+    parser.add_argument('--output-dir', default='data/processed_data/convergence', help='Directory to save the experiment files')
+    parser.add_argument('--set', dest='sets', action='append', choices=sorted(EXPERIMENT_SETS),
+                        help='Experiment set to generate (repeatable; default: all)')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='Random seed')
+
+    args = parser.parse_args()
+
+    for path, simulations in write_experiment_sets(args.output_dir, args.sets or list(EXPERIMENT_SETS), args.seed):
+        print(f"Saved {simulations} simulations to {path} ({os.path.getsize(path) / 1024:.0f} KB)")
+
+if __name__ == "__main__":
+    main()
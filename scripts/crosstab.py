@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Cross-tabulation of ballot choices across contests.
+
+Each ballot's choice in each contest is encoded as a small integer (0 for no
+vote, 1.. for the contest's choices). The choices of several contests are
+combined into one mixed-radix key per ballot, so joint combinations are
+counted with a single np.bincount per batch, optionally broken out by a
+dictionary-encoded location column such as TabulatorNum or PrecinctPortion.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+NONE_LABEL = "none"
+
+COMBO_KEYS = [
+    "trump-rosen",
+    "trump-brown",
+    "trump-none",
+    "harris-rosen",
+    "harris-brown",
+    "harris-none",
+]
+
+# Upper bound on the number of joint combinations of a cross-tab
+MAX_CELLS = 1 << 20
+
+# Upper bound on the counts held per vote type (locations x combinations), 64 MB of int64
+MAX_LOCATION_CELLS = 1 << 23
+
+
+def any_vote(votes: Dict[str, np.ndarray], cols: List[str], num_rows: int) -> np.ndarray:
+    """
+    Return a boolean mask of ballots with a vote in any of the given columns.
+
+    Args:
+        votes: Mapping of candidate column to 0/1 vote array
+        cols: Candidate columns to check
+        num_rows: Number of ballots in the batch
+
+    Returns:
+        Boolean numpy array
+    """
+    mask = np.zeros(num_rows, dtype=bool)
+    for col in cols:
+        if col in votes:
+            mask |= np.asarray(votes[col]) == 1
+    return mask
+
+
+class Contest:
+    """
+    A contest as a list of choices, each backed by one or more candidate columns.
+
+    Choices are listed in precedence order: a ballot marking several choices
+    counts for the first one listed.
+    """
+
+    def __init__(self, name: str, choices: Sequence[Tuple[str, List[str]]]):
+        """
+        Args:
+            name: Contest name
+            choices: (label, candidate columns) pairs in precedence order
+        """
+        self.name = name
+        self.choices = [(label, list(cols)) for label, cols in choices]
+
+    @property
+    def labels(self) -> List[str]:
+        """Choice labels by code; code 0 is no vote."""
+        return [NONE_LABEL] + [label for label, _ in self.choices]
+
+    @property
+    def columns(self) -> List[str]:
+        """Every candidate column the contest reads."""
+        return [col for _, cols in self.choices for col in cols]
+
+    def encode(self, votes: Dict[str, np.ndarray], num_rows: int) -> np.ndarray:
+        """
+        Encode each ballot's choice in this contest.
+
+        Args:
+            votes: Mapping of candidate column to 0/1 vote array
+            num_rows: Number of ballots in the batch
+
+        Returns:
+            int64 array of choice codes (0 for no vote)
+        """
+        codes = np.zeros(num_rows, dtype=np.int64)
+        # Assign in reverse so the first choice listed wins on overvotes
+        for code in range(len(self.choices), 0, -1):
+            codes[any_vote(votes, self.choices[code - 1][1], num_rows)] = code
+        return codes
+
+
+def contest_from_columns(name: str, cols: List[str]) -> Contest:
+    """Make a contest with one choice per candidate column, labelled by the column."""
+    return Contest(name, [(col, [col]) for col in cols])
+
+
+def pres_senate_contests(trump_cols: List[str], harris_cols: List[str], rosen_cols: List[str], brown_cols: List[str]) -> List[Contest]:
+    """
+    The contests behind pres_senate_combo_summary.json.
+
+    A Trump vote takes precedence over a Harris vote, and a Rosen vote over a Brown vote.
+    """
+    return [
+        Contest("president", [("trump", trump_cols), ("harris", harris_cols)]),
+        Contest("senate", [("rosen", rosen_cols), ("brown", brown_cols)]),
+    ]
+
+
+class CrossTab:
+    """
+    Joint choice counts over a set of contests, by vote type and optionally by location.
+
+    Counts are stored per vote type as an int64 array of shape (groups, cells):
+    one row per location code (a single row when not broken out by location)
+    and one column per combination of choices, indexed by the mixed-radix key.
+    """
+
+    def __init__(self, contests: List[Contest], by: Optional[str] = None):
+        """
+        Args:
+            contests: Contests to cross-tabulate
+            by: Metadata column to break the counts out by (its values must be
+                int32 dictionary codes), or None for vote types only
+        """
+        self.contests = list(contests)
+        self.by = by
+        self.radices = [len(contest.labels) for contest in self.contests]
+        self.num_cells = int(np.prod(self.radices, dtype=np.int64))
+        if self.num_cells > MAX_CELLS:
+            raise ValueError(f"Cross-tab of {len(self.contests)} contests has {self.num_cells} combinations (limit {MAX_CELLS})")
+        self.counts: Dict[str, np.ndarray] = {}
+
+    def keys(self, votes: Dict[str, np.ndarray], num_rows: int) -> np.ndarray:
+        """Return the mixed-radix combination key of every ballot in a batch."""
+        key = np.zeros(num_rows, dtype=np.int64)
+        for contest, radix in zip(self.contests, self.radices):
+            key = key * radix + contest.encode(votes, num_rows)
+        return key
+
+    def _grow(self, vote_type: str, size: int) -> np.ndarray:
+        """
+        Make sure the counts of a vote type have at least size rows.
+
+        Raises:
+            ValueError: If size rows of counts would exceed MAX_LOCATION_CELLS
+        """
+        if size * self.num_cells > MAX_LOCATION_CELLS:
+            raise ValueError(f"Cross-tab by {self.by} of {size} locations x {self.num_cells} combinations "
+                             f"has {size * self.num_cells} counts (limit {MAX_LOCATION_CELLS})")
+        counts = self.counts.get(vote_type)
+        if counts is None:
+            counts = np.zeros((0, self.num_cells), dtype=np.int64)
+        if len(counts) < size:
+            grown = np.zeros((size, self.num_cells), dtype=np.int64)
+            grown[:len(counts)] = counts
+            counts = grown
+        self.counts[vote_type] = counts
+        return counts
+
+    def fold(self, vote_type: str, metadata: Dict[str, np.ndarray], votes: Dict[str, np.ndarray], num_rows: int) -> None:
+        """
+        Count a batch of ballots of one vote type.
+
+        Args:
+            vote_type: Vote type of the batch
+            metadata: Mapping of metadata column to values (codes for the by column)
+            votes: Mapping of candidate column to 0/1 vote array
+            num_rows: Number of ballots in the batch
+        """
+        if num_rows == 0:
+            return
+        key = self.keys(votes, num_rows)
+
+        if self.by is None:
+            counts = self._grow(vote_type, 1)
+            counts[0] += np.bincount(key, minlength=self.num_cells)
+            return
+
+        if self.by not in metadata:
+            return
+        codes = np.asarray(metadata[self.by]).astype(np.int64)
+        present = codes >= 0
+        codes, key = codes[present], key[present]
+        if len(codes) == 0:
+            return
+        size = int(codes.max()) + 1
+        counts = self._grow(vote_type, size)
+        counts[:size] += np.bincount(codes * self.num_cells + key, minlength=size * self.num_cells).reshape(size, self.num_cells)
+
+    def merge(self, other: "CrossTab", code_mapping: Optional[np.ndarray] = None) -> None:
+        """
+        Add another cross-tab's counts into this one.
+
+        Args:
+            other: Cross-tab of the same contests built over another part of the input
+            code_mapping: Array mapping the other cross-tab's location codes onto
+                this one's (identity if omitted)
+        """
+        for vote_type, theirs in other.counts.items():
+            if len(theirs) == 0:
+                continue
+            groups = np.arange(len(theirs))
+            if self.by is not None and code_mapping is not None:
+                groups = code_mapping[groups]
+            counts = self._grow(vote_type, int(groups.max()) + 1)
+            np.add.at(counts, groups, theirs)
+
+    def totals(self, vote_types: Optional[List[str]] = None) -> np.ndarray:
+        """Counts per combination, summed over locations and the given vote types (default: all)."""
+        total = np.zeros(self.num_cells, dtype=np.int64)
+        for vote_type, counts in self.counts.items():
+            if vote_types is None or vote_type in vote_types:
+                total += counts.sum(axis=0)
+        return total
+
+    def rows(self, cell_counts: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Describe the non-zero combinations of a count vector.
+
+        Args:
+            cell_counts: Count per combination key
+
+        Returns:
+            List of {contest name: choice label, ..., "ballots": count}
+        """
+        cells = np.flatnonzero(cell_counts)
+        choices = np.unravel_index(cells, self.radices)
+        rows = []
+        for i, cell in enumerate(cells.tolist()):
+            row = {contest.name: contest.labels[int(codes[i])] for contest, codes in zip(self.contests, choices)}
+            row["ballots"] = int(cell_counts[cell])
+            rows.append(row)
+        return rows
+
+    def summary(self, vote_types: List[str], dictionary: Optional[Any] = None) -> Dict[str, Any]:
+        """
+        Cross-tab results overall, by vote type and (if broken out) by location.
+
+        Args:
+            vote_types: Vote types in output order
+            dictionary: CategoryDictionary of the by column, used to decode location codes
+
+        Returns:
+            Dictionary with contests (choice labels), total, by_vote_type and,
+            when broken out by a location column, by_location
+        """
+        summary = {
+            "contests": {contest.name: contest.labels for contest in self.contests},
+            "total": self.rows(self.totals()),
+            "by_vote_type": {vt: self.rows(self.totals([vt])) for vt in vote_types if vt in self.counts},
+        }
+        if self.by is not None:
+            by_location = np.zeros((0, self.num_cells), dtype=np.int64)
+            for counts in self.counts.values():
+                if len(counts) > len(by_location):
+                    grown = np.zeros_like(counts)
+                    grown[:len(by_location)] = by_location
+                    by_location = grown
+                by_location[:len(counts)] += counts
+            seen = np.flatnonzero(by_location.sum(axis=1))
+            locations = dictionary.decode(seen).tolist() if dictionary is not None else seen.tolist()
+            summary["by"] = self.by
+            summary["by_location"] = {location: self.rows(by_location[code]) for location, code in zip(locations, seen.tolist())}
+        return summary
+
+
+def combo_counts(crosstab: CrossTab, vote_types: Optional[List[str]] = None) -> Dict[str, int]:
+    """
+    Read president–senate combination counts off a pres_senate_contests() cross-tab.
+
+    Ballots without a presidential vote are not counted.
+
+    Args:
+        crosstab: Cross-tab built from pres_senate_contests()
+        vote_types: Vote types to include (default: all)
+
+    Returns:
+        Dictionary mapping each of COMBO_KEYS to its count
+    """
+    president, senate = crosstab.contests
+    totals = crosstab.totals(vote_types).reshape(crosstab.radices)
+    counts = {}
+    for key in COMBO_KEYS:
+        pres_label, senate_label = key.split("-")
+        counts[key] = int(totals[president.labels.index(pres_label), senate.labels.index(senate_label)])
+    return counts
+
+
+def combo_summary(crosstab: CrossTab, vote_types: List[str]) -> Dict[str, Any]:
+    """
+    The contents of pres_senate_combo_summary.json: overall counts plus a by_vote_type breakdown.
+
+    Args:
+        crosstab: Cross-tab built from pres_senate_contests()
+        vote_types: Vote types to break the counts out by
+
+    Returns:
+        Dictionary with the COMBO_KEYS counts and by_vote_type
+    """
+    return {
+        **combo_counts(crosstab),  # flat keys for backward compatibility
+        "by_vote_type": {vt: combo_counts(crosstab, [vt]) for vt in vote_types},
+    }
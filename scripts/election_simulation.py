@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Vectorized Monte Carlo version of the election simulation in election-simulation.html.
+
+generateElectionData in the page builds one election at a time, one vote at a
+time: machines are grouped into polling locations of 3-5 machines, each
+location draws a log-normal base vote count and a support rate around its
+location type's support base (the spread is the type's cluster strength), and
+each machine then counts its voters one coin flip at a time. This module draws
+the same model for many elections at once with NumPy:
+
+- Every location of every election is drawn in one array per location type,
+  and machines are assigned to locations with a single searchsorted.
+- A machine's Trump votes are one binomial draw instead of a loop over voters.
+- todo.txt asks for covariance between a location and how it votes. Passing
+  size_support_correlation correlates each location's vote-count draw with its
+  support-rate draw, so larger locations lean one way. The default of 0
+  reproduces the page.
+
+Results are reproducible for a given seed. Per-ballot vote sequences in the
+*_scatter_data.json shape are produced on request (to_scatter_data), so the
+other scripts can treat a simulated election like the real one.
+"""
+
+import argparse
+import json
+import math
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+# Location types in machine order, as in the page (urban machines first)
+LOCATION_TYPES = ["Urban", "Suburban", "Rural"]
+
+# Mean and standard deviation of the log of a location's base vote count
+VOTE_COUNT_LOGNORMAL = {"Urban": (5.5, 0.4), "Suburban": (5.85, 0.45), "Rural": (6.1, 0.35)}
+
+# Machines per polling location, drawn uniformly from this range (inclusive)
+MACHINES_PER_LOCATION = (3, 5)
+
+# Defaults of the page's sliders; support bases and cluster strengths are in percent
+DEFAULT_PARAMS = {
+    "urban_support_base": 45,
+    "rural_support_base": 73,
+    "suburban_support_base": 60,
+    "urban_percentage": 55,
+    "urban_cluster_strength": 11,
+    "suburban_cluster_strength": 3,
+    "rural_cluster_strength": 9,
+    "rural_machines": 250,
+    "non_rural_machines": 714,
+    # Cap on a location's base vote count (the page's Math.min(1200, ...))
+    "max_votes": 1200,
+    # Multiplier of the log-normal vote count draw, before the cap
+    "vote_scale": 1.0,
+    # Cap on each machine's vote count after the +/-10% variation (None: no cap, as in the page)
+    "machine_max_votes": None,
+    # Correlation between a location's vote-count draw and its support-rate draw
+    "size_support_correlation": 0.0,
+}
+
+# The page's TODO: a full election on 3115 machines of at most 125 votes each, keeping
+# the default split between rural and non-rural machines
+FULL_ELECTION_PARAMS = dict(
+    DEFAULT_PARAMS,
+    rural_machines=808,
+    non_rural_machines=2307,
+    max_votes=125,
+    vote_scale=125 / 1200,
+    machine_max_votes=125,
+)
+
+
+def round_half_up(values: np.ndarray) -> np.ndarray:
+    """Round like JavaScript's Math.round (halves go up), returning int64."""
+    return np.floor(values + 0.5).astype(np.int64)
+
+
+def machine_counts(params: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Number of machines of each location type.
+
+    Args:
+        params: Simulation parameters (see DEFAULT_PARAMS)
+
+    Returns:
+        Dictionary of location type to machine count
+    """
+    urban = int(math.floor(params["non_rural_machines"] * params["urban_percentage"] / 100 + 0.5))
+    return {
+        "Urban": urban,
+        "Suburban": params["non_rural_machines"] - urban,
+        "Rural": params["rural_machines"],
+    }
+
+
+def simulate_location_type(rng: np.random.Generator, num_elections: int, num_machines: int, location_type: str,
+                           support_base: float, cluster_strength: float, params: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    Draw the machines of one location type for many elections.
+
+    Args:
+        rng: Random generator
+        num_elections: Number of elections
+        num_machines: Machines of this type in each election
+        location_type: "Urban", "Suburban" or "Rural"
+        support_base: Mean Trump support of a location, as a fraction
+        cluster_strength: Standard deviation of a location's support, in percentage points
+        params: Simulation parameters (see DEFAULT_PARAMS)
+
+    Returns:
+        Dictionary of (num_elections, num_machines) arrays: location (index of the
+        machine's location within this type), total_votes, trump_votes, support_rate
+    """
+    low, high = MACHINES_PER_LOCATION
+    num_locations = -(-num_machines // low)
+    elections = np.arange(num_elections)[:, None]
+
+    # Location sizes; the machines fill the locations in order and the last one is cut short
+    sizes = rng.integers(low, high + 1, size=(num_elections, num_locations))
+    ends = np.cumsum(sizes, axis=1)
+    # Search all elections at once by moving each election's ends into its own range
+    stride = high * num_locations + 1
+    queries = np.arange(num_machines)[None, :] + elections * stride
+    location = np.searchsorted((ends + elections * stride).ravel(), queries.ravel(), side='right')
+    location = location.reshape(num_elections, num_machines) - elections * num_locations
+
+    # Correlated draws of each location's size and support
+    mu, sigma = VOTE_COUNT_LOGNORMAL[location_type]
+    rho = params["size_support_correlation"]
+    size_draw = rng.standard_normal((num_elections, num_locations))
+    support_draw = rho * size_draw + math.sqrt(1 - rho * rho) * rng.standard_normal((num_elections, num_locations))
+    base_votes = np.minimum(params["max_votes"], round_half_up(params["vote_scale"] * np.exp(mu + sigma * size_draw)))
+    location_support = support_base + cluster_strength / 100 * support_draw
+
+    # Machines at a location vary their vote count by +/-10% from its base
+    variation = rng.uniform(0.9, 1.1, size=(num_elections, num_machines))
+    total_votes = round_half_up(np.take_along_axis(base_votes, location, axis=1) * variation)
+    if params["machine_max_votes"] is not None:
+        total_votes = np.minimum(params["machine_max_votes"], total_votes)
+    support_rate = np.take_along_axis(location_support, location, axis=1)
+    # A rate outside [0, 1] means every voter (or none) votes Trump, as Math.random() < rate does
+    trump_votes = rng.binomial(total_votes, np.clip(support_rate, 0.0, 1.0))
+
+    return {"location": location, "total_votes": total_votes, "trump_votes": trump_votes, "support_rate": support_rate}
+
+
+def simulate_elections(params: Optional[Dict[str, Any]] = None, num_elections: int = 1,
+                       seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Simulate many complete elections at once.
+
+    Args:
+        params: Simulation parameters; missing keys take DEFAULT_PARAMS values
+        num_elections: Number of elections
+        seed: Random seed; the same seed and parameters give the same elections
+
+    Returns:
+        Dictionary with location_type (one entry per machine, the same in every
+        election) and (num_elections, machines) arrays location, total_votes,
+        trump_votes, trump_percentage and support_rate (in percent)
+
+    Raises:
+        ValueError: If size_support_correlation is not between -1 and 1
+    """
+    params = dict(DEFAULT_PARAMS, **(params or {}))
+    if not -1 <= params["size_support_correlation"] <= 1:
+        raise ValueError(f"size_support_correlation must be between -1 and 1, got {params['size_support_correlation']}")
+    rng = np.random.default_rng(seed)
+    counts = machine_counts(params)
+
+    parts = []
+    location_offset = np.zeros((num_elections, 1), dtype=np.int64)
+    for location_type in LOCATION_TYPES:
+        if counts[location_type] <= 0:
+            continue
+        key = location_type.lower()
+        part = simulate_location_type(rng, num_elections, counts[location_type], location_type,
+                                      params[f"{key}_support_base"] / 100, params[f"{key}_cluster_strength"], params)
+        # Number locations across types, continuing after the previous type's last location
+        part["location"] = part["location"] + location_offset
+        location_offset = part["location"][:, -1:] + 1
+        parts.append((location_type, part))
+
+    def combine(field, dtype):
+        if not parts:
+            return np.zeros((num_elections, 0), dtype=dtype)
+        return np.concatenate([part[field] for _, part in parts], axis=1).astype(dtype)
+
+    total_votes = combine("total_votes", np.int64)
+    trump_votes = combine("trump_votes", np.int64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        trump_percentage = np.where(total_votes > 0, trump_votes / total_votes * 100, 0.0)
+
+    return {
+        "params": params,
+        "seed": seed,
+        "location_type": [location_type for location_type, part in parts for _ in range(part["total_votes"].shape[1])],
+        "location": combine("location", np.int64),
+        "total_votes": total_votes,
+        "trump_votes": trump_votes,
+        "trump_percentage": trump_percentage,
+        "support_rate": combine("support_rate", np.float64) * 100,
+    }
+
+
+def machine_records(result: Dict[str, Any], election: int = 0) -> list:
+    """
+    One election's machines in the shape generateElectionData returns.
+
+    Args:
+        result: Output of simulate_elections
+        election: Index of the election
+
+    Returns:
+        List of dictionaries with location, totalVotes, trumpPercentage,
+        trumpVotes, supportRate and locationType
+    """
+    return [
+        {
+            "location": machine,
+            "totalVotes": int(result["total_votes"][election, machine]),
+            "trumpPercentage": float(result["trump_percentage"][election, machine]),
+            "trumpVotes": int(result["trump_votes"][election, machine]),
+            "supportRate": float(result["support_rate"][election, machine]),
+            "locationType": location_type,
+        }
+        for machine, location_type in enumerate(result["location_type"])
+    ]
+
+
+def to_scatter_data(result: Dict[str, Any], election: int = 0, seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    One election in the *_scatter_data.json shape, with per-ballot sequences.
+
+    Each machine's Trump votes are placed in a uniformly random order among its
+    ballots; all machines are shuffled together with one lexsort. Urban and
+    suburban machines count as urban.
+
+    Args:
+        result: Output of simulate_elections
+        election: Index of the election
+        seed: Random seed of the ballot order
+
+    Returns:
+        Scatter data with vote_history and urban_voter lists per item of "data"
+    """
+    rng = np.random.default_rng(seed)
+    total_votes = result["total_votes"][election]
+    trump_votes = result["trump_votes"][election]
+    machines = np.repeat(np.arange(len(total_votes)), total_votes)
+    starts = np.concatenate(([0], np.cumsum(total_votes)))
+    # Within each machine, the first trump_votes ballots are Trump votes before shuffling
+    ballot = np.arange(starts[-1]) - starts[machines]
+    votes = (ballot < trump_votes[machines]).astype(np.uint8)
+    order = np.lexsort((rng.random(len(votes)), machines))
+    votes = votes[order]
+
+    data = []
+    for machine, location_type in enumerate(result["location_type"]):
+        is_urban = location_type != "Rural"
+        count = int(total_votes[machine])
+        data.append({
+            "tabulator": str(machine),
+            "total_votes": count,
+            "trump_votes": int(trump_votes[machine]),
+            "trump_percentage": float(result["trump_percentage"][election, machine]),
+            "is_urban": is_urban,
+            "urban_percentage": 100.0 if is_urban else 0.0,
+            "precincts": {},
+            "vote_history": votes[starts[machine]:starts[machine + 1]].tolist(),
+            "urban_voter": [int(is_urban)] * count,
+        })
+    return {"data": data, "vote_type": "simulated_votes", "total_tabulators": len(data)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulate elections like election-simulation.html, many at once')
+    for key, value in DEFAULT_PARAMS.items():
+        if key == "machine_max_votes":
+            parser.add_argument('--machine-max-votes', type=int, help='Cap on each machine\'s vote count (default: none)')
+            continue
+        parser.add_argument(f"--{key.replace('_', '-')}", type=type(value), help=f'Default: {value}')
+    parser.add_argument('--full-election', action='store_true', help='Start from the full-election preset: 3115 machines of at most 125 votes')
+    parser.add_argument('--elections', type=int, default=1000, help='Number of elections to simulate')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed')
+    parser.add_argument('--output', help='Write the machines\' vote counts of every election to this JSON file')
+
+    args = parser.parse_args()
+
+    params = dict(FULL_ELECTION_PARAMS if args.full_election else DEFAULT_PARAMS)
+    for key in DEFAULT_PARAMS:
+        if getattr(args, key) is not None:
+            params[key] = getattr(args, key)
+
+    start = time.perf_counter()
+    try:
+        result = simulate_elections(params, args.elections, args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+    elapsed = time.perf_counter() - start
+    num_machines = len(result["location_type"])
+    print(f"Simulated {args.elections} elections of {num_machines} machines in {elapsed:.2f}s "
+          f"({args.elections / elapsed:.0f} elections/s)")
+    if args.elections and num_machines:
+        print(f"Mean Trump share: {result['trump_votes'].sum() / max(1, result['total_votes'].sum()) * 100:.2f}%, "
+              f"mean votes per machine: {result['total_votes'].mean():.1f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                "params": params,
+                "seed": args.seed,
+                "location_type": result["location_type"],
+                "total_votes": result["total_votes"].tolist(),
+                "trump_votes": result["trump_votes"].tolist(),
+            }, f, separators=(',', ':'))
+        print(f"Saved simulated elections to {args.output}")
+
+if __name__ == "__main__":
+    main()
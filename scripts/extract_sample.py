@@ -5,15 +5,19 @@ Extract a small sample from the large JSON election data files for analysis.
 
 import json
 import argparse
+import itertools
 from pathlib import Path
 import os
 
+from columnar_store import is_vote_table, open_vote_table
+from json_stream import is_ndjson, iter_json_array, iter_ndjson
+
 def extract_sample(input_file: str, output_file: str, sample_size: int = 20) -> None:
     """
     Extract a sample of records from a large JSON file.
     
     Args:
-        input_file: Path to the large JSON file
+        input_file: Path to the large JSON/NDJSON file or columnar vote table directory
         output_file: Path to save the sample JSON file
         sample_size: Number of records to extract
     """
@@ -24,83 +28,52 @@ def extract_sample(input_file: str, output_file: str, sample_size: int = 20) ->
         print(f"Error: Input file {input_file} does not exist")
         return
     
+    # Columnar tables are memory-mapped, so just decode the first rows
+    if is_vote_table(input_file):
+        table = open_vote_table(input_file)
+        parsed_objects = []
+        for record in table.iter_records(batch_size=sample_size):
+            parsed_objects.append(record)
+            if len(parsed_objects) >= sample_size:
+                break
+        
+        with open(output_file, 'w') as out_f:
+            json.dump(parsed_objects, out_f, indent=2)
+        
+        print(f"Successfully extracted {len(parsed_objects)} records to {output_file}")
+        return
+    
     try:
-        # Open the file and read the first few records
-        with open(input_file, 'r') as f:
-            # Check if the file starts with a JSON array
-            first_char = f.read(1)
-            if first_char != '[':
-                print(f"Error: File {input_file} does not start with a JSON array")
-                return
-            
-            # Reset file pointer to start
-            f.seek(0)
-            
-            # Read character by character until we have the desired number of complete JSON objects
-            objects = []
-            depth = 0
-            current_object = ""
-            in_string = False
-            escape_next = False
-            
-            for i, char in enumerate(f.read()):
-                current_object += char
-                
-                if escape_next:
-                    escape_next = False
-                    continue
-                
-                if char == '\\':
-                    escape_next = True
-                    continue
-                
-                if char == '"' and not escape_next:
-                    in_string = not in_string
-                    continue
-                
-                if not in_string:
-                    if char == '{':
-                        depth += 1
-                    elif char == '}':
-                        depth -= 1
-                        if depth == 0:
-                            objects.append(current_object)
-                            current_object = ""
-                            if len(objects) >= sample_size:
-                                break
-                            
-                    # Skip whitespace between objects
-                    if depth == 0 and char in [',', ' ', '\n', '\r', '\t']:
-                        current_object = ""
-            
-            # Parse the objects
-            parsed_objects = []
-            for obj_str in objects:
-                try:
-                    obj = json.loads(obj_str)
-                    parsed_objects.append(obj)
-                except json.JSONDecodeError:
-                    print(f"Warning: Could not parse object: {obj_str[:100]}...")
+        # Decode only as many records as needed from the start of the file
+        records = iter_ndjson(input_file) if is_ndjson(input_file) else iter_json_array(input_file)
+        parsed_objects = list(itertools.islice(records, sample_size))
+        
+        # Write the sample to the output file
+        with open(output_file, 'w') as out_f:
+            json.dump(parsed_objects, out_f, indent=2)
             
-            # Write the sample to the output file
-            with open(output_file, 'w') as out_f:
-                json.dump(parsed_objects, out_f, indent=2)
-                
-            print(f"Successfully extracted {len(parsed_objects)} records to {output_file}")
+        print(f"Successfully extracted {len(parsed_objects)} records to {output_file}")
     
+    except ValueError as e:
+        print(f"Error: {e}")
     except Exception as e:
         print(f"Error extracting sample: {str(e)}")
 
 def main():
     parser = argparse.ArgumentParser(description='Extract sample from large JSON file')
-    parser.add_argument('input_file', help='Path to input JSON file')
+    parser.add_argument('input_file', help='Path to input JSON/NDJSON file or columnar vote table directory')
     parser.add_argument('--output-file', help='Path to output sample JSON file')
     parser.add_argument('--sample-size', type=int, default=20, help='Number of records to extract')
     
     args = parser.parse_args()
     
     input_file = args.input_file
-    output_file = args.output_file or f"{input_file.rsplit('.', 1)[0]}_sample.json"
+    if is_vote_table(input_file):
+        output_file = args.output_file or f"{os.path.normpath(input_file)}_sample.json"
+    elif is_ndjson(input_file):
+        output_file = args.output_file or f"{input_file.split('.nd', 1)[0].split('.jsonl', 1)[0]}_sample.json"
+    else:
+        output_file = args.output_file or f"{input_file.rsplit('.', 1)[0]}_sample.json"
     
     extract_sample(input_file, output_file, args.sample_size)
 
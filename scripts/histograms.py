@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Pre-binned histograms of the per-tabulator scatter data.
+
+The histogram views (src/histogram.js) count tabulators per Trump-percentage
+bin, split into urban and rural tabulators, and overlay a normal curve from
+each group's mean and standard deviation. That only needs a few numbers per
+bin, so the counts and statistics are computed here for several bin widths and
+written to *_histograms.json, which the pages load instead of the scatter
+data. Distributions of the tabulators' vote counts are binned the same way.
+
+Bins follow src/histogram.js: a value x falls in bin floor(x / width), and
+bin i covers [i * width, (i + 1) * width). Each histogram lists the counts of
+bins 0 to the last non-empty bin for every group.
+"""
+
+import json
+import os
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+# Bin widths, in percentage points, of the Trump-percentage histograms
+PERCENTAGE_BIN_WIDTHS = [1, 2, 5, 10]
+
+# Bin widths, in ballots, of the vote-count histograms
+VOTE_COUNT_BIN_WIDTHS = [10, 25, 50, 100]
+
+# Groups of tabulators, as named by src/histogram.js; a tabulator is urban when
+# at least half of its ballots come from urban precincts
+GROUPS = ["All", "Urban", "Rural"]
+
+
+def group_stats(values: np.ndarray) -> Dict[str, Any]:
+    """Mean, population standard deviation and count of a group's values."""
+    if len(values) == 0:
+        return {"mean": 0.0, "std_dev": 0.0, "count": 0}
+    return {"mean": float(values.mean()), "std_dev": float(values.std()), "count": int(len(values))}
+
+
+def compute_histograms(scatter: Dict[str, Any], percentage_bin_widths: Optional[Sequence[float]] = None,
+                       vote_count_bin_widths: Optional[Sequence[float]] = None) -> Dict[str, Any]:
+    """
+    Bin the Trump percentages and vote counts of every tabulator.
+
+    Args:
+        scatter: Scatter data with trump_percentage, total_votes and urban_percentage per item of "data"
+        percentage_bin_widths: Bin widths of the Trump-percentage histograms (default: PERCENTAGE_BIN_WIDTHS)
+        vote_count_bin_widths: Bin widths of the vote-count histograms (default: VOTE_COUNT_BIN_WIDTHS)
+
+    Returns:
+        Histogram dictionary in the *_histograms.json layout
+    """
+    bin_widths = {
+        "trump_percentage": PERCENTAGE_BIN_WIDTHS if percentage_bin_widths is None else percentage_bin_widths,
+        "total_votes": VOTE_COUNT_BIN_WIDTHS if vote_count_bin_widths is None else vote_count_bin_widths,
+    }
+    items = scatter["data"]
+    is_urban = np.array([item["urban_percentage"] >= 50 for item in items], dtype=bool)
+    masks = {"All": np.ones(len(items), dtype=bool), "Urban": is_urban, "Rural": ~is_urban}
+
+    stats = {}
+    histograms = {}
+    for field, widths in bin_widths.items():
+        values = np.array([item[field] for item in items], dtype=np.float64)
+        stats[field] = {group: group_stats(values[mask]) for group, mask in masks.items()}
+        histograms[field] = {}
+        for width in widths:
+            # Bin the whole column once, then count each group's share of the bins
+            bins = np.floor(values / width).astype(np.int64)
+            num_bins = int(bins.max()) + 1 if len(bins) else 0
+            histograms[field][str(width)] = {
+                "bin_width": width,
+                "counts": {group: np.bincount(bins[mask], minlength=num_bins).tolist()
+                           for group, mask in masks.items()},
+            }
+
+    return {
+        "vote_type": scatter.get("vote_type"),
+        "total_tabulators": len(items),
+        "groups": GROUPS,
+        "stats": stats,
+        "histograms": histograms,
+    }
+
+
+def write_histograms(scatter: Dict[str, Any], output_dir: str, output_base: str) -> str:
+    """
+    Write the pre-binned histograms of scatter data.
+
+    Args:
+        scatter: Scatter data with trump_percentage, total_votes and urban_percentage per item of "data"
+        output_dir: Directory to save the file
+        output_base: Prefix of the file name, e.g. "early_votes"
+
+    Returns:
+        Path of the written file
+    """
+    histograms = compute_histograms(scatter)
+    histogram_file = os.path.join(output_dir, f"{output_base}_histograms.json")
+    with open(histogram_file, 'w') as f:
+        json.dump(histograms, f, separators=(',', ':'))
+    return histogram_file
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Checkpoints for resuming an interrupted streaming ingest.
+
+A checkpoint records how far into the CSV a streaming run of
+process_election_data.py got (byte offset and chunk number) together with the
+partial aggregates, dictionaries and vote table lengths at that point. It is
+keyed by a fingerprint of the input file, so a checkpoint is only reused for
+the exact file it was written for.
+"""
+
+import hashlib
+import os
+import pickle
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+CHECKPOINT_NAME = ".ingest_checkpoint.pkl"
+
+# Bytes hashed at each end of the input file for its fingerprint
+FINGERPRINT_SAMPLE_BYTES = 1 << 20
+
+
+def input_fingerprint(input_file: str) -> Dict[str, Any]:
+    """
+    Identify an input file by its size, modification time and content hash.
+
+    The hash covers the first and last megabyte of the file, which catches a
+    re-exported file without reading gigabytes of data before every run.
+
+    Args:
+        input_file: Path to the CSV file
+
+    Returns:
+        Dictionary with size, mtime_ns and sha256
+    """
+    stat = os.stat(input_file)
+    digest = hashlib.sha256()
+    with open(input_file, "rb") as f:
+        digest.update(f.read(FINGERPRINT_SAMPLE_BYTES))
+        if stat.st_size > FINGERPRINT_SAMPLE_BYTES:
+            f.seek(max(FINGERPRINT_SAMPLE_BYTES, stat.st_size - FINGERPRINT_SAMPLE_BYTES))
+            digest.update(f.read())
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest.hexdigest()}
+
+
+def advance_rows(input_file: str, offset: int, num_rows: int, block_size: int = 1 << 24) -> int:
+    """
+    Return the byte offset num_rows lines after offset.
+
+    Assumes one CSV row per line (no quoted newlines), as plan_byte_ranges does.
+
+    Args:
+        input_file: Path to the CSV file
+        offset: Byte offset at the start of a row
+        num_rows: Number of rows to skip
+        block_size: Bytes scanned for newlines at a time
+
+    Returns:
+        Byte offset of the row after the skipped ones (the file size at the end of the file)
+    """
+    with open(input_file, "rb") as f:
+        f.seek(offset)
+        while num_rows > 0:
+            block = f.read(block_size)
+            if not block:
+                break
+            newlines = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == ord("\n"))
+            if len(newlines) >= num_rows:
+                return offset + int(newlines[num_rows - 1]) + 1
+            num_rows -= len(newlines)
+            offset += len(block)
+    return offset
+
+
+def save_checkpoint(path: str, state: Dict[str, Any]) -> None:
+    """
+    Atomically write a checkpoint.
+
+    Args:
+        path: Checkpoint file path
+        state: Picklable checkpoint state
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path: str, fingerprint: Dict[str, Any], plan: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Load a checkpoint if it was written for this input file and column plan.
+
+    Args:
+        path: Checkpoint file path
+        fingerprint: input_fingerprint() of the input file
+        plan: Column plan of the current run
+
+    Returns:
+        The checkpoint state, or None if there is no usable checkpoint
+    """
+    if not os.path.exists(path):
+        print("No checkpoint found, starting from the beginning")
+        return None
+    with open(path, "rb") as f:
+        state = pickle.load(f)
+    if state.get("fingerprint") != fingerprint:
+        print("Checkpoint was written for a different version of the input file, starting from the beginning")
+        return None
+    if state.get("plan") != plan:
+        print("Checkpoint was written with different columns, starting from the beginning")
+        return None
+    return state
+
+
+def remove_checkpoint(path: str) -> None:
+    """Delete a checkpoint once the run it belongs to has finished."""
+    if os.path.exists(path):
+        os.remove(path)
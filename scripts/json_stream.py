@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Streaming readers and writers for JSON vote files.
+
+The vote files written by process_election_data.py can be a single JSON array
+of millions of records. iter_json_array reads such a file in fixed-size blocks
+and decodes one element at a time with json.JSONDecoder.raw_decode, so memory
+use stays constant and the per-character work happens in the C decoder.
+
+Vote files can also be written as newline-delimited JSON (one record per line,
+optionally gzip-compressed) by NdjsonVoteWriter. iter_ndjson memory-maps such a
+file and splits it on newlines, and can read any byte range of it, so a file
+can be split between workers without a custom tokenizer.
+"""
+
+import gzip
+import json
+import mmap
+import os
+import re
+import shutil
+from typing import Any, Dict, Iterator, List, Optional
+
+# Whitespace and the commas between array elements
+SEPARATOR = re.compile(r'[\s,]*')
+
+# Largest element the reader will buffer before giving up on the file
+MAX_ELEMENT_CHARS = 1 << 26
+
+
+def iter_json_array(path: str, block_size: int = 1 << 20) -> Iterator[Any]:
+    """
+    Yield the elements of a JSON array file one at a time.
+
+    Args:
+        path: Path to a file containing a JSON array
+        block_size: Characters read from the file at a time
+
+    Yields:
+        Decoded array elements
+
+    Raises:
+        ValueError: If the file is not a JSON array, or an element is invalid or truncated
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = f.read(block_size)
+        while buffer and buffer.isspace():
+            buffer = f.read(block_size)
+        pos = len(buffer) - len(buffer.lstrip())
+        if buffer[pos:pos + 1] != '[':
+            raise ValueError(f"File {path} does not start with a JSON array")
+        pos += 1
+        eof = False
+
+        while True:
+            pos = SEPARATOR.match(buffer, pos).end()
+            if pos < len(buffer) and buffer[pos] == ']':
+                return
+
+            try:
+                element, end = decoder.raw_decode(buffer, pos)
+                error = None
+            except json.JSONDecodeError as e:
+                element, end, error = None, None, e
+
+            # An element that fails to decode, or ends right at the end of the
+            # buffer, most likely continues in the next block
+            if error is not None or (end == len(buffer) and not eof):
+                if eof:
+                    raise ValueError(f"Invalid or truncated JSON array in {path}: {error}")
+                if len(buffer) - pos > MAX_ELEMENT_CHARS:
+                    raise ValueError(f"Invalid JSON array element in {path}: {error}")
+                more = f.read(block_size)
+                eof = not more
+                buffer = buffer[pos:] + more
+                pos = 0
+                continue
+
+            yield element
+            pos = end
+
+
+NDJSON_SUFFIXES = ('.ndjson', '.ndjson.gz', '.jsonl', '.jsonl.gz')
+
+
+def is_ndjson(path: str) -> bool:
+    """Return True if path names a newline-delimited JSON file (optionally gzip-compressed)."""
+    return path.endswith(NDJSON_SUFFIXES)
+
+
+def iter_ndjson(path: str, start: int = 0, end: Optional[int] = None) -> Iterator[Any]:
+    """
+    Yield the records of a newline-delimited JSON file.
+
+    Uncompressed files are memory-mapped and split on newlines. A byte range
+    yields the lines that start inside it, so ranges that cover a file without
+    overlapping yield every record exactly once.
+
+    Args:
+        path: Path to an .ndjson/.jsonl file, optionally .gz compressed
+        start: Byte offset to start at (uncompressed files only)
+        end: Byte offset to stop at (default: end of file; uncompressed files only)
+
+    Yields:
+        Decoded records
+    """
+    if path.endswith('.gz'):
+        if start or end is not None:
+            raise ValueError(f"Byte ranges are not supported for compressed file {path}")
+        with gzip.open(path, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+
+    size = os.path.getsize(path)
+    if size == 0:
+        return
+    end = size if end is None else min(end, size)
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = start
+        # A range starting mid-line leaves that line to the previous range
+        if pos > 0 and mm[pos - 1:pos] != b'\n':
+            newline = mm.find(b'\n', pos)
+            pos = size if newline == -1 else newline + 1
+        while pos < end:
+            newline = mm.find(b'\n', pos)
+            if newline == -1:
+                newline = size
+            line = mm[pos:newline]
+            if line.strip():
+                yield json.loads(line)
+            pos = newline + 1
+
+
+class NdjsonVoteWriter:
+    """
+    Append-only writer for a newline-delimited JSON vote file.
+
+    Takes the same encoded batches as columnar_store.ColumnarVoteWriter and
+    writes one JSON record per ballot, with dictionary codes decoded back to
+    their values. Files ending in .gz are gzip-compressed.
+    """
+
+    def __init__(self, path: str, metadata_cols: List[str], candidate_cols: List[str],
+                 dictionaries: Optional[Dict[str, Any]] = None, resume: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            path: Output file path (.ndjson or .ndjson.gz)
+            metadata_cols: Metadata columns to write
+            candidate_cols: Candidate columns to write as 0/1 votes
+            dictionaries: CategoryDictionary per dictionary-encoded metadata column
+            resume: State from checkpoint() of an earlier writer of the same file.
+                The file is truncated to that state and appended to.
+        """
+        self.path = path
+        self.metadata_cols = list(metadata_cols)
+        self.candidate_cols = list(candidate_cols)
+        self.dictionaries = dictionaries if dictionaries is not None else {}
+        self.compress = path.endswith('.gz')
+        self.num_rows = resume["num_rows"] if resume else 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if resume:
+            with open(path, 'r+b') as f:
+                f.truncate(resume["size"])
+        else:
+            open(path, 'wb').close()
+        self.handle = self._open()
+
+    def _open(self):
+        """Open the file for appending (a new gzip member when compressing)."""
+        return gzip.open(self.path, 'ab') if self.compress else open(self.path, 'ab')
+
+    def append_encoded(self, metadata: Dict[str, Any], votes: Dict[str, Any], num_rows: int) -> None:
+        """
+        Append a batch of rows whose dictionary columns are encoded.
+
+        Args:
+            metadata: Mapping of metadata column to int32 codes (dictionary columns)
+                or values; absent columns are written as null
+            votes: Mapping of candidate column to a sequence of 0/1 votes
+            num_rows: Number of rows in the batch
+        """
+        columns = []
+        for col in self.metadata_cols:
+            if col not in metadata:
+                columns.append([None] * num_rows)
+            elif col in self.dictionaries:
+                columns.append(self.dictionaries[col].decode(metadata[col]).tolist())
+            else:
+                columns.append(list(metadata[col]))
+        for col in self.candidate_cols:
+            columns.append([int(v) for v in votes[col]] if col in votes else [0] * num_rows)
+
+        keys = self.metadata_cols + self.candidate_cols
+        lines = [json.dumps(dict(zip(keys, row))) for row in zip(*columns)]
+        if lines:
+            self.handle.write(('\n'.join(lines) + '\n').encode('utf-8'))
+        self.num_rows += num_rows
+
+    def checkpoint(self) -> Dict[str, Any]:
+        """
+        Flush the file and return the state needed to resume it.
+
+        Compressed files finish the current gzip member, so the file can be
+        truncated back to this point and continued with a new member.
+
+        Returns:
+            Dictionary with num_rows and the file size in bytes
+        """
+        if self.compress:
+            self.handle.close()
+            self.handle = self._open()
+        else:
+            self.handle.flush()
+        return {"num_rows": self.num_rows, "size": os.path.getsize(self.path)}
+
+    def close(self) -> Dict[str, Any]:
+        """Close the file and return its row count."""
+        self.handle.close()
+        return {"num_rows": self.num_rows}
+
+
+def concatenate_ndjson(part_paths: List[str], path: str) -> Optional[int]:
+    """
+    Concatenate NDJSON files written independently (e.g. by parallel workers).
+
+    Works for gzip-compressed parts too, since gzip members can be concatenated.
+
+    Args:
+        part_paths: Part files, in row order (missing files are skipped)
+        path: Output file path
+
+    Returns:
+        Number of bytes written, or None if none of the parts exist
+    """
+    parts = [p for p in part_paths if os.path.exists(p)]
+    if not parts:
+        return None
+    with open(path, 'wb') as out:
+        for part in parts:
+            with open(part, 'rb') as f:
+                shutil.copyfileobj(f, out)
+        return out.tell()
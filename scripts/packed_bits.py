@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Bit-packed encoding of the per-tabulator 0/1 sequences in scatter data files.
+
+Every tabulator in *_scatter_data.json carries two sequences with one entry
+per ballot: vote_history (1 for Trump, 0 for Harris) and urban_voter (1 for an
+urban precinct, 0 for rural). Written as JSON int lists they dominate the file
+size and the browser's parse time, so they are packed 8 per byte instead.
+
+Each tabulator's sequence starts on a byte boundary and bits are packed most
+significant first. The packed bytes of all tabulators are concatenated and
+stored base64-encoded at the top level of the file; each tabulator records
+its byte offset (sequence_offset) and its number of entries
+(sequence_length). src/scatter_data.js decodes the same layout.
+"""
+
+import base64
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+ENCODING = "packed-bits"
+
+# Per-ballot sequences stored packed, in the order they are written
+PACKED_FIELDS = ["vote_history", "urban_voter"]
+
+
+def pack_sequences(sequences: List[Sequence[int]]) -> Tuple[bytes, List[int]]:
+    """
+    Pack 0/1 sequences into one byte string, each starting on a byte boundary.
+
+    Args:
+        sequences: 0/1 sequences to pack, in order
+
+    Returns:
+        Tuple of (packed bytes, byte offset of each sequence)
+    """
+    offsets = []
+    parts = []
+    offset = 0
+    for sequence in sequences:
+        packed = np.packbits(np.asarray(sequence, dtype=np.uint8))
+        offsets.append(offset)
+        parts.append(packed.tobytes())
+        offset += len(packed)
+    return b"".join(parts), offsets
+
+
+def unpack_sequence(packed: bytes, offset: int, length: int) -> np.ndarray:
+    """
+    Unpack one sequence written by pack_sequences.
+
+    Args:
+        packed: Packed bytes of all sequences
+        offset: Byte offset of the sequence
+        length: Number of entries in the sequence
+
+    Returns:
+        uint8 array of 0/1 values
+    """
+    data = np.frombuffer(packed, dtype=np.uint8, count=(length + 7) // 8, offset=offset)
+    return np.unpackbits(data, count=length)
+
+
+def pack_scatter_data(scatter: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Replace the per-tabulator sequences of scatter data with packed fields.
+
+    Args:
+        scatter: Scatter data with vote_history and urban_voter lists per item of "data"
+
+    Returns:
+        A copy of the scatter data in the packed layout
+    """
+    items = [dict(item) for item in scatter["data"]]
+    lengths = [len(item[PACKED_FIELDS[0]]) for item in items]
+    packed = dict(scatter, data=items, encoding=ENCODING)
+    for field in PACKED_FIELDS:
+        sequences = [item.pop(field) for item in items]
+        if [len(sequence) for sequence in sequences] != lengths:
+            raise ValueError(f"{field} and {PACKED_FIELDS[0]} differ in length")
+        data, offsets = pack_sequences(sequences)
+        packed[field] = base64.b64encode(data).decode("ascii")
+    # Every sequence has one entry per ballot, so they share offsets
+    for item, offset, length in zip(items, offsets, lengths):
+        item["sequence_offset"] = offset
+        item["sequence_length"] = length
+    return packed
+
+
+def unpack_scatter_data(scatter: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Restore the vote_history and urban_voter lists of packed scatter data.
+
+    Scatter data that is not packed is returned unchanged.
+
+    Args:
+        scatter: Scatter data as loaded from *_scatter_data.json
+
+    Returns:
+        Scatter data with vote_history and urban_voter lists per item of "data"
+    """
+    if scatter.get("encoding") != ENCODING:
+        return scatter
+    fields = {field: base64.b64decode(scatter[field]) for field in PACKED_FIELDS}
+    items = []
+    for item in scatter["data"]:
+        item = dict(item)
+        offset = item.pop("sequence_offset")
+        length = item.pop("sequence_length")
+        for field, packed in fields.items():
+            item[field] = unpack_sequence(packed, offset, length).tolist()
+        items.append(item)
+    unpacked = {key: value for key, value in scatter.items() if key not in PACKED_FIELDS and key != "encoding"}
+    unpacked["data"] = items
+    return unpacked
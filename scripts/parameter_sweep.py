@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Sweep the election simulation over a grid of slider settings.
+
+election-simulation.html shows one simulated election per slider setting. To
+say what a setting produces in general, this runs many replicate elections
+(election_simulation.py) for every cell of a grid over the page's sliders, in
+a process pool, and summarizes each cell:
+
+- trump_share: overall Trump share of the votes
+- machine_spread: standard deviation of the machines' Trump percentages
+- vote_correlation: correlation between a machine's vote count and its Trump percentage
+- tail_share: percentage of machines at 80% Trump or more
+
+The mean and standard deviation of each statistic over the replicates are
+written to one indexed file (parameter_sweep.json). The cells are stored in
+row-major order of the axes (the last axis varies fastest), so the page finds
+any slider combination by snapping each slider to its axis and computing the
+offset (src/parameter_sweep.js).
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from election_simulation import DEFAULT_PARAMS, simulate_elections
+
+# Machines on the page; the rural machine slider takes them from the non-rural ones
+TOTAL_MACHINES = 964
+
+# Default grid: each slider around the settings noted in the page
+DEFAULT_AXES = [
+    ("urban_support_base", [35, 45, 55]),
+    ("suburban_support_base", [50, 60, 70]),
+    ("rural_support_base", [63, 73, 83]),
+    ("rural_machines", [150, 250, 350]),
+    ("urban_percentage", [35, 55, 75]),
+    ("urban_cluster_strength", [3, 9, 15]),
+    ("suburban_cluster_strength", [3, 9, 15]),
+    ("rural_cluster_strength", [3, 9, 15]),
+]
+
+STATS = ["trump_share", "machine_spread", "vote_correlation", "tail_share"]
+
+# Machines at or above this Trump percentage count towards tail_share
+TAIL_PERCENTAGE = 80
+
+# Cells sent to a worker at a time
+CELLS_PER_TASK = 64
+
+
+def parse_axis(text: str) -> Tuple[str, List[float]]:
+    """
+    Parse an axis given as name=v1,v2,... or name=start:stop:step (stop included).
+
+    Args:
+        text: Axis specification, e.g. "rural_machines=100:400:50"
+
+    Returns:
+        Tuple of (parameter name, values)
+
+    Raises:
+        ValueError: If the parameter is unknown, the values cannot be parsed, the
+            step is not positive, no values are given, or rural_machines is
+            outside 0..TOTAL_MACHINES
+    """
+    name, _, values = text.partition("=")
+    name = name.strip().replace("-", "_")
+    if name not in DEFAULT_PARAMS or name == "non_rural_machines":
+        raise ValueError(f"Unknown sweep parameter {name}")
+    number = int if isinstance(DEFAULT_PARAMS[name], int) else float
+    if ":" in values:
+        start, stop, step = (number(v) for v in values.split(":"))
+        if step <= 0:
+            raise ValueError(f"Step of {name} must be positive")
+        count = int(math.floor((stop - start) / step + 1e-9)) + 1
+        values = [number(start + i * step) for i in range(count)]
+    else:
+        values = [number(v) for v in values.split(",") if v.strip()]
+    if not values:
+        raise ValueError(f"No values for {name}")
+    # The rural machines are taken from the fixed total
+    if name == "rural_machines" and any(not 0 <= value <= TOTAL_MACHINES for value in values):
+        raise ValueError(f"rural_machines must be between 0 and {TOTAL_MACHINES}")
+    return name, values
+
+
+def cell_params(axes: Sequence[Tuple[str, Sequence[float]]], cell: int,
+                fixed: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Simulation parameters of one grid cell.
+
+    Args:
+        axes: Sweep axes as (parameter name, values)
+        cell: Cell index in row-major order
+        fixed: Parameters that are not swept
+
+    Returns:
+        Simulation parameters of the cell
+    """
+    params = dict(DEFAULT_PARAMS, **(fixed or {}))
+    for name, values in reversed(axes):
+        cell, position = divmod(cell, len(values))
+        params[name] = values[position]
+    params["non_rural_machines"] = TOTAL_MACHINES - params["rural_machines"]
+    return params
+
+
+def election_stats(result: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    Summary statistics of each simulated election.
+
+    Args:
+        result: Output of simulate_elections
+
+    Returns:
+        Dictionary of statistic name to one value per election
+    """
+    total_votes = result["total_votes"].astype(np.float64)
+    percentage = result["trump_percentage"]
+    votes = total_votes.sum(axis=1)
+
+    # Correlation over machines, for all elections at once; 0 when either side is constant
+    votes_centered = total_votes - total_votes.mean(axis=1, keepdims=True)
+    percentage_centered = percentage - percentage.mean(axis=1, keepdims=True)
+    denominator = np.sqrt((votes_centered ** 2).sum(axis=1) * (percentage_centered ** 2).sum(axis=1))
+    covariance = (votes_centered * percentage_centered).sum(axis=1)
+    correlation = np.divide(covariance, denominator, out=np.zeros_like(covariance), where=denominator > 0)
+
+    return {
+        "trump_share": np.divide(result["trump_votes"].sum(axis=1) * 100, votes, out=np.zeros_like(votes), where=votes > 0),
+        "machine_spread": percentage.std(axis=1),
+        "vote_correlation": correlation,
+        "tail_share": (percentage >= TAIL_PERCENTAGE).mean(axis=1) * 100,
+    }
+
+
+# Sweep settings of a worker process, set once by the pool initializer
+worker_sweep = None
+
+def init_sweep_worker(sweep: Dict[str, Any]) -> None:
+    """Store the sweep axes and settings in a worker process."""
+    global worker_sweep
+    worker_sweep = sweep
+
+
+def sweep_task(cells: Sequence[int]) -> List[Dict[str, Tuple[float, float]]]:
+    """
+    Simulate the replicates of some grid cells in a worker process.
+
+    Each cell's random seed is derived from the sweep seed and the cell index,
+    so results do not depend on the number of workers or the task size.
+
+    Args:
+        cells: Cell indices
+
+    Returns:
+        For each cell, statistic name to (mean, standard deviation) over the replicates
+    """
+    sweep = worker_sweep
+    results = []
+    for cell in cells:
+        params = cell_params(sweep["axes"], cell, sweep["fixed"])
+        seed = int(np.random.SeedSequence([sweep["seed"], cell]).generate_state(1)[0])
+        stats = election_stats(simulate_elections(params, sweep["replicates"], seed))
+        results.append({name: (float(values.mean()), float(values.std())) for name, values in stats.items()})
+    return results
+
+
+def run_sweep(axes: Sequence[Tuple[str, Sequence[float]]], replicates: int = 20, seed: int = 1, workers: int = 1,
+              fixed: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Run every cell of a parameter grid.
+
+    Args:
+        axes: Sweep axes as (parameter name, values)
+        replicates: Elections simulated per cell
+        seed: Random seed
+        workers: Number of worker processes
+        fixed: Parameters that are not swept
+
+    Returns:
+        Indexed sweep dictionary, as written to parameter_sweep.json
+    """
+    axes = [(name, list(values)) for name, values in axes]
+    num_cells = math.prod(len(values) for _, values in axes)
+    sweep = {"axes": axes, "replicates": replicates, "seed": seed, "fixed": fixed or {}}
+    tasks = [range(start, min(start + CELLS_PER_TASK, num_cells)) for start in range(0, num_cells, CELLS_PER_TASK)]
+
+    print(f"Sweeping {num_cells} cells x {replicates} elections with {workers} workers...")
+    results = []
+    if workers > 1:
+        with multiprocessing.Pool(workers, initializer=init_sweep_worker, initargs=(sweep,)) as pool:
+            for cell_results in pool.imap(sweep_task, tasks):
+                results.extend(cell_results)
+    else:
+        init_sweep_worker(sweep)
+        for task in tasks:
+            results.extend(sweep_task(task))
+
+    swept = {name for name, _ in axes} | {"non_rural_machines"}
+    return {
+        "axes": [{"name": name, "values": values} for name, values in axes],
+        "fixed": {name: value for name, value in cell_params([], 0, fixed).items() if name not in swept},
+        "total_machines": TOTAL_MACHINES,
+        "replicates": replicates,
+        "seed": seed,
+        "stats": STATS,
+        "mean": {name: [round(cell[name][0], 4) for cell in results] for name in STATS},
+        "std": {name: [round(cell[name][1], 4) for cell in results] for name in STATS},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the election simulation over a grid of slider settings')
+    parser.add_argument('--axis', action='append', type=parse_axis, metavar='NAME=VALUES',
+                        help='Sweep axis as name=v1,v2,... or name=start:stop:step (repeatable; replaces the default grid)')
+    parser.add_argument('--replicates', type=int, default=20, help='Elections simulated per grid cell')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes (default: one per CPU)')
+    parser.add_argument('--output', default='data/processed_data/parameter_sweep.json', help='Indexed result file')
+
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    sweep = run_sweep(args.axis or DEFAULT_AXES, args.replicates, args.seed, args.workers)
+    print(f"Finished in {time.perf_counter() - start:.1f}s")
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(sweep, f, separators=(',', ':'))
+    print(f"Saved parameter sweep to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -14,10 +14,26 @@ import argparse
 import numpy as np
 from pathlib import Path
 import traceback
+import io
+import multiprocessing
+import shutil
+import tempfile
+
+from columnar_store import CategoryDictionary, ColumnarVoteWriter, concatenate_vote_tables
+from vote_aggregates import VoteAggregator, VOTE_TYPES, LOCATION_COLUMNS
+from crosstab import CrossTab, combo_summary, contest_from_columns, pres_senate_contests
+from json_stream import NdjsonVoteWriter, concatenate_ndjson
+from classify_precincts import HARRIS_COL, TRUMP_COL, PrecinctAggregator, write_classification_outputs
+from ingest_checkpoint import CHECKPOINT_NAME, advance_rows, input_fingerprint, load_checkpoint, remove_checkpoint, save_checkpoint
 
 # all headers:
 all_metadata_headers= "CvrNumber,TabulatorNum,BatchId,RecordId,ImprintedId,CountingGroup,PrecinctPortion,BallotType,ImagePath,SessionType,VoterFlag,Modified,CardInfo,PdfName,UniqueVotingIdentifier,VotingSessionIdentifier".split(',')
 
+# Metadata columns that repeat a small set of values across all ballots. These are
+# dictionary-encoded at ingest (int32 codes plus a value table); the per-ballot
+# identifiers (CvrNumber, ImagePath, ...) are kept as strings.
+categorical_metadata_headers = "TabulatorNum,BatchId,CountingGroup,PrecinctPortion,BallotType,SessionType,VoterFlag,Modified,PdfName".split(',')
+
 def create_custom_headers(first_rows, candidate_start_idx=16):
     """
     Creates custom headers from the complex multi-row header structure in the CSV.
@@ -110,7 +126,330 @@ def create_custom_headers(first_rows, candidate_start_idx=16):
     return custom_headers, counting_group_col
 
 
-def process_csv_chunks(input_file, custom_headers, candidate_start_idx, counting_group_col, output_dir):
+def find_contest_columns(first_rows, custom_headers, candidate_start_idx=16):
+    """
+    Group the candidate columns by the contest they belong to.
+    
+    Args:
+        first_rows: DataFrame containing the first few rows of the CSV
+        custom_headers: List of custom headers from create_custom_headers
+        candidate_start_idx: Index where candidate columns start (default: 16)
+        
+    Returns:
+        Dictionary of contest name to list of candidate column headers, in file order
+    """
+    # Row 1 holds the contest name above each candidate column. Blank cells
+    # continue the contest to their left.
+    contest_row = first_rows.iloc[1].tolist()
+    contest_cols = {}
+    contest = None
+    for i in range(candidate_start_idx, len(custom_headers)):
+        name = contest_row[i] if i < len(contest_row) else None
+        if pd.notna(name) and str(name).strip():
+            contest = str(name).strip()
+        contest_cols.setdefault(contest or f"Column_{i}", []).append(custom_headers[i])
+    return contest_cols
+
+
+def select_contests(contest_cols, contests):
+    """
+    Pick the contests to analyze.
+    
+    Args:
+        contest_cols: Dictionary of contest name to columns, from find_contest_columns
+        contests: Contest names to keep (case-insensitive). A name that is not
+            an exact contest name matches every contest containing it.
+        
+    Returns:
+        Dictionary of the selected contest names to their columns, in file order
+    """
+    selected = {}
+    for wanted in contests:
+        matches = [name for name in contest_cols if wanted.lower() == name.lower()]
+        if not matches:
+            matches = [name for name in contest_cols if wanted.lower() in name.lower()]
+        if not matches:
+            print(f"WARNING: No contest matches '{wanted}'. Available contests: {list(contest_cols)}")
+        for name in matches:
+            selected[name] = contest_cols[name]
+    
+    selected = {name: cols for name, cols in contest_cols.items() if name in selected}
+    print(f"Selected contests: {list(selected)}")
+    return selected
+
+
+# Regular expressions for vote type patterns - keep these simple for accuracy.
+# If a counting group matches more than one pattern, the first one listed wins.
+VOTE_TYPE_PATTERNS = {
+    'mail': re.compile('mail', re.IGNORECASE),
+    'early': re.compile('early', re.IGNORECASE),
+    'election_day': re.compile('election', re.IGNORECASE)
+}
+
+# Number of CSV rows parsed per chunk
+CHUNK_SIZE = 1000
+
+# Rows at the top of the CVR export that hold header information
+HEADER_ROWS = 4
+
+# Chunks between checkpoints of a streaming run
+CHECKPOINT_EVERY = 100
+
+# Per-vote-type ballot output formats and the suffix of each output (after e.g. "early")
+VOTE_FORMATS = {
+    'table': '_votes',
+    'ndjson': '_votes.ndjson',
+    'ndjson.gz': '_votes.ndjson.gz',
+}
+
+# --crosstab-by choices and the metadata column each one breaks the cross-tab out by
+CROSSTAB_BY = {
+    'vote_type': None,
+    'tabulator': LOCATION_COLUMNS['by_tabulator'],
+    'precinct': LOCATION_COLUMNS['by_precinct'],
+}
+
+
+def detect_columns(columns, candidate_start_idx, counting_group_col, contest_cols=None, crosstab_contests=None, crosstab_by=None):
+    """
+    Work out which metadata and candidate columns to process.
+    
+    Args:
+        columns: List of column names (the custom headers)
+        candidate_start_idx: Index where candidate columns start
+        counting_group_col: Preferred column containing vote type information
+        contest_cols: Optional dictionary of selected contests to their columns
+            (from select_contests). When given, every column of those contests
+            is processed instead of the default presidential and senate candidates.
+        crosstab_contests: Optional dictionary of contests to cross-tabulate to their columns
+        crosstab_by: Metadata column to break the cross-tab out by (None for vote types only)
+        
+    Returns:
+        Dictionary with metadata_cols, categorical_cols, counting_group_col,
+        candidate_cols, the harris/trump/rosen/brown column lists and the cross-tab
+        settings (crosstab_contests, crosstab_by and crosstab_cols, the extra
+        columns they read). If no counting group column exists,
+        add_dummy_counting_group is True and every chunk gets a dummy one.
+    """
+    # Find the important metadata columns
+    metadata_cols = []
+    
+    # Find matches in our actual columns (case-insensitive)
+    for col in columns[:candidate_start_idx]:
+        for meta in all_metadata_headers:
+            if meta.lower() in col.lower():
+                metadata_cols.append(col)
+                break
+    
+    print(f"Found metadata columns: {metadata_cols}")
+    
+    # Find the CountingGroup column if it exists
+    add_dummy_counting_group = False
+    if counting_group_col not in columns:
+        counting_group_cols = [col for col in metadata_cols if ('count' in col.lower() and 'group' in col.lower()) or 'mode' in col.lower()]
+        if counting_group_cols:
+            counting_group_col = counting_group_cols[0]
+            print(f"Using '{counting_group_col}' as the counting group column")
+        else:
+            print("WARNING: Could not find a counting group column in the data")
+            # Use a dummy column for testing
+            add_dummy_counting_group = True
+            counting_group_col = 'DummyCountingGroup'
+            metadata_cols.append(counting_group_col)
+    
+    all_candidate_cols = list(columns[candidate_start_idx:])
+    if contest_cols is not None:
+        selected_cols = set(col for cols in contest_cols.values() for col in cols)
+        all_candidate_cols = [col for col in all_candidate_cols if col in selected_cols]
+    
+    # Detect presidential candidates with flexible matching
+    harris_cols = [col for col in all_candidate_cols if 'harris' in col.lower() and 'kamala' in col.lower()]
+    trump_cols = [col for col in all_candidate_cols if 'trump' in col.lower() and 'donald' in col.lower()]
+
+    # Detect senate candidates Jacky Rosen and Sam Brown
+    rosen_cols = [col for col in all_candidate_cols if 'rosen' in col.lower() and 'jacky' in col.lower()]
+    brown_cols = [col for col in all_candidate_cols if 'brown' in col.lower() and 'sam' in col.lower()]
+
+    # Combine all relevant candidate columns for processing
+    if contest_cols is not None:
+        candidate_cols = all_candidate_cols
+    else:
+        candidate_cols = harris_cols + trump_cols + rosen_cols + brown_cols
+    if candidate_cols:
+        print(f"Found candidate columns: {candidate_cols}")
+    else:
+        # Fallback: use first few candidate columns
+        candidate_cols = all_candidate_cols[:10] if len(all_candidate_cols) >= 10 else all_candidate_cols
+        print(f"No specific candidates found. Using fallback columns: {candidate_cols}")
+    
+    # Low-cardinality metadata columns are dictionary-encoded
+    categorical_cols = [col for col in metadata_cols if col in categorical_metadata_headers or col == counting_group_col]
+    
+    return {
+        'metadata_cols': metadata_cols,
+        'categorical_cols': categorical_cols,
+        'counting_group_col': counting_group_col,
+        'add_dummy_counting_group': add_dummy_counting_group,
+        'candidate_cols': candidate_cols,
+        'harris_cols': harris_cols,
+        'trump_cols': trump_cols,
+        'rosen_cols': rosen_cols,
+        'brown_cols': brown_cols,
+        'crosstab_contests': crosstab_contests,
+        'crosstab_by': crosstab_by,
+        'crosstab_cols': [col for cols in (crosstab_contests or {}).values() for col in cols if col not in candidate_cols],
+    }
+
+
+def build_projection(columns, plan):
+    """
+    Work out which CSV columns to parse, and how.
+    
+    Only the metadata and candidate columns of the plan are parsed; every other
+    contest is skipped by the CSV reader without being converted.
+    
+    Args:
+        columns: List of column names (the custom headers)
+        plan: Column plan from detect_columns
+        
+    Returns:
+        Dictionary of pd.read_csv arguments: usecols (column names, in file
+        order), dtype, keep_default_na and na_values
+    """
+    vote_cols = plan['candidate_cols'] + plan['crosstab_cols']
+    wanted = set(plan['metadata_cols']) | set(vote_cols)
+    usecols = [col for col in columns if col in wanted]
+    # Metadata are identifiers: read them as text rather than guessing numbers,
+    # and keep empty values (="") as empty strings.
+    # Vote columns are left to the reader, which parses plain 0/1 cells as integers.
+    dtype = {col: str for col in plan['metadata_cols'] if col in wanted}
+    na_values = {col: [''] for col in vote_cols if col in wanted}
+    print(f"Parsing {len(usecols)} of {len(columns)} columns")
+    return {'usecols': usecols, 'dtype': dtype, 'keep_default_na': False, 'na_values': na_values}
+
+
+def clean_chunk(chunk, plan):
+    """
+    Clean a freshly parsed chunk in place.
+    
+    Excel-style ="..." quoting is already removed while parsing (see ExcelQuoteReader).
+    
+    Args:
+        chunk: DataFrame chunk to clean
+        plan: Column plan from detect_columns
+    """
+    if plan['add_dummy_counting_group']:
+        chunk[plan['counting_group_col']] = 'Mail'
+
+
+def vote_output_path(output_dir, category, vote_format='table'):
+    """Return the path of the ballot output of one vote type."""
+    return os.path.join(output_dir, f'{category}{VOTE_FORMATS[vote_format]}')
+
+
+def open_vote_writer(output_dir, category, metadata_cols, candidate_cols, dictionaries, vote_format='table', resume=None):
+    """
+    Open the ballot output of one vote type for writing.
+    
+    Args:
+        output_dir: Directory to save output files
+        category: Vote type
+        metadata_cols: Metadata columns to store
+        candidate_cols: Candidate columns to store
+        dictionaries: Value dictionaries of the categorical metadata columns
+        vote_format: One of VOTE_FORMATS: a columnar table directory, or
+            newline-delimited JSON (optionally gzip-compressed)
+        resume: Writer state from a checkpoint, to continue an existing output
+        
+    Returns:
+        ColumnarVoteWriter or NdjsonVoteWriter
+    """
+    path = vote_output_path(output_dir, category, vote_format)
+    if vote_format == 'table':
+        return ColumnarVoteWriter(path, metadata_cols, candidate_cols, dictionaries, resume=resume)
+    return NdjsonVoteWriter(path, metadata_cols, candidate_cols, dictionaries, resume=resume)
+
+
+def new_crosstab(plan):
+    """Create an empty CrossTab of the plan's cross-tab contests, or None if there are none."""
+    if not plan['crosstab_contests']:
+        return None
+    contests = [contest_from_columns(name, cols) for name, cols in plan['crosstab_contests'].items()]
+    return CrossTab(contests, by=plan['crosstab_by'])
+
+
+def new_aggregator(plan):
+    """Create an empty VoteAggregator for a column plan, with precinct classification if the plan asks for it."""
+    precincts = {vt: PrecinctAggregator() for vt in VOTE_TYPES} if plan.get('classify') else None
+    return VoteAggregator(plan['candidate_cols'], plan['trump_cols'], plan['harris_cols'], plan['rosen_cols'], plan['brown_cols'],
+                          crosstab=new_crosstab(plan), precincts=precincts)
+
+
+def new_dictionaries(plan):
+    """
+    Create empty value dictionaries for a column plan.
+    
+    Covers the categorical metadata columns plus the counting group column,
+    which is always encoded so vote types can be looked up by code.
+    """
+    dictionaries = {col: CategoryDictionary() for col in plan['categorical_cols']}
+    dictionaries.setdefault(plan['counting_group_col'], CategoryDictionary())
+    return dictionaries
+
+
+class VoteTypeClassifier:
+    """
+    Assigns vote types to counting group codes.
+    
+    Each distinct counting group value is matched against the vote type patterns
+    only once; rows are then classified with a single array lookup by code.
+    """
+    
+    def __init__(self, dictionary, vote_type_patterns=VOTE_TYPE_PATTERNS):
+        """
+        Args:
+            dictionary: CategoryDictionary of the counting group column
+            vote_type_patterns: Dictionary of regex patterns for vote types, in precedence order
+        """
+        self.dictionary = dictionary
+        self.vote_type_patterns = vote_type_patterns
+        # Index into VOTE_TYPES for each counting group code; the last slot is for missing values
+        self.lookup = np.array([VOTE_TYPES.index('other')], dtype=np.int8)
+    
+    def classify_value(self, value):
+        """
+        Return the index into VOTE_TYPES for one counting group value.
+        
+        Args:
+            value: Counting group value (e.g. "Early Voting")
+            
+        Returns:
+            Index of the first matching vote type, or of 'other' if none match
+        """
+        matches = [vote_type for vote_type, pattern in self.vote_type_patterns.items() if pattern.search(str(value))]
+        if len(matches) > 1:
+            print(f"WARNING: Counting group '{value}' matches several vote types {matches}; counting it as '{matches[0]}'")
+        return VOTE_TYPES.index(matches[0] if matches else 'other')
+    
+    def classify(self, codes):
+        """
+        Classify rows by their counting group codes.
+        
+        Args:
+            codes: int32 counting group codes (MISSING_CODE for missing values)
+            
+        Returns:
+            int8 array of indexes into VOTE_TYPES
+        """
+        known = len(self.lookup) - 1
+        if len(self.dictionary) > known:
+            new_types = [self.classify_value(value) for value in self.dictionary.values[known:]]
+            self.lookup = np.concatenate([self.lookup[:-1], np.array(new_types, dtype=np.int8), self.lookup[-1:]])
+        return self.lookup[codes]
+
+
+def process_csv_chunks(input_file, custom_headers, candidate_start_idx, counting_group_col, output_dir, streaming=False, workers=1, contest_cols=None,
+                       checkpoint_every=CHECKPOINT_EVERY, resume=False, crosstab_contests=None, crosstab_by=None, vote_format='table', classify=False):
     """
     Process the CSV data in chunks and generate output JSON files.
     
@@ -120,244 +459,678 @@ def process_csv_chunks(input_file, custom_headers, candidate_start_idx, counting
         candidate_start_idx: Index where candidate columns start
         counting_group_col: Column containing vote type information
         output_dir: Directory to save output files
+        streaming: Fold each chunk into running aggregates instead of keeping
+            every ballot in memory. Produces the same summary files.
+        workers: Number of worker processes. More than one parses byte ranges
+            of the file in parallel (implies streaming).
+        contest_cols: Optional dictionary of selected contests to their columns
+        checkpoint_every: In streaming mode, save a checkpoint to output_dir every
+            this many chunks (0 disables checkpoints)
+        resume: In streaming mode, continue from the checkpoint in output_dir
+            if it matches the input file
+        crosstab_contests: Optional dictionary of contests to cross-tabulate to their columns
+        crosstab_by: Metadata column to break the cross-tab out by (None for vote types only)
+        vote_format: Format of the per-vote-type ballot outputs, one of VOTE_FORMATS
+        classify: In streaming mode, also classify precincts and tabulators as
+            classify_precincts.py does, writing its outputs for every vote type
     """
-    # Regular expressions for vote type patterns - keep these simple for accuracy
-    vote_type_patterns = {
-        'mail': re.compile('mail', re.IGNORECASE),
-        'early': re.compile('early', re.IGNORECASE),
-        'election_day': re.compile('election', re.IGNORECASE)
-    }
+    plan = detect_columns(custom_headers, candidate_start_idx, counting_group_col, contest_cols, crosstab_contests, crosstab_by)
+    plan['vote_format'] = vote_format
+    plan['classify'] = classify
+    projection = build_projection(custom_headers, plan)
+    
+    if workers > 1:
+        return process_csv_parallel(input_file, custom_headers, plan, projection, output_dir, workers)
     
     # Create dictionaries to hold the processed data by vote type
-    voting_data = {
-        'early': [],
-        'mail': [],
-        'election_day': [],
-        'other': []
-    }
+    voting_data = {vote_type: [] for vote_type in VOTE_TYPES}
+    
+    # Value dictionaries for the categorical metadata columns, shared by every vote type
+    dictionaries = new_dictionaries(plan)
+    classifier = VoteTypeClassifier(dictionaries[plan['counting_group_col']])
+    
+    # Streaming mode state: running aggregates and per-vote-type table writers
+    aggregator = new_aggregator(plan)
+    table_writers = {}
     
     # Process the CSV in chunks to handle large files
-    chunk_size = 1000
     total_rows = 0
+    first_chunk_num = 0
+    
+    # Checkpoints record the byte offset reached, so a streaming run can resume there
+    checkpointing = streaming and checkpoint_every > 0
+    offset = find_data_start(input_file)
+    if checkpointing:
+        checkpoint_path = os.path.join(output_dir, CHECKPOINT_NAME)
+        fingerprint = input_fingerprint(input_file)
+        rows_since_checkpoint = 0
+        
+        state = load_checkpoint(checkpoint_path, fingerprint, plan) if resume else None
+        if state:
+            dictionaries = state['dictionaries']
+            classifier = VoteTypeClassifier(dictionaries[plan['counting_group_col']])
+            aggregator = state['aggregator']
+            total_rows = state['total_rows']
+            first_chunk_num = state['chunk_num']
+            offset = state['offset']
+            for category, table_state in state['tables'].items():
+                table_writers[category] = open_vote_writer(output_dir, category, plan['metadata_cols'], plan['candidate_cols'], dictionaries,
+                                                           plan['vote_format'], resume=table_state)
+            print(f"Resuming after chunk {first_chunk_num} ({total_rows} rows already processed)")
     
-    # Initialize candidate column lists
-    president_cols = []
-    # Senate candidate columns we care about
-    rosen_cols = []
-    brown_cols = []
-    # Keep track of specific president columns for summary later
-    harris_cols = []
-    trump_cols = []
-    
-    # Read the CSV, skipping the first 4 rows which contain our header information
-    # Note: The data actually starts at row 5 (0-indexed would be 4)
-    for chunk_num, chunk in enumerate(pd.read_csv(input_file, skiprows=4, names=custom_headers, chunksize=chunk_size)):
+    # Read the data rows, which start after the 4 header rows (or at the checkpoint)
+    reader = open_data_rows(input_file, offset, os.path.getsize(input_file))
+    chunks = read_chunks(reader, custom_headers, projection)
+    for chunk_num, chunk in enumerate(chunks, start=first_chunk_num):
         try:
             print(f"Processing chunk {chunk_num+1}...")
             total_rows += len(chunk)
+            if checkpointing:
+                rows_since_checkpoint += len(chunk)
+            aggregator.add_rows(len(chunk))
             
-            # Clean data: replace Excel-style quotations and convert everything to strings
-            for col in chunk.columns:
-                if chunk[col].dtype == 'object':
-                    chunk[col] = chunk[col].astype(str)
-                    chunk[col] = chunk[col].str.replace(r'^="(.*)"$', r'\1', regex=True)
-            
-            # Find the important metadata columns
-            metadata_cols = []
-            
-            # Find matches in our actual columns (case-insensitive)
-            for col in chunk.columns[:candidate_start_idx]:
-                for meta in all_metadata_headers:
-                    if meta.lower() in col.lower():
-                        metadata_cols.append(col)
-                        break
-            
-            # Only print metadata columns once
-            if chunk_num == 0:
-                print(f"Found metadata columns: {metadata_cols}")
-            
-            # Find the CountingGroup column if it exists
-            if chunk_num == 0 and counting_group_col not in chunk.columns:
-                counting_group_cols = [col for col in metadata_cols if ('count' in col.lower() and 'group' in col.lower()) or 'mode' in col.lower()]
-                if counting_group_cols:
-                    counting_group_col = counting_group_cols[0]
-                    print(f"Using '{counting_group_col}' as the counting group column")
-                else:
-                    print("WARNING: Could not find a counting group column in the data")
-                    # Create a dummy column for testing
-                    chunk['DummyCountingGroup'] = 'Mail'
-                    counting_group_col = 'DummyCountingGroup'
-                    metadata_cols.append(counting_group_col)
-            
-            # Find presidential candidate columns (only do this once)
-            if not president_cols and chunk_num == 0:
-                all_candidate_cols = chunk.columns[candidate_start_idx:].tolist()
-                
-                # Detect presidential candidates with flexible matching
-                harris_cols = [col for col in all_candidate_cols if 'harris' in col.lower() and 'kamala' in col.lower()]
-                trump_cols = [col for col in all_candidate_cols if 'trump' in col.lower() and 'donald' in col.lower()]
-
-                # Detect senate candidates Jacky Rosen and Sam Brown
-                rosen_cols = [col for col in all_candidate_cols if 'rosen' in col.lower() and 'jacky' in col.lower()]
-                brown_cols = [col for col in all_candidate_cols if 'brown' in col.lower() and 'sam' in col.lower()]
-
-                # Combine all relevant candidate columns for processing
-                candidate_cols = harris_cols + trump_cols + rosen_cols + brown_cols
-                if candidate_cols:
-                    print(f"Found candidate columns: {candidate_cols}")
-                else:
-                    # Fallback: use first few candidate columns
-                    candidate_cols = all_candidate_cols[:10] if len(all_candidate_cols) >= 10 else all_candidate_cols
-                    print(f"No specific candidates found. Using fallback columns: {candidate_cols}")
+            clean_chunk(chunk, plan)
             
             # Process the chunk and extract vote data by type
-            # Note: this mutates voting_data in place
-            process_chunk_data(chunk, counting_group_col, vote_type_patterns, candidate_cols, metadata_cols, voting_data)
+            if streaming:
+                stream_chunk_data(chunk, plan, dictionaries, classifier, aggregator, table_writers, output_dir)
+            else:
+                # Note: this mutates voting_data in place
+                process_chunk_data(chunk, plan, dictionaries, classifier, voting_data)
             
         except Exception as e:
             print(f"Error processing chunk {chunk_num+1}: {e}")
             traceback.print_exc()
             continue
+        
+        if checkpointing and (chunk_num + 1) % checkpoint_every == 0:
+            offset = advance_rows(input_file, offset, rows_since_checkpoint)
+            rows_since_checkpoint = 0
+            save_checkpoint(checkpoint_path, {
+                'fingerprint': fingerprint,
+                'plan': plan,
+                'offset': offset,
+                'chunk_num': chunk_num + 1,
+                'total_rows': total_rows,
+                'aggregator': aggregator,
+                'dictionaries': dictionaries,
+                'tables': {category: writer.checkpoint() for category, writer in table_writers.items()},
+            })
+            print(f"Saved checkpoint after chunk {chunk_num+1}")
+    
+    reader.close()
+    
+    if streaming:
+        close_table_writers(table_writers)
+        summary = finish_streaming_outputs(aggregator, dictionaries, plan['candidate_cols'], plan['metadata_cols'], total_rows, output_dir)
+        if checkpointing:
+            remove_checkpoint(checkpoint_path)
+        return summary
     
     # Create output from the processed data
-    summary = generate_output_files(voting_data, candidate_cols, metadata_cols, total_rows, output_dir)
-
-    # Generate president–senate combination summary
-    combo_counts = generate_pres_senate_combo_summary(
-        voting_data,
-        trump_cols=trump_cols,
-        harris_cols=harris_cols,
-        rosen_cols=rosen_cols,
-        brown_cols=brown_cols,
-        output_dir=output_dir
-    )
-    summary["pres_senate_combo_counts"] = combo_counts
+    summary = generate_output_files(voting_data, plan['candidate_cols'], plan['metadata_cols'], total_rows, output_dir, dictionaries, vote_format)
+
+    # Generate president–senate combination summary and any requested cross-tab
+    summary["pres_senate_combo_counts"] = generate_crosstab_summaries(voting_data, plan, dictionaries, output_dir)
     return summary
 
 
-def process_chunk_data(chunk, counting_group_col, vote_type_patterns, president_cols, metadata_cols, voting_data):
+def find_data_start(input_file, header_rows=HEADER_ROWS):
     """
-    Process a single chunk of data and extract vote information.
+    Return the byte offset of the first data row, after the header rows.
     
     Args:
-        chunk: DataFrame chunk to process
-        counting_group_col: Column with vote type information
-        vote_type_patterns: Dictionary of regex patterns for vote types
-        president_cols: List of presidential candidate columns
+        input_file: Path to the CSV file
+        header_rows: Number of header rows at the top of the file
+        
+    Returns:
+        Byte offset of the first data row
+    """
+    with open(input_file, 'rb') as f:
+        for _ in range(header_rows):
+            f.readline()
+        return f.tell()
+
+
+def plan_byte_ranges(input_file, data_start, num_ranges, chunk_size=CHUNK_SIZE, block_size=1 << 24):
+    """
+    Split the data rows of a CSV file into newline-aligned byte ranges.
+    
+    Range boundaries are placed only at chunk boundaries (every chunk_size rows),
+    so each range is parsed into exactly the same chunks as a serial run would.
+    Assumes no quoted field contains a newline, which holds for CVR exports.
+    
+    Args:
+        input_file: Path to the CSV file
+        data_start: Byte offset of the first data row
+        num_ranges: Desired number of ranges
+        chunk_size: Rows per chunk
+        block_size: Bytes scanned for newlines at a time
+        
+    Returns:
+        List of (start, end, first_chunk_num) tuples covering the data rows
+    """
+    file_size = os.path.getsize(input_file)
+    span = file_size - data_start
+    targets = [data_start + span * k // num_ranges for k in range(1, num_ranges)]
+    
+    boundaries = [(data_start, 0)]
+    rows_seen = 0
+    with open(input_file, 'rb') as f:
+        f.seek(data_start)
+        offset = data_start
+        while targets:
+            block = f.read(block_size)
+            if not block:
+                break
+            newlines = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == ord('\n'))
+            # Rows completed at each newline in this block, and the byte after it
+            row_numbers = rows_seen + np.arange(1, len(newlines) + 1)
+            ends = offset + newlines + 1
+            chunk_ends = ends[row_numbers % chunk_size == 0]
+            for end in chunk_ends:
+                if not targets:
+                    break
+                if end >= targets[0]:
+                    boundaries.append((int(end), int(row_numbers[np.searchsorted(ends, end)]) // chunk_size))
+                    while targets and targets[0] <= end:
+                        targets.pop(0)
+            rows_seen += len(newlines)
+            offset += len(block)
+    
+    ranges = []
+    for i, (start, first_chunk) in enumerate(boundaries):
+        end = boundaries[i + 1][0] if i + 1 < len(boundaries) else file_size
+        if end > start:
+            ranges.append((start, end, first_chunk))
+    return ranges
+
+
+class ByteRangeReader(io.RawIOBase):
+    """Read-only file object limited to one byte range of a file."""
+    
+    def __init__(self, path, start, end):
+        self.f = open(path, 'rb')
+        self.f.seek(start)
+        self.remaining = end - start
+    
+    def readable(self):
+        return True
+    
+    def readinto(self, buffer):
+        size = min(len(buffer), self.remaining)
+        if size <= 0:
+            return 0
+        data = self.f.read(size)
+        buffer[:len(data)] = data
+        self.remaining -= len(data)
+        return len(data)
+    
+    def close(self):
+        self.f.close()
+        super().close()
+
+
+class ExcelQuoteReader(io.RawIOBase):
+    """
+    Read-only file object that unwraps Excel-style ="..." fields.
+    
+    The CVR export writes most metadata as ="value" so spreadsheets keep it as
+    text. Rewriting a field-leading =" to " turns those fields into ordinary
+    quoted CSV fields, so the CSV parser strips the wrapper while tokenizing
+    instead of every value being cleaned again afterwards.
+    """
+    
+    def __init__(self, raw, block_size=1 << 20):
+        """
+        Args:
+            raw: Binary file object positioned at the start of a row
+            block_size: Bytes read from raw at a time
+        """
+        self.raw = raw
+        self.block_size = block_size
+        # A leading newline lets a wrapper in the very first field match; it is dropped again below
+        self.tail = b'\n'
+        self.at_start = True
+        self.buffer = b''
+        self.pos = 0
+    
+    def readable(self):
+        return True
+    
+    def _fill(self):
+        """Read and rewrite the next block. Returns False at end of file."""
+        block = self.raw.read(self.block_size)
+        data = (self.tail + block).replace(b',="', b',"').replace(b'\n="', b'\n"')
+        if block:
+            # Hold back the last two bytes: they may begin a wrapper completed by the next block
+            data, self.tail = data[:-2], data[-2:]
+        else:
+            self.tail = b''
+        if self.at_start and data:
+            data = data[1:]
+            self.at_start = False
+        self.buffer = self.buffer[self.pos:] + data
+        self.pos = 0
+        return bool(block)
+    
+    def readinto(self, buffer):
+        while self.pos == len(self.buffer) and self._fill():
+            pass
+        size = min(len(buffer), len(self.buffer) - self.pos)
+        buffer[:size] = self.buffer[self.pos:self.pos + size]
+        self.pos += size
+        return size
+    
+    def close(self):
+        self.raw.close()
+        super().close()
+
+
+def open_data_rows(input_file, start, end):
+    """
+    Open a byte range of data rows of the CSV for parsing.
+    
+    Args:
+        input_file: Path to the CSV file
+        start: Byte offset of the first row
+        end: Byte offset just past the last row
+        
+    Returns:
+        Buffered binary file object with Excel-style quoting unwrapped
+    """
+    return io.BufferedReader(ExcelQuoteReader(ByteRangeReader(input_file, start, end)))
+
+
+def read_chunks(reader, custom_headers, projection):
+    """
+    Parse data rows in chunks of CHUNK_SIZE rows.
+    
+    Args:
+        reader: File object from open_data_rows
+        custom_headers: List of custom column headers
+        projection: Reader arguments from build_projection
+        
+    Returns:
+        Iterator of DataFrame chunks
+    """
+    return pd.read_csv(reader, header=None, names=custom_headers, chunksize=CHUNK_SIZE, **projection)
+
+
+def process_byte_range(task):
+    """
+    Parse and aggregate one byte range of the CSV (runs in a worker process).
+    
+    Args:
+        task: Dictionary with input_file, custom_headers, plan, projection,
+            start, end, first_chunk_num and part_dir
+        
+    Returns:
+        (aggregator, dictionaries, total_rows) for the range. Vote tables are
+        written under part_dir, encoded against the range's own dictionaries.
+    """
+    plan = task['plan']
+    dictionaries = new_dictionaries(plan)
+    classifier = VoteTypeClassifier(dictionaries[plan['counting_group_col']])
+    aggregator = new_aggregator(plan)
+    table_writers = {}
+    total_rows = 0
+    
+    with open_data_rows(task['input_file'], task['start'], task['end']) as reader:
+        chunks = read_chunks(reader, task['custom_headers'], task['projection'])
+        for chunk_num, chunk in enumerate(chunks, start=task['first_chunk_num']):
+            try:
+                print(f"Processing chunk {chunk_num+1}...")
+                total_rows += len(chunk)
+                aggregator.add_rows(len(chunk))
+                clean_chunk(chunk, plan)
+                stream_chunk_data(chunk, plan, dictionaries, classifier, aggregator, table_writers, task['part_dir'])
+            except Exception as e:
+                print(f"Error processing chunk {chunk_num+1}: {e}")
+                traceback.print_exc()
+                continue
+    
+    close_table_writers(table_writers)
+    return aggregator, dictionaries, total_rows
+
+
+def process_csv_parallel(input_file, custom_headers, plan, projection, output_dir, workers):
+    """
+    Parse and aggregate the CSV in a process pool, one byte range per task.
+    
+    Partial aggregates and vote tables are merged in file order, so the outputs
+    are identical to a serial run.
+    
+    Args:
+        input_file: Path to the CSV file
+        custom_headers: List of custom column headers
+        plan: Column plan from detect_columns
+        projection: Reader arguments from build_projection
+        output_dir: Directory to save output files
+        workers: Number of worker processes
+        
+    Returns:
+        Summary information dictionary
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    data_start = find_data_start(input_file)
+    # A few ranges per worker keeps the pool busy when ranges parse at different speeds
+    ranges = plan_byte_ranges(input_file, data_start, workers * 4)
+    print(f"Parsing {len(ranges)} byte ranges with {workers} workers...")
+    
+    parts_dir = tempfile.mkdtemp(prefix='.parts-', dir=output_dir)
+    try:
+        tasks = []
+        for i, (start, end, first_chunk_num) in enumerate(ranges):
+            tasks.append({
+                'input_file': input_file,
+                'custom_headers': custom_headers,
+                'plan': plan,
+                'projection': projection,
+                'start': start,
+                'end': end,
+                'first_chunk_num': first_chunk_num,
+                'part_dir': os.path.join(parts_dir, f'part_{i:05d}'),
+            })
+        
+        dictionaries = new_dictionaries(plan)
+        aggregator = new_aggregator(plan)
+        total_rows = 0
+        with multiprocessing.Pool(workers) as pool:
+            # imap returns results in task order, which keeps the merge deterministic:
+            # merged dictionaries list values in the same first-seen order as a serial run
+            for part_aggregator, part_dictionaries, part_rows in pool.imap(process_byte_range, tasks):
+                code_mappings = {col: dictionaries[col].remap(part.values) for col, part in part_dictionaries.items()}
+                aggregator.merge(part_aggregator, code_mappings)
+                total_rows += part_rows
+        
+        for category in VOTE_TYPES:
+            path = vote_output_path(output_dir, category, plan['vote_format'])
+            part_paths = [vote_output_path(task['part_dir'], category, plan['vote_format']) for task in tasks]
+            if plan['vote_format'] == 'table':
+                written = concatenate_vote_tables(part_paths, path, dictionaries)
+            else:
+                # NDJSON parts hold decoded values, so they are simply appended
+                written = concatenate_ndjson(part_paths, path)
+            if written is not None:
+                print(f"Saved {aggregator.vote_type_counts[category]} {category} votes to {path}")
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+    
+    return finish_streaming_outputs(aggregator, dictionaries, plan['candidate_cols'], plan['metadata_cols'], total_rows, output_dir)
+
+
+def close_table_writers(table_writers):
+    """
+    Close the vote table writers opened while streaming, in vote type order.
+    
+    Args:
+        table_writers: Dictionary of open vote writers by vote type
+    """
+    for category in VOTE_TYPES:
+        if category in table_writers:
+            writer = table_writers[category]
+            writer.close()
+            print(f"Saved {writer.num_rows} {category} votes to {writer.path}")
+
+
+def finish_streaming_outputs(aggregator, dictionaries, candidate_cols, metadata_cols, total_rows, output_dir):
+    """
+    Write the summary files from streamed aggregates.
+    
+    Args:
+        aggregator: VoteAggregator holding the running totals
+        dictionaries: Value dictionaries of the categorical metadata columns
+        candidate_cols: List of candidate columns
+        metadata_cols: List of metadata columns included
+        total_rows: Total number of rows processed
+        output_dir: Directory to save output files
+        
+    Returns:
+        Summary information dictionary
+    """
+    summary = write_summary_files(aggregator.candidate_summary(), dict(aggregator.vote_type_counts),
+                                  candidate_cols, metadata_cols, total_rows, output_dir)
+    
+    # Ballot and vote counters per tabulator and precinct
+    counts_path = os.path.join(output_dir, 'location_counts.json')
+    with open(counts_path, 'w') as f:
+        json.dump(aggregator.location_summary(dictionaries), f, indent=2)
+    print(f"Saved tabulator and precinct counters to {counts_path}")
+    
+    summary["pres_senate_combo_counts"] = write_pres_senate_combo_summary(aggregator.combo_summary(), output_dir)
+    if aggregator.crosstab is not None:
+        write_crosstab_summary(aggregator.crosstab, dictionaries, output_dir)
+    if aggregator.precincts is not None:
+        # The same outputs classify_precincts.py writes for each *_votes file
+        for category in VOTE_TYPES:
+            if aggregator.vote_type_counts[category]:
+                print(f"\nClassifying precincts of {category} votes...")
+                write_classification_outputs(aggregator.precincts[category], f"{category}_votes", output_dir)
+    return summary
+
+
+def normalize_metadata_column(series):
+    """
+    Convert a metadata column into plain Python strings.
+    
+    Excel-style quoting has already been removed while parsing, so this only
+    replaces missing values (from short rows) with None.
+    
+    Args:
+        series: Metadata column from a chunk, read as text
+        
+    Returns:
+        Object Series of strings, with None for missing values
+    """
+    missing = series.isna()
+    cleaned = series.astype(object)
+    cleaned[missing] = None
+    return cleaned
+
+
+def votes_to_int8(series):
+    """
+    Convert a candidate column into a 0/1 int8 array.
+    
+    A cell counts as a vote when it equals 1 (numerically or as the string '1')
+    or reads 'yes'/'true' in any case. Missing values count as no vote.
+    
+    Args:
+        series: Candidate column from a chunk
+        
+    Returns:
+        numpy int8 array of 0/1 votes
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        marked = series == 1
+    else:
+        text = series.astype(str)
+        marked = (series == 1) | (text == '1') | text.str.lower().isin(['yes', 'true'])
+    return marked.to_numpy(dtype=np.int8)
+
+
+def extract_vote_columns(frame, metadata_cols, president_cols):
+    """
+    Normalize the metadata and candidate columns of a frame with whole-column operations.
+    
+    Args:
+        frame: DataFrame (or subset of a chunk) to extract columns from
         metadata_cols: List of metadata columns to include
-        voting_data: Dictionary to append processed vote data to
-    """
-    if counting_group_col in chunk.columns:
-        # Process each vote type category
-        for vote_category, pattern in vote_type_patterns.items():
-            # Create a clean mask for this vote type
-            mask = chunk[counting_group_col].astype(str).str.contains(pattern, na=False, regex=True)
-            matching_rows = mask.sum()
-            
-            if matching_rows > 0:
-                # Get the subset of data for this vote type
-                category_chunk = chunk[mask].copy()
-                
-                # Process each row
-                vote_records = []
-                for _, row in category_chunk.iterrows():
-                    # Create a record with metadata
-                    record = {}
-                    for col in metadata_cols:
-                        if col in row:
-                            # Clean the data value
-                            val = row[col]
-                            if pd.isna(val):
-                                val = None
-                            else:
-                                # Remove quotes if they exist
-                                val = str(val).strip('=""')
-                            record[col] = val
-                    
-                    # Add candidate votes
-                    for col in president_cols:
-                        if col in row:
-                            val = row[col]
-                            # Convert vote values to a clean format
-                            if pd.isna(val):
-                                record[col] = 0
-                            elif val == '1' or val == 1 or str(val).lower() == 'yes' or str(val).lower() == 'true':
-                                record[col] = 1
-                            else:
-                                record[col] = 0
-                    
-                    # Add the record if it has valid data
-                    if record:
-                        vote_records.append(record)
-                
-                # Add to the appropriate category data
-                voting_data[vote_category].extend(vote_records)
-        
-        # Check for any remaining votes that don't match our patterns
-        combined_pattern = '|'.join(pattern.pattern for pattern in vote_type_patterns.values())
-        all_categorized = chunk[counting_group_col].astype(str).str.contains(combined_pattern, na=False, regex=True, case=False)
-        not_categorized = ~all_categorized
-        
-        if not_categorized.any():
-            other_chunk = chunk[not_categorized].copy()
-            print("Found some votes that don't match our patterns", not_categorized.sum(), other_chunk[counting_group_col].unique())
-            
-            # Process these the same way as above
-            vote_records = []
-            for _, row in other_chunk.iterrows():
-                record = {}
-                for col in metadata_cols:
-                    if col in row:
-                        val = row[col]
-                        if pd.isna(val):
-                            val = None
-                        else:
-                            val = str(val).strip('=""')
-                        record[col] = val
-                
-                # Add candidate votes
-                for col in president_cols:
-                    if col in row:
-                        val = row[col]
-                        if pd.isna(val):
-                            record[col] = 0
-                        elif val == '1' or val == 1 or str(val).lower() == 'yes' or str(val).lower() == 'true':
-                            record[col] = 1
-                        else:
-                            record[col] = 0
-                
-                if record:
-                    vote_records.append(record)
-            
-            voting_data['other'].extend(vote_records)
+        president_cols: List of candidate columns to include
+        
+    Returns:
+        metadata: Dictionary of metadata column to object array (None for missing values)
+        votes: Dictionary of candidate column to 0/1 int8 array
+    """
+    metadata = {}
+    for col in metadata_cols:
+        if col in frame.columns:
+            metadata[col] = normalize_metadata_column(frame[col]).to_numpy()
+    votes = {}
+    for col in president_cols:
+        if col in frame.columns:
+            votes[col] = votes_to_int8(frame[col])
+    return metadata, votes
+
+
+def encode_chunk(chunk, plan, dictionaries):
+    """
+    Convert a cleaned chunk into an encoded batch of ballots.
+    
+    Categorical metadata columns become int32 dictionary codes, other metadata
+    columns become object arrays of cleaned strings, and candidate (and cross-tab)
+    columns become 0/1 int8 arrays.
+    
+    Args:
+        chunk: DataFrame chunk to encode
+        plan: Column plan from detect_columns
+        dictionaries: Value dictionaries of the categorical columns (updated in place)
+        
+    Returns:
+        Batch dictionary with num_rows, metadata, votes and counting_group codes
+        (None if the chunk has no counting group column)
+    """
+    metadata, votes = extract_vote_columns(chunk, plan['metadata_cols'], plan['candidate_cols'] + plan['crosstab_cols'])
+    for col in plan['categorical_cols']:
+        if col in metadata:
+            metadata[col] = dictionaries[col].encode(metadata[col])
+    
+    # Counting group codes, used to classify the vote type of each row
+    counting_group_col = plan['counting_group_col']
+    if counting_group_col in plan['categorical_cols'] and counting_group_col in metadata:
+        counting_group = metadata[counting_group_col]
+    elif counting_group_col in chunk.columns:
+        counting_group = dictionaries[counting_group_col].encode(normalize_metadata_column(chunk[counting_group_col]).to_numpy())
     else:
+        counting_group = None
+    
+    return {'num_rows': len(chunk), 'metadata': metadata, 'votes': votes, 'counting_group': counting_group}
+
+
+def take_rows(batch, mask):
+    """
+    Select the rows of an encoded batch where mask is True.
+    
+    Args:
+        batch: Batch dictionary from encode_chunk
+        mask: Boolean numpy array with one entry per row
+        
+    Returns:
+        New batch dictionary holding only the selected rows
+    """
+    return {
+        'num_rows': int(np.count_nonzero(mask)),
+        'metadata': {col: values[mask] for col, values in batch['metadata'].items()},
+        'votes': {col: values[mask] for col, values in batch['votes'].items()},
+    }
+
+
+def split_batch_by_vote_type(batch, classifier):
+    """
+    Split an encoded batch into the rows belonging to each vote type.
+    
+    Every row belongs to exactly one vote type. Rows whose counting group
+    matches no pattern (or that have no counting group) are returned as 'other'.
+    
+    Args:
+        batch: Batch dictionary from encode_chunk
+        classifier: VoteTypeClassifier for the counting group column
+        
+    Yields:
+        (vote_category, boolean row mask) pairs for every non-empty category
+    """
+    if batch['counting_group'] is None:
         # Fallback if counting group column is missing
-        vote_records = []
-        for _, row in chunk.iterrows():
-            record = {}
-            for col in metadata_cols:
-                if col in row:
-                    val = row[col]
-                    record[col] = None if pd.isna(val) else str(val).strip('=""')
-            
-            # Add candidate votes
-            for col in president_cols:
-                if col in row:
-                    val = row[col]
-                    if pd.isna(val):
-                        record[col] = 0
-                    elif val == '1' or val == 1 or str(val).lower() == 'yes' or str(val).lower() == 'true':
-                        record[col] = 1
-                    else:
-                        record[col] = 0
-            
-            if record:
-                vote_records.append(record)
+        yield 'other', np.ones(batch['num_rows'], dtype=bool)
+        return
+    
+    vote_types = classifier.classify(batch['counting_group'])
+    present = np.bincount(vote_types, minlength=len(VOTE_TYPES))
+    
+    for index, vote_category in enumerate(VOTE_TYPES):
+        if not present[index]:
+            continue
+        mask = vote_types == index
+        if vote_category == 'other':
+            unmatched = classifier.dictionary.decode(np.unique(batch['counting_group'][mask]))
+            print("Found some votes that don't match our patterns", present[index], unmatched)
+        yield vote_category, mask
+
+
+def process_chunk_data(chunk, plan, dictionaries, classifier, voting_data):
+    """
+    Process a single chunk of data and extract vote information.
+    
+    Args:
+        chunk: DataFrame chunk to process
+        plan: Column plan from detect_columns
+        dictionaries: Value dictionaries of the categorical columns
+        classifier: VoteTypeClassifier for the counting group column
+        voting_data: Dictionary of vote type to list of encoded batches, appended to
+    """
+    batch = encode_chunk(chunk, plan, dictionaries)
+    for vote_category, mask in split_batch_by_vote_type(batch, classifier):
+        voting_data[vote_category].append(take_rows(batch, mask))
+
+
+def stream_chunk_data(chunk, plan, dictionaries, classifier, aggregator, table_writers, output_dir):
+    """
+    Fold a single chunk into running aggregates without retaining its ballots.
+    
+    Args:
+        chunk: DataFrame chunk to process
+        plan: Column plan from detect_columns
+        dictionaries: Value dictionaries of the categorical columns
+        classifier: VoteTypeClassifier for the counting group column
+        aggregator: VoteAggregator to fold the chunk into
+        table_writers: Dictionary of open vote writers by vote type (created on demand)
+        output_dir: Directory the columnar vote tables are written to
+    """
+    batch = encode_chunk(chunk, plan, dictionaries)
+    for vote_category, mask in split_batch_by_vote_type(batch, classifier):
+        category_batch = take_rows(batch, mask)
+        aggregator.fold(vote_category, category_batch['metadata'], category_batch['votes'])
+        if aggregator.precincts is not None:
+            classify_batch(aggregator.precincts[vote_category], category_batch, dictionaries)
         
-        voting_data['other'].extend(vote_records)
+        if vote_category not in table_writers:
+            table_writers[vote_category] = open_vote_writer(output_dir, vote_category, plan['metadata_cols'], plan['candidate_cols'], dictionaries,
+                                                            plan['vote_format'])
+        table_writers[vote_category].append_encoded(category_batch['metadata'], category_batch['votes'], category_batch['num_rows'])
+
+
+def classify_batch(precinct_aggregator, batch, dictionaries):
+    """
+    Add the ballots of an encoded batch to a precinct classification.
+    
+    The location columns are decoded back to their values, so the classification
+    sees each ballot exactly as classify_precincts.py reads it from a vote file.
+    
+    Args:
+        precinct_aggregator: PrecinctAggregator of the batch's vote type
+        batch: Batch dictionary of one vote type from take_rows
+        dictionaries: Value dictionaries of the categorical columns
+    """
+    num_rows = batch['num_rows']
+    columns = []
+    for col in ('PrecinctPortion', 'TabulatorNum'):
+        values = batch['metadata'].get(col)
+        if values is None:
+            columns.append([None] * num_rows)
+        elif col in dictionaries:
+            columns.append(dictionaries[col].decode(values).tolist())
+        else:
+            columns.append(values.tolist())
+    for col in (HARRIS_COL, TRUMP_COL):
+        votes = batch['votes'].get(col)
+        columns.append(votes.tolist() if votes is not None else [0] * num_rows)
+    precinct_aggregator.add_votes(*columns)
 
 
-def process_election_data_complex_headers(input_file, output_dir, counting_group_col='CountingGroup'):
+def process_election_data_complex_headers(input_file, output_dir, counting_group_col='CountingGroup', streaming=False, workers=1, contests=None,
+                                          checkpoint_every=CHECKPOINT_EVERY, resume=False, crosstab=None, crosstab_by='vote_type', vote_format='table',
+                                          classify=False):
     """
     Process election data CSV with complex multi-row header structure.
     
@@ -365,6 +1138,17 @@ def process_election_data_complex_headers(input_file, output_dir, counting_group
         input_file: Path to the large CSV file
         output_dir: Directory to save the processed JSON files
         counting_group_col: Column containing vote type information (early, mail, etc)
+        streaming: Aggregate chunk by chunk with bounded memory
+        workers: Number of worker processes for parsing
+        contests: Optional list of contest names to analyze (default: the
+            presidential and senate candidates)
+        checkpoint_every: Chunks between checkpoints of a streaming run (0 disables them)
+        resume: Continue a streaming run from its last checkpoint
+        crosstab: Optional list of contest names to cross-tabulate into crosstab.json
+        crosstab_by: Break the cross-tab out by 'vote_type' only, or also by 'tabulator' or 'precinct'
+        vote_format: Format of the per-vote-type ballot outputs, one of VOTE_FORMATS
+        classify: Also write the classify_precincts.py outputs for every vote type
+            from the same pass over the CSV (implies streaming)
     """
     try:
         # Create output directory if it doesn't exist
@@ -387,11 +1171,18 @@ def process_election_data_complex_headers(input_file, output_dir, counting_group
         # Create custom headers
         custom_headers, counting_group_col = create_custom_headers(first_rows, candidate_start_idx)
         
+        # Restrict processing to the chosen contests
+        all_contest_cols = find_contest_columns(first_rows, custom_headers, candidate_start_idx)
+        contest_cols = select_contests(all_contest_cols, contests) if contests else None
+        crosstab_contests = select_contests(all_contest_cols, crosstab) if crosstab else None
+        
         # Now process the CSV data with our custom headers
         print("\nProcessing election data...")
         
         # Process the CSV in chunks and generate output files
-        return process_csv_chunks(input_file, custom_headers, candidate_start_idx, counting_group_col, output_dir)
+        return process_csv_chunks(input_file, custom_headers, candidate_start_idx, counting_group_col, output_dir, streaming=streaming, workers=workers, contest_cols=contest_cols,
+                                  checkpoint_every=checkpoint_every, resume=resume, crosstab_contests=crosstab_contests,
+                                  crosstab_by=CROSSTAB_BY[crosstab_by], vote_format=vote_format, classify=classify)
         
     except Exception as e:
         print(f"Error processing election data: {e}")
@@ -399,70 +1190,67 @@ def process_election_data_complex_headers(input_file, output_dir, counting_group
         return None
 
 
-def generate_pres_senate_combo_summary(voting_data, trump_cols, harris_cols, rosen_cols, brown_cols, output_dir):
-    """Generate a summary of ballot combinations between presidential and senate candidates.
+def generate_crosstab_summaries(voting_data, plan, dictionaries, output_dir):
+    """
+    Cross-tabulate the collected ballots and save the results.
+    
+    Always writes the president–senate combination summary (trump/harris ×
+    rosen/brown/none); also writes crosstab.json when the plan has cross-tab contests.
+    
+    Args:
+        voting_data: Dict of encoded ballot batches by vote type
+        plan: Column plan from detect_columns
+        dictionaries: Value dictionaries of the categorical columns
+        output_dir: Directory to save the summary JSON files
+        
+    Returns:
+        The president–senate combination summary dictionary
+    """
+    combos = CrossTab(pres_senate_contests(plan['trump_cols'], plan['harris_cols'], plan['rosen_cols'], plan['brown_cols']))
+    crosstab = new_crosstab(plan)
+    
+    for vote_type, batches in voting_data.items():
+        for batch in batches:
+            combos.fold(vote_type, batch['metadata'], batch['votes'], batch['num_rows'])
+            if crosstab is not None:
+                crosstab.fold(vote_type, batch['metadata'], batch['votes'], batch['num_rows'])
+    
+    if crosstab is not None:
+        write_crosstab_summary(crosstab, dictionaries, output_dir)
+    return write_pres_senate_combo_summary(combo_summary(combos, VOTE_TYPES), output_dir)
 
-    The summary includes counts for:
-        - trump-rosen
-        - trump-brown
-        - trump-none
-        - harris-rosen
-        - harris-brown
-        - harris-none
 
+def write_crosstab_summary(crosstab, dictionaries, output_dir):
+    """
+    Save cross-tab results to crosstab.json.
+    
     Args:
-        voting_data: Dict of vote records by vote type.
-        trump_cols, harris_cols, rosen_cols, brown_cols: Lists of column names corresponding to each candidate.
-        output_dir: Directory to save the summary JSON file.
+        crosstab: Filled-in CrossTab
+        dictionaries: Value dictionaries of the categorical columns, used to name locations
+        output_dir: Directory to save the JSON file
+        
     Returns:
-        Dictionary mapping combination name to count.
-    """
-    combo_keys = [
-        "trump-rosen",
-        "trump-brown",
-        "trump-none",
-        "harris-rosen",
-        "harris-brown",
-        "harris-none",
-    ]
-
-    # Overall counts
-    combo_counts = {k: 0 for k in combo_keys}
-    # Per-vote-type counts
-    per_vote_type_counts = {vt: {k: 0 for k in combo_keys} for vt in voting_data.keys()}
-
-    has_vote = lambda record, cols: any(record.get(col, 0) == 1 for col in cols)
-
-    for vote_type, records in voting_data.items():
-        for record in records:
-            pres_choice = None
-            senate_choice = None
-
-            if has_vote(record, trump_cols):
-                pres_choice = "trump"
-            elif has_vote(record, harris_cols):
-                pres_choice = "harris"
-
-            if has_vote(record, rosen_cols):
-                senate_choice = "rosen"
-            elif has_vote(record, brown_cols):
-                senate_choice = "brown"
-            else:
-                senate_choice = "none"
-
-            if pres_choice:
-                key = f"{pres_choice}-{senate_choice}"
-                if key in combo_counts:
-                    combo_counts[key] += 1
-                    per_vote_type_counts[vote_type][key] += 1
-
-    # Build final structure including both views
-    summary_dict = {
-        **combo_counts,  # keep flat keys for backward compatibility
-        "by_vote_type": per_vote_type_counts,
-    }
+        The cross-tab summary dictionary
+    """
+    summary = crosstab.summary(VOTE_TYPES, dictionaries.get(crosstab.by))
+    crosstab_path = os.path.join(output_dir, "crosstab.json")
+    with open(crosstab_path, "w") as f:
+        json.dump(summary, f, indent=2)
+    print(f"Saved cross-tab of {list(summary['contests'])} to {crosstab_path}")
+    return summary
+
 
-    # Save summary to JSON
+def write_pres_senate_combo_summary(summary_dict, output_dir):
+    """
+    Save a president–senate combination summary to JSON.
+    
+    Args:
+        summary_dict: Flat combination counts plus a "by_vote_type" breakdown
+        output_dir: Directory to save the summary JSON file
+        
+    Returns:
+        The summary dictionary
+    """
     os.makedirs(output_dir, exist_ok=True)
     summary_path = os.path.join(output_dir, "pres_senate_combo_summary.json")
     with open(summary_path, "w") as f:
@@ -472,12 +1260,55 @@ def generate_pres_senate_combo_summary(voting_data, trump_cols, harris_cols, ros
     return summary_dict
 
 
-def generate_output_files(voting_data, president_cols, metadata_cols, total_rows, output_dir):
+def generate_output_files(voting_data, president_cols, metadata_cols, total_rows, output_dir, dictionaries, vote_format='table'):
     """
     Generate JSON output files from the processed voting data.
     
     Args:
-        voting_data: Dictionary of processed vote data by type
+        voting_data: Dictionary of encoded ballot batches by vote type
+        president_cols: List of presidential candidate columns
+        metadata_cols: List of metadata columns included
+        total_rows: Total number of rows processed
+        output_dir: Directory to save output files
+        dictionaries: Value dictionaries of the categorical metadata columns
+        vote_format: Format of the per-vote-type ballot outputs, one of VOTE_FORMATS
+    
+    Returns:
+        Summary information dictionary
+    """
+    vote_type_counts = {k: sum(batch['num_rows'] for batch in v) for k, v in voting_data.items()}
+    
+    # Count votes for each candidate by vote type
+    candidate_summary = {}
+    for vote_type, batches in voting_data.items():
+        if vote_type_counts[vote_type]:
+            candidate_summary[vote_type] = {}
+            for candidate_col in president_cols:
+                # Sum the 1/0 values we converted earlier
+                votes = sum(int(batch['votes'][candidate_col].sum()) for batch in batches if candidate_col in batch['votes'])
+                candidate_summary[vote_type][candidate_col] = votes
+    
+    summary = write_summary_files(candidate_summary, vote_type_counts, president_cols, metadata_cols, total_rows, output_dir)
+    
+    # Save the raw data by vote type (memory-mappable columnar tables by default)
+    for category, batches in voting_data.items():
+        if vote_type_counts[category]:  # Only save non-empty data
+            writer = open_vote_writer(output_dir, category, metadata_cols, president_cols, dictionaries, vote_format)
+            for batch in batches:
+                writer.append_encoded(batch['metadata'], batch['votes'], batch['num_rows'])
+            writer.close()
+            print(f"Saved {writer.num_rows} {category} votes to {writer.path}")
+    
+    return summary
+
+
+def write_summary_files(candidate_summary, vote_type_counts, president_cols, metadata_cols, total_rows, output_dir):
+    """
+    Write summary.json, plot_data.json and candidate_info.json.
+    
+    Args:
+        candidate_summary: Candidate vote totals by vote type (only vote types with ballots)
+        vote_type_counts: Number of ballots by vote type
         president_cols: List of presidential candidate columns
         metadata_cols: List of metadata columns included
         total_rows: Total number of rows processed
@@ -513,16 +1344,6 @@ def generate_output_files(voting_data, president_cols, metadata_cols, total_rows
                 display_name = f"{name_parts[1].strip()} {name_parts[0].strip()}"
         candidate_party[f"display_{col}"] = display_name
     
-    # Count votes for each candidate by vote type
-    candidate_summary = {}
-    for vote_type, records in voting_data.items():
-        if records:
-            candidate_summary[vote_type] = {}
-            for candidate_col in president_cols:
-                # Sum the 1/0 values we converted earlier
-                votes = sum(record.get(candidate_col, 0) for record in records)
-                candidate_summary[vote_type][candidate_col] = votes
-    
     # Create summary data suitable for Observable Plot
     plot_data = []
     for vote_type, candidates in candidate_summary.items():
@@ -540,7 +1361,7 @@ def generate_output_files(voting_data, president_cols, metadata_cols, total_rows
     # Create metadata about the processing
     summary = {
         "total_rows_processed": total_rows,
-        "vote_type_counts": {k: len(v) for k, v in voting_data.items()},
+        "vote_type_counts": vote_type_counts,
         "candidate_columns": president_cols,
         "candidate_vote_counts": candidate_summary,
         "metadata_columns": metadata_cols,
@@ -577,22 +1398,6 @@ def generate_output_files(voting_data, president_cols, metadata_cols, total_rows
         json.dump(candidate_party, f, cls=NpEncoder, indent=2)
     print("Saved candidate party information")
     
-    # Save the raw data by vote type
-    for category, data in voting_data.items():
-        if data:  # Only save non-empty data
-            # Clean the data to handle NaN values
-            clean_data = []
-            for record in data:
-                clean_record = {}
-                for k, v in record.items():
-                    # Convert NaN to None (null in JSON)
-                    clean_record[k] = None if pd.isna(v) else v
-                clean_data.append(clean_record)
-                
-            # with open(os.path.join(output_dir, f'{category}_votes.json'), 'w') as f:
-            #     json.dump(clean_data, f, cls=NpEncoder)
-            print(f"Saved {len(clean_data)} {category} votes to {category}_votes.json (not really)")
-    
     return summary
 
 
@@ -681,8 +1486,22 @@ def main():
     parser.add_argument('--counting-group-col', default='CountingGroup', help='Column name containing voting method information (early, mail, etc)')
     parser.add_argument('--extract-sample', action='store_true', help='Extract a small sample for testing')
     parser.add_argument('--sample-size', type=int, default=1000, help='Number of rows to extract for sample')
+    parser.add_argument('--streaming', action='store_true', help='Aggregate chunk by chunk instead of keeping every ballot in memory')
+    parser.add_argument('--workers', type=int, default=1, help='Number of processes parsing byte ranges of the CSV in parallel (implies --streaming)')
+    parser.add_argument('--contest', action='append', dest='contests', help='Contest to analyze (case-insensitive; partial names match every contest containing them); repeat for several contests. Default: president and senate')
+    
+    parser.add_argument('--checkpoint-every', type=int, default=CHECKPOINT_EVERY, help='Chunks between checkpoints of a streaming run, written to the output directory (0 disables checkpoints)')
+    parser.add_argument('--resume', action='store_true', help='Continue an interrupted run from its last checkpoint (implies --streaming)')
+    
+    parser.add_argument('--crosstab', action='append', help='Contest to cross-tabulate into crosstab.json (matched like --contest); repeat for each contest')
+    parser.add_argument('--crosstab-by', choices=list(CROSSTAB_BY), default='vote_type', help='Break the cross-tab out by vote type only, or also by tabulator or precinct')
+    
+    parser.add_argument('--vote-format', choices=list(VOTE_FORMATS), default='table', help='Format of the per-vote-type ballot files: columnar tables, or newline-delimited JSON (optionally gzip-compressed)')
+    parser.add_argument('--classify', action='store_true', help='Also classify precincts and tabulators in the same pass, writing the classify_precincts.py outputs (implies --streaming)')
     
     args = parser.parse_args()
+    if args.resume and args.workers > 1:
+        parser.error('--resume is only supported with a single worker')
     
     # Create absolute paths
     input_file = os.path.abspath(args.input_file)
@@ -702,7 +1521,16 @@ def main():
     else:
         # Process with our complex header function
         process_election_data_complex_headers(input_file, output_dir, 
-                                           counting_group_col=args.counting_group_col)
+                                           counting_group_col=args.counting_group_col,
+                                           streaming=args.streaming or args.resume or args.classify,
+                                           workers=args.workers,
+                                           contests=args.contests,
+                                           checkpoint_every=args.checkpoint_every,
+                                           resume=args.resume,
+                                           crosstab=args.crosstab,
+                                           crosstab_by=args.crosstab_by,
+                                           vote_format=args.vote_format,
+                                           classify=args.classify)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Test whether each tabulator's vote_history looks like a random ballot order.
+
+If the ballots of a tabulator arrive in random order, its vote_history (1 for
+Trump, 0 for Harris) is an exchangeable 0/1 sequence. Four things are
+computed for every tabulator:
+
+- Wald-Wolfowitz runs test: the number of runs (maximal blocks of equal votes)
+  against its expectation for the tabulator's Trump and Harris counts, with a
+  two-sided normal-approximation p-value.
+- Drift: the largest deviation, over the sequence, of the cumulative Trump
+  count from the count expected at the precinct-expected share, in standard
+  deviations of the final count. The precinct-expected share is the average of
+  the Trump shares of the tabulator's precincts (from *_precinct_stats.json),
+  weighted by its ballots from each; without precinct shares the vote type's
+  overall share is used. This is descriptive only: it mixes the order of the
+  ballots with how far the tabulator's own share is from its precincts'.
+- Bridge drift: the largest deviation of the cumulative Trump count from the
+  count expected at the tabulator's own final share, in the same units. It is
+  zero at both ends of the sequence, so it only measures the order of the
+  ballots.
+- Permutation p-values for the runs and the bridge drift: the sequence is
+  shuffled many times and the p-value is the share of shuffles at least as
+  extreme as the observed order. Shuffles keep the Trump count, which fixes the
+  end point of the precinct drift, so that is not tested by permutation.
+
+All tabulators are tested together. Tabulators are sorted by length and
+grouped, each group is padded into one 2D array, and permutations are drawn in
+batches as one 3D array whose random keys are argsorted along the last axis
+(padding gets the largest key so it stays at the end). Groups are independent
+tasks for a process pool. Each group's random stream is derived from the seed
+and the group number, so results do not depend on the number of workers.
+
+Output: <output-dir>/<vote type>_randomness_tests.json with one array per
+statistic, in the tabulator order of the scatter data.
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from packed_bits import unpack_scatter_data
+
+# Shuffles per tabulator for the permutation p-values
+PERMUTATIONS = 1000
+
+# Tabulators per task; they are sorted by length first, so little padding is needed
+TABULATORS_PER_TASK = 128
+
+# Most permutations drawn at once, and most ballot positions in one batch
+PERMUTATION_BATCH = 64
+MAX_BATCH_POSITIONS = 1 << 22
+
+DEFAULT_SEED = 1
+
+# Tolerance when comparing a shuffled statistic with the observed one
+TOLERANCE = 1e-9
+
+
+def normal_p_values(z: np.ndarray) -> np.ndarray:
+    """Two-sided p-values of standard normal z-scores."""
+    return np.array([math.erfc(abs(value) / math.sqrt(2)) for value in z], dtype=np.float64)
+
+
+def expected_shares(scatter: Dict[str, Any], precinct_trump_percentages: Optional[Dict[Any, float]] = None) -> np.ndarray:
+    """
+    Precinct-expected Trump share of each tabulator.
+
+    Args:
+        scatter: Scatter data
+        precinct_trump_percentages: Trump percentage of each precinct (keys are
+            compared as strings), e.g. from *_precinct_stats.json
+
+    Returns:
+        Share (0-1) of each item of "data"; the vote type's overall share where
+        none of the tabulator's precincts has a known share
+    """
+    items = scatter["data"]
+    total_votes = sum(item["total_votes"] for item in items)
+    overall = sum(item["trump_votes"] for item in items) / total_votes if total_votes else 0.0
+    shares = {str(precinct): percentage / 100 for precinct, percentage in (precinct_trump_percentages or {}).items()}
+
+    expected = np.full(len(items), overall, dtype=np.float64)
+    for i, item in enumerate(items):
+        known = [(count, shares[str(precinct)]) for precinct, count in item.get("precincts", {}).items()
+                 if str(precinct) in shares]
+        ballots = sum(count for count, _ in known)
+        if ballots:
+            expected[i] = sum(count * share for count, share in known) / ballots
+    return expected
+
+
+def pad_sequences(sequences: List[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pad sequences into one array.
+
+    Args:
+        sequences: 0/1 sequences
+
+    Returns:
+        Tuple of ((count, longest) int8 array padded with zeros, matching mask of the real entries)
+    """
+    lengths = np.array([len(sequence) for sequence in sequences], dtype=np.int64)
+    width = max(1, int(lengths.max(initial=0)))
+    valid = np.arange(width) < lengths[:, None]
+    values = np.zeros(valid.shape, dtype=np.int8)
+    values[valid] = np.concatenate(sequences) if sequences else []
+    return values, valid
+
+
+def expected_counts(valid: np.ndarray, expected: np.ndarray, trump_votes: np.ndarray) -> np.ndarray:
+    """
+    Trump count expected after each ballot, at the expected share.
+
+    Padding gets the final Trump count, which a shuffle does not change, so the
+    deviation of the cumulative count there is zero without masking.
+
+    Args:
+        valid: (tabulators, positions) mask of the real entries
+        expected: Expected share of each tabulator
+        trump_votes: Trump votes of each tabulator
+
+    Returns:
+        (tabulators, positions) array of expected counts
+    """
+    positions = np.arange(1, valid.shape[1] + 1)
+    return np.where(valid, positions * expected[:, None], trump_votes[:, None].astype(np.float64))
+
+
+def sequence_statistics(values: np.ndarray, valid: np.ndarray, counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Runs and drift of padded sequences.
+
+    Args:
+        values: (..., tabulators, positions) 0/1 array, zero where not valid
+        valid: (tabulators, positions) mask of the real entries; these come first in each row
+        counts: Expected counts from expected_counts
+
+    Returns:
+        Tuple of (number of runs, |cumulative Trump count - expected count| at each
+        position), of shapes (..., tabulators) and (..., tabulators, positions)
+    """
+    changes = values[..., 1:] != values[..., :-1]
+    changes &= valid[:, 1:]
+    runs = changes.sum(axis=-1) + valid[:, 0]
+
+    deviation = np.cumsum(values, axis=-1, dtype=np.float64)
+    deviation -= counts
+    return runs, np.abs(deviation, out=deviation)
+
+
+def test_sequences(task: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    Run the tests on one group of tabulators; run in a worker process.
+
+    Args:
+        task: Dictionary with the group's "sequences", "expected" shares,
+            "permutations", "seed" and "group" number
+
+    Returns:
+        Dictionary of statistic name to one value per tabulator of the group
+    """
+    values, valid = pad_sequences(task["sequences"])
+    expected = task["expected"]
+    lengths = valid.sum(axis=1)
+    trump_votes = values.sum(axis=1, dtype=np.int64)
+    harris_votes = lengths - trump_votes
+
+    counts = expected_counts(valid, expected, trump_votes)
+    runs, deviation = sequence_statistics(values, valid, counts)
+    drift_position = deviation.argmax(axis=-1)
+    drift = deviation.max(axis=-1)
+
+    # Deviation from the tabulator's own share, which no shuffle changes at the end points
+    own_share = np.divide(trump_votes, lengths, out=np.zeros(len(lengths)), where=lengths > 0)
+    bridge_counts = expected_counts(valid, own_share, trump_votes)
+    _, bridge_deviation = sequence_statistics(values, valid, bridge_counts)
+    bridge_position = bridge_deviation.argmax(axis=-1)
+    bridge = bridge_deviation.max(axis=-1)
+
+    # Runs expected in a random order, and their variance
+    product = 2.0 * trump_votes * harris_votes
+    expected_runs = np.divide(product, lengths, out=np.zeros(len(lengths)), where=lengths > 0) + (lengths > 0)
+    runs_variance = np.divide(product * (product - lengths), lengths ** 2 * (lengths - 1.0),
+                              out=np.zeros(len(lengths)), where=lengths > 1)
+    runs_distance = np.abs(runs - expected_runs)
+
+    # Random keys sort the real entries of each row into a uniform order; padding keys sort last
+    rng = np.random.default_rng([task["seed"], task["group"]])
+    batch = int(max(1, min(PERMUTATION_BATCH, MAX_BATCH_POSITIONS // values.size)))
+    runs_extreme = np.zeros(len(lengths), dtype=np.int64)
+    bridge_extreme = np.zeros(len(lengths), dtype=np.int64)
+    remaining = task["permutations"]
+    while remaining > 0:
+        count = min(batch, remaining)
+        keys = rng.random((count,) + values.shape, dtype=np.float32)
+        keys[:, ~valid] = 2
+        shuffled = np.take_along_axis(np.broadcast_to(values, keys.shape), np.argsort(keys, axis=-1), axis=-1)
+        shuffled_runs, shuffled_deviation = sequence_statistics(shuffled, valid, bridge_counts)
+        runs_extreme += (np.abs(shuffled_runs - expected_runs) >= runs_distance - TOLERANCE).sum(axis=0)
+        bridge_extreme += (shuffled_deviation.max(axis=-1) >= bridge - TOLERANCE).sum(axis=0)
+        remaining -= count
+
+    runs_z = np.divide(runs - expected_runs, np.sqrt(runs_variance), out=np.zeros(len(lengths)), where=runs_variance > 0)
+    final_deviation = np.sqrt(lengths * expected * (1 - expected))
+    own_deviation = np.sqrt(lengths * own_share * (1 - own_share))
+    return {
+        "runs": runs,
+        "expected_runs": expected_runs,
+        "runs_z": runs_z,
+        "runs_p": normal_p_values(runs_z),
+        "runs_permutation_p": (runs_extreme + 1) / (task["permutations"] + 1),
+        "drift": np.divide(drift, final_deviation, out=np.zeros(len(lengths)), where=final_deviation > 0),
+        "drift_position": drift_position + 1,
+        "bridge_drift": np.divide(bridge, own_deviation, out=np.zeros(len(lengths)), where=own_deviation > 0),
+        "bridge_drift_position": bridge_position + 1,
+        "bridge_drift_permutation_p": (bridge_extreme + 1) / (task["permutations"] + 1),
+    }
+
+
+def run_randomness_tests(scatter: Dict[str, Any], precinct_trump_percentages: Optional[Dict[Any, float]] = None,
+                         permutations: int = PERMUTATIONS, seed: int = DEFAULT_SEED,
+                         workers: int = 1) -> Dict[str, Any]:
+    """
+    Test every tabulator of scatter data.
+
+    Args:
+        scatter: Scatter data, packed or with vote_history lists per item of
+            "data" (e.g. from election_simulation.to_scatter_data)
+        precinct_trump_percentages: Trump percentage of each precinct, for the expected shares
+        permutations: Shuffles per tabulator
+        seed: Random seed of the shuffles
+        workers: Number of worker processes
+
+    Returns:
+        Test results in the *_randomness_tests.json layout
+    """
+    scatter = unpack_scatter_data(scatter)
+    items = scatter["data"]
+    sequences = [np.asarray(item["vote_history"], dtype=np.int8) for item in items]
+    expected = expected_shares(scatter, precinct_trump_percentages)
+
+    order = np.argsort([len(sequence) for sequence in sequences], kind="stable")
+    groups = [order[start:start + TABULATORS_PER_TASK] for start in range(0, len(order), TABULATORS_PER_TASK)]
+    tasks = [{
+        "sequences": [sequences[i] for i in group],
+        "expected": expected[group],
+        "permutations": permutations,
+        "seed": seed,
+        "group": number,
+    } for number, group in enumerate(groups)]
+
+    print(f"Testing {len(items)} tabulators with {permutations} permutations in {len(tasks)} groups...")
+    if workers > 1 and len(tasks) > 1:
+        with multiprocessing.Pool(workers) as pool:
+            results = list(pool.imap(test_sequences, tasks))
+    else:
+        results = [test_sequences(task) for task in tasks]
+
+    # Back to the tabulator order of the scatter data
+    columns = {}
+    for name in results[0] if results else []:
+        column = np.zeros(len(items), dtype=results[0][name].dtype)
+        for group, result in zip(groups, results):
+            column[group] = result[name]
+        columns[name] = column
+
+    return {
+        "vote_type": scatter.get("vote_type"),
+        "permutations": permutations,
+        "seed": seed,
+        "tabulators": [item["tabulator"] for item in items],
+        "total_votes": [len(sequence) for sequence in sequences],
+        "trump_votes": [int(sequence.sum()) for sequence in sequences],
+        "expected_share": expected.tolist(),
+        **{name: column.tolist() for name, column in columns.items()},
+    }
+
+
+def summarize(results: Dict[str, Any], alpha: float = 0.05) -> Dict[str, Any]:
+    """
+    Count the tabulators whose tests are significant.
+
+    Under random ordering about alpha of the tabulators are expected to be
+    significant in each test.
+
+    Args:
+        results: Output of run_randomness_tests
+        alpha: Significance level
+
+    Returns:
+        Dictionary with the number of tabulators and the number significant per p-value
+    """
+    tests = ["runs_p", "runs_permutation_p", "bridge_drift_permutation_p"]
+    return {
+        "tabulators": len(results["tabulators"]),
+        "alpha": alpha,
+        "significant": {test: int((np.asarray(results.get(test, [])) < alpha).sum()) for test in tests},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Test whether each tabulator\'s vote_history looks like a random ballot order')
+    parser.add_argument('scatter_file', help='Scatter data file, e.g. early_votes_scatter_data.json')
+    parser.add_argument('--precinct-stats', help='Precinct statistics file (default: the *_precinct_stats.json next to the scatter file)')
+    parser.add_argument('--permutations', type=int, default=PERMUTATIONS, help='Shuffles per tabulator')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='Random seed')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes (default: one per CPU)')
+    parser.add_argument('--output-dir', help='Directory to save the results (default: that of the scatter file)')
+
+    args = parser.parse_args()
+
+    with open(args.scatter_file) as f:
+        scatter = json.load(f)
+
+    stats_file = args.precinct_stats or args.scatter_file.replace('_scatter_data.json', '_precinct_stats.json')
+    precinct_trump_percentages = None
+    if os.path.exists(stats_file) and stats_file != args.scatter_file:
+        with open(stats_file) as f:
+            precinct_trump_percentages = json.load(f)["precinct_trump_percentages"]
+        print(f"Using precinct shares from {stats_file}")
+    else:
+        print("No precinct statistics found; using the overall Trump share as the expected share")
+
+    start = time.perf_counter()
+    results = run_randomness_tests(scatter, precinct_trump_percentages, args.permutations, args.seed, args.workers)
+    results["summary"] = summarize(results)
+    print(f"Finished in {time.perf_counter() - start:.1f}s")
+
+    summary = results["summary"]
+    print(f"\nTabulators significant at p < {summary['alpha']} (about {summary['alpha'] * summary['tabulators']:.0f} expected by chance):")
+    for test, count in summary["significant"].items():
+        print(f"  {test}: {count}")
+
+    output_base = os.path.basename(args.scatter_file).replace('_scatter_data.json', '').split('.')[0]
+    output_dir = args.output_dir or os.path.dirname(args.scatter_file) or '.'
+    os.makedirs(output_dir, exist_ok=True)
+    output_file = os.path.join(output_dir, f"{output_base}_randomness_tests.json")
+    with open(output_file, 'w') as f:
+        json.dump(results, f, separators=(',', ':'))
+    print(f"\nSaved randomness tests to {output_file}")
+
+if __name__ == "__main__":
+    main()
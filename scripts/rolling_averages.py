@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Precompute the rolling-average series drawn by src/rolling_average.js.
+
+The rolling-average plot shows, for each tabulator, the share of Trump votes
+among the last `window` ballots at every point of its vote_history, colored
+by the cumulative share of urban ballots. Computing these in the browser
+means a pass over every ballot of every tabulator each time the window slider
+moves, so the series are computed here for a set of window sizes instead.
+
+The vote_history and urban_voter sequences of all tabulators are concatenated
+and each is summed once; a window count is then the difference of two
+cumulative sums, taken for every tabulator and position in one vectorized
+gather. Only the points the plot draws are kept: like the page, each line is
+thinned to about MAX_POINTS_PER_LINE evenly spaced points, always including
+the first and last.
+
+The output (*_rolling_averages.json) lists the tabulators once and, per window
+size, base64-encoded little-endian arrays of the kept points:
+vote_index (1-based ballot position), window_trump_votes and
+cumulative_urban_votes, plus each tabulator's offset into them. The counts
+are stored as 16-bit integers unless some tabulator has too many ballots, and
+the file records the type of each array.
+"""
+
+import base64
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Window sizes precomputed by default; the page computes any other size itself
+WINDOW_SIZES = [5, 10, 20, 30, 40, 50]
+
+# Points kept per line, matching the sampling of createRollingAveragePlot
+MAX_POINTS_PER_LINE = 100
+
+# Window sizes up to this keep window_trump_votes within a byte
+MAX_WINDOW_SIZE = 255
+
+
+def sample_points(count: int, max_points: int = MAX_POINTS_PER_LINE) -> np.ndarray:
+    """
+    Pick the points of a line that the plot draws.
+
+    Args:
+        count: Number of points on the line
+        max_points: Lines with more points than this are thinned
+
+    Returns:
+        Sorted indices of the kept points
+    """
+    if count <= max_points:
+        return np.arange(count)
+    step = count // max_points
+    return np.concatenate(([0], np.arange(step, count - step, step), [count - 1]))
+
+
+def count_dtype(max_count: int) -> np.dtype:
+    """Smallest little-endian unsigned type of at least 16 bits that holds max_count."""
+    return np.dtype("<u2") if max_count <= np.iinfo(np.uint16).max else np.dtype("<u4")
+
+
+def encode_array(values: np.ndarray, dtype: np.dtype) -> str:
+    """Encode an integer array as base64 of the given fixed-width type."""
+    return base64.b64encode(values.astype(dtype).tobytes()).decode("ascii")
+
+
+def compute_rolling_averages(scatter: Dict[str, Any], window_sizes: Optional[Sequence[int]] = None,
+                             max_points: int = MAX_POINTS_PER_LINE) -> Dict[str, Any]:
+    """
+    Compute the thinned rolling-average series of every tabulator.
+
+    Args:
+        scatter: Scatter data with vote_history and urban_voter lists per item of "data"
+        window_sizes: Window sizes to compute (default: WINDOW_SIZES)
+        max_points: Points kept per line
+
+    Returns:
+        Rolling-average dictionary in the *_rolling_averages.json layout
+
+    Raises:
+        ValueError: If a window size is not between 1 and MAX_WINDOW_SIZE
+    """
+    window_sizes = sorted(set(WINDOW_SIZES if window_sizes is None else window_sizes))
+    for window in window_sizes:
+        if not 1 <= window <= MAX_WINDOW_SIZE:
+            raise ValueError(f"Window size {window} is not between 1 and {MAX_WINDOW_SIZE}")
+
+    items = scatter["data"]
+    lengths = np.array([len(item["vote_history"]) for item in items], dtype=np.int64)
+    starts = np.concatenate(([0], np.cumsum(lengths)))
+    # Ballot positions and counts are at most the longest tabulator's length
+    position_dtype = count_dtype(int(lengths.max(initial=0)))
+    dtypes = {"vote_index": position_dtype, "window_trump_votes": np.dtype("u1"), "cumulative_urban_votes": position_dtype}
+
+    # One cumulative sum over all tabulators; entry g counts ballots before global position g
+    trump_sums = np.zeros(starts[-1] + 1, dtype=np.int64)
+    urban_sums = np.zeros(starts[-1] + 1, dtype=np.int64)
+    if items:
+        np.cumsum(np.concatenate([np.asarray(item["vote_history"], dtype=np.int64) for item in items]),
+                  out=trump_sums[1:])
+        np.cumsum(np.concatenate([np.asarray(item["urban_voter"], dtype=np.int64) for item in items]),
+                  out=urban_sums[1:])
+
+    windows = {}
+    for window in window_sizes:
+        # Positions (0-based within each tabulator) of the points drawn; a tabulator
+        # shorter than the window has none, so no window crosses into its neighbour
+        samples = [window - 1 + sample_points(max(0, int(length) - window + 1), max_points) for length in lengths]
+        counts = np.array([len(sample) for sample in samples], dtype=np.int64)
+        positions = np.concatenate(samples) if samples else np.zeros(0, dtype=np.int64)
+        line_starts = np.repeat(starts[:-1], counts)
+        ends = line_starts + positions + 1
+
+        points = {
+            "vote_index": positions + 1,
+            "window_trump_votes": trump_sums[ends] - trump_sums[ends - window],
+            "cumulative_urban_votes": urban_sums[ends] - urban_sums[line_starts],
+        }
+        windows[str(window)] = {
+            "offsets": np.concatenate(([0], np.cumsum(counts))).tolist(),
+            **{field: encode_array(values, dtypes[field]) for field, values in points.items()},
+        }
+
+    return {
+        "vote_type": scatter.get("vote_type"),
+        "max_points_per_line": max_points,
+        "dtypes": {field: dtype.name for field, dtype in dtypes.items()},
+        "tabulators": [item["tabulator"] for item in items],
+        "sequence_lengths": lengths.tolist(),
+        "is_urban": [item["is_urban"] for item in items],
+        "urban_percentage": [item["urban_percentage"] for item in items],
+        "window_sizes": window_sizes,
+        "windows": windows,
+    }
+
+
+def write_rolling_averages(scatter: Dict[str, Any], output_dir: str, output_base: str,
+                           window_sizes: Optional[Sequence[int]] = None) -> str:
+    """
+    Write the rolling-average series of scatter data.
+
+    Args:
+        scatter: Scatter data with vote_history and urban_voter lists per item of "data"
+        output_dir: Directory to save the file
+        output_base: Prefix of the file name, e.g. "early_votes"
+        window_sizes: Window sizes to compute (default: WINDOW_SIZES)
+
+    Returns:
+        Path of the written file
+    """
+    rolling = compute_rolling_averages(scatter, window_sizes)
+    rolling_file = os.path.join(output_dir, f"{output_base}_rolling_averages.json")
+    with open(rolling_file, 'w') as f:
+        json.dump(rolling, f, separators=(',', ':'))
+    return rolling_file
+
+
+def parse_window_sizes(text: str) -> List[int]:
+    """
+    Parse a comma-separated list of window sizes, e.g. "5,10,30".
+
+    Args:
+        text: Window sizes separated by commas
+
+    Returns:
+        List of window sizes
+
+    Raises:
+        ValueError: If an entry is not an integer
+    """
+    return [int(size) for size in text.split(",") if size.strip()]
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Split scatter data into a small per-tabulator index and lazily loaded shards.
+
+Most charts only need each tabulator's summary fields (totals, percentages,
+urban flag), while a few also need its per-ballot sequences. The index file
+(*_scatter_index.json) holds just the summary fields plus the number of the
+shard that holds each tabulator's sequences. The shards
+(*_scatter_shards/shard_NNNNN.json) hold the precinct tallies and the
+bit-packed vote_history/urban_voter sequences (see packed_bits.py) of a run of
+tabulators, so a page downloads the index up front and fetches shards only
+when it needs sequences. src/scatter_data.js reads both.
+"""
+
+import glob
+import json
+import os
+from typing import Any, Dict, List, Tuple
+
+from packed_bits import PACKED_FIELDS, pack_scatter_data
+
+# Per-tabulator fields written to the index
+SUMMARY_FIELDS = ["tabulator", "total_votes", "trump_votes", "trump_percentage", "is_urban", "urban_percentage"]
+
+# Per-tabulator fields written to the shards, besides the packed sequences
+SHARD_FIELDS = ["tabulator", "precincts"]
+
+# Ballots per shard before a new one is started (about 64 KB of base64 per shard)
+SHARD_VOTES = 1 << 18
+
+
+def split_scatter_data(scatter: Dict[str, Any], shard_dir_name: str,
+                       shard_votes: int = SHARD_VOTES) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Split scatter data into an index and shards of consecutive tabulators.
+
+    Args:
+        scatter: Scatter data with vote_history and urban_voter lists per item of "data"
+        shard_dir_name: Directory of the shard files, relative to the index file
+        shard_votes: Ballots per shard before a new one is started
+
+    Returns:
+        Tuple of (index dictionary, list of packed shard dictionaries)
+    """
+    groups = []
+    votes = shard_votes
+    for item in scatter["data"]:
+        # A tabulator is never split, so a shard can exceed shard_votes by one tabulator
+        if votes >= shard_votes:
+            groups.append([])
+            votes = 0
+        groups[-1].append(item)
+        votes += len(item[PACKED_FIELDS[0]])
+
+    index_items = []
+    shards = []
+    for shard_num, group in enumerate(groups):
+        for item in group:
+            index_item = {field: item[field] for field in SUMMARY_FIELDS}
+            index_item["shard"] = shard_num
+            index_items.append(index_item)
+        shard_items = [{field: item[field] for field in SHARD_FIELDS + PACKED_FIELDS} for item in group]
+        shards.append(pack_scatter_data({"data": shard_items}))
+
+    index = {key: value for key, value in scatter.items() if key != "data"}
+    index["data"] = index_items
+    index["shards"] = [f"{shard_dir_name}/shard_{shard_num:05d}.json" for shard_num in range(len(shards))]
+    return index, shards
+
+
+def write_scatter_shards(scatter: Dict[str, Any], output_dir: str, output_base: str) -> str:
+    """
+    Write the index and shard files of scatter data.
+
+    Args:
+        scatter: Scatter data with vote_history and urban_voter lists per item of "data"
+        output_dir: Directory to save the files
+        output_base: Prefix of the file names, e.g. "early_votes"
+
+    Returns:
+        Path of the index file
+    """
+    shard_dir_name = f"{output_base}_scatter_shards"
+    index, shards = split_scatter_data(scatter, shard_dir_name)
+
+    shard_dir = os.path.join(output_dir, shard_dir_name)
+    os.makedirs(shard_dir, exist_ok=True)
+    # Shards of an earlier run with more tabulators would otherwise linger
+    for stale in glob.glob(os.path.join(shard_dir, "shard_*.json")):
+        os.remove(stale)
+    for path, shard in zip(index["shards"], shards):
+        with open(os.path.join(output_dir, path), 'w') as f:
+            json.dump(shard, f, separators=(',', ':'))
+
+    index_file = os.path.join(output_dir, f"{output_base}_scatter_index.json")
+    with open(index_file, 'w') as f:
+        json.dump(index, f, indent=2)
+    return index_file
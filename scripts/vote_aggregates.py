@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Running aggregates over processed CVR ballots.
+
+Chunks of ballots are folded into a VoteAggregator as soon as they are parsed,
+so summary statistics can be produced without keeping every ballot in memory.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from crosstab import CrossTab, combo_summary, pres_senate_contests
+
+VOTE_TYPES = ['early', 'mail', 'election_day', 'other']
+
+# Metadata columns that get per-location ballot counters
+LOCATION_COLUMNS = {
+    'by_tabulator': 'TabulatorNum',
+    'by_precinct': 'PrecinctPortion',
+}
+
+
+class VoteAggregator:
+    """
+    Running totals for the summary outputs of process_election_data.py.
+
+    Tracks, per vote type: ballot counts, candidate vote totals, president–senate
+    combination counts, and ballot/vote counters per tabulator and per precinct.
+    Locations are dictionary codes, so the counters are dense integer arrays that
+    grow with the number of distinct tabulators and precincts, not with the
+    number of ballots.
+    """
+
+    def __init__(self, candidate_cols: List[str], trump_cols: List[str], harris_cols: List[str], rosen_cols: List[str], brown_cols: List[str],
+                 crosstab: Optional[CrossTab] = None, precincts: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            candidate_cols: Candidate columns to total
+            trump_cols, harris_cols, rosen_cols, brown_cols: Candidate columns used for combination counts
+            crosstab: Optional empty CrossTab of further contests to fill in
+            precincts: Optional empty classify_precincts.PrecinctAggregator per vote
+                type, filled in by the caller and merged along with the totals
+        """
+        self.candidate_cols = list(candidate_cols)
+        self.trump_cols = list(trump_cols)
+        self.harris_cols = list(harris_cols)
+        self.rosen_cols = list(rosen_cols)
+        self.brown_cols = list(brown_cols)
+
+        self.total_rows = 0
+        self.vote_type_counts = {vt: 0 for vt in VOTE_TYPES}
+        self.candidate_votes = {vt: {col: 0 for col in self.candidate_cols} for vt in VOTE_TYPES}
+        self.combos = CrossTab(pres_senate_contests(self.trump_cols, self.harris_cols, self.rosen_cols, self.brown_cols))
+        self.crosstab = crosstab
+        self.precincts = precincts
+        # Per location code: [ballots, votes for each candidate column]
+        self.location_counts = {
+            name: {vt: np.zeros((0, 1 + len(self.candidate_cols)), dtype=np.int64) for vt in VOTE_TYPES}
+            for name in LOCATION_COLUMNS
+        }
+
+    def add_rows(self, num_rows: int) -> None:
+        """Record rows read from the input, whether or not they were categorized."""
+        self.total_rows += num_rows
+
+    def fold(self, vote_type: str, metadata: Dict[str, np.ndarray], votes: Dict[str, np.ndarray]) -> None:
+        """
+        Fold a batch of ballots of one vote type into the running totals.
+
+        Args:
+            vote_type: One of VOTE_TYPES
+            metadata: Mapping of metadata column to its values; the location
+                columns (TabulatorNum, PrecinctPortion) must be int32 dictionary codes
+            votes: Mapping of candidate column to 0/1 int8 vote array
+        """
+        columns = list(metadata.values()) + list(votes.values())
+        num_rows = len(columns[0]) if columns else 0
+        if num_rows == 0:
+            return
+
+        self.vote_type_counts[vote_type] += num_rows
+
+        for col in self.candidate_cols:
+            if col in votes:
+                self.candidate_votes[vote_type][col] += int(np.sum(votes[col], dtype=np.int64))
+
+        self.combos.fold(vote_type, metadata, votes, num_rows)
+        if self.crosstab is not None:
+            self.crosstab.fold(vote_type, metadata, votes, num_rows)
+
+        for name, col in LOCATION_COLUMNS.items():
+            if col in metadata:
+                self._fold_locations(name, vote_type, np.asarray(metadata[col]), votes)
+
+    def _grow(self, name: str, vote_type: str, size: int) -> np.ndarray:
+        """Make sure a location counter array has at least size rows."""
+        counts = self.location_counts[name][vote_type]
+        if len(counts) < size:
+            grown = np.zeros((size, counts.shape[1]), dtype=np.int64)
+            grown[:len(counts)] = counts
+            self.location_counts[name][vote_type] = counts = grown
+        return counts
+
+    def _fold_locations(self, name: str, vote_type: str, codes: np.ndarray, votes: Dict[str, np.ndarray]) -> None:
+        """Add per-location ballot and vote counts for a batch of location codes."""
+        present = codes >= 0
+        codes = codes[present]
+        if len(codes) == 0:
+            return
+        size = int(codes.max()) + 1
+        counts = self._grow(name, vote_type, size)
+
+        counts[:size, 0] += np.bincount(codes, minlength=size)
+        for i, col in enumerate(self.candidate_cols, start=1):
+            if col in votes:
+                counts[:size, i] += np.bincount(codes, weights=votes[col][present], minlength=size).astype(np.int64)
+
+    def merge(self, other: "VoteAggregator", code_mappings: Optional[Dict[str, np.ndarray]] = None) -> None:
+        """
+        Add another aggregator's totals into this one.
+
+        Args:
+            other: Aggregator built over another part of the input
+            code_mappings: Per location column, array mapping the other
+                aggregator's dictionary codes onto this one's (identity if omitted)
+        """
+        code_mappings = code_mappings or {}
+        self.total_rows += other.total_rows
+        for vt in VOTE_TYPES:
+            self.vote_type_counts[vt] += other.vote_type_counts[vt]
+            for col, votes in other.candidate_votes[vt].items():
+                self.candidate_votes[vt][col] = self.candidate_votes[vt].get(col, 0) + votes
+
+        self.combos.merge(other.combos)
+        if self.crosstab is not None:
+            self.crosstab.merge(other.crosstab, code_mappings.get(self.crosstab.by))
+        if self.precincts is not None:
+            # Precinct aggregates hold decoded values, and other covers later ballots
+            for vt, theirs in other.precincts.items():
+                self.precincts[vt].merge(theirs)
+
+        for name, col in LOCATION_COLUMNS.items():
+            for vt, theirs in other.location_counts[name].items():
+                if len(theirs) == 0:
+                    continue
+                codes = np.arange(len(theirs))
+                if col in code_mappings:
+                    codes = code_mappings[col][codes]
+                counts = self._grow(name, vt, int(codes.max()) + 1)
+                np.add.at(counts, codes, theirs)
+
+    def candidate_summary(self) -> Dict[str, Dict[str, int]]:
+        """Candidate vote totals for each vote type that had at least one ballot."""
+        return {vt: dict(self.candidate_votes[vt]) for vt in VOTE_TYPES if self.vote_type_counts[vt]}
+
+    def combo_summary(self) -> Dict[str, Any]:
+        """President–senate combination counts, overall and by vote type."""
+        return combo_summary(self.combos, VOTE_TYPES)
+
+    def location_summary(self, dictionaries: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Per-tabulator and per-precinct counters, by vote type, in dictionary code order.
+
+        Args:
+            dictionaries: CategoryDictionary per location column, used to decode codes
+
+        Returns:
+            Dictionary of {by_tabulator|by_precinct: {vote_type: {location: counters}}}
+        """
+        fields = ['ballots'] + self.candidate_cols
+        summary = {}
+        for name, col in LOCATION_COLUMNS.items():
+            summary[name] = {}
+            for vt, counts in self.location_counts[name].items():
+                seen = np.flatnonzero(counts[:, 0])
+                if len(seen) == 0:
+                    continue
+                locations = dictionaries[col].decode(seen)
+                summary[name][vt] = {
+                    location: dict(zip(fields, row))
+                    for location, row in zip(locations.tolist(), counts[seen].tolist())
+                }
+        return summary
@@ -47,6 +47,16 @@ function processCoinGamesData(games, maxFlips) {
     const plotData = [];
     
     games.forEach(game => {
+        // Precomputed games already hold their running percentages
+        if (game.points) {
+            game.points.forEach(point => {
+                if (point.flipNumber <= maxFlips) {
+                    plotData.push({ gameId: game.gameId, ...point });
+                }
+            });
+            return;
+        }
+        
         let headsCount = 0;
         
         // Process only up to maxFlips or the length of the flip array, whichever is smaller
@@ -118,7 +128,7 @@ export function createCoinGamesPlot(containerId, games, options = {}) {
         height: window.innerWidth < 768 ? 400 : 500,
         marginBottom: 50,
         marginLeft: 60,
-        title: `${title} (${plotData.length} data points, ${TOTAL_GAMES} games)`,
+        title: `${title} (${plotData.length} data points, ${games.length} games)`,
         color: {
             type: "categorical",
             domain: Array.from({ length: TOTAL_GAMES }, (_, i) => i + 1),
@@ -191,6 +201,22 @@ export function pregenerateCoinGames(headsProbability = 0.5) {
     return generateCoinGames(TOTAL_GAMES, MAX_FLIPS, headsProbability);
 }
 
+/**
+ * Turn a precomputed experiment (see src/convergence.js) into coin games
+ * @param {Object} experiment - Output of pickExperiment for the coin_games experiment set
+ * @returns {Array} - Games with running heads percentages at the precomputed flip numbers
+ */
+export function coinGamesFromExperiment(experiment) {
+    return experiment.simulations.map((simulation, i) => ({
+        gameId: i + 1,
+        points: simulation.map(point => ({
+            flipNumber: point.trials,
+            headsCount: Math.round(point.percentage * point.trials / 100),
+            headsPercentage: point.percentage
+        }))
+    }));
+}
+
 /**
  * Update the coin games plot with new options
  * @param {string} containerId - ID of the container element
@@ -0,0 +1,98 @@
+/**
+ * convergence.js - Precomputed convergence experiments (scripts/convergence_experiments.py)
+ * Each experiment set holds, for every probability on a page's slider, several experiments
+ * of a few simulations; each simulation is its running share of heads (or Trump votes)
+ * at a shared set of positions, so pages plot them without simulating in the browser
+ */
+import * as Plot from "https://cdn.jsdelivr.net/npm/@observablehq/plot@0.6/+esm";
+
+// One pending or finished load per URL
+const experimentCache = new Map();
+
+/**
+ * Fetch an experiment set once
+ * @param {string} url - URL of an experiment set, e.g. data/processed_data/convergence/coin_games.json
+ * @returns {Promise<Object>} - Parsed experiment set
+ */
+export function loadConvergenceExperiments(url) {
+    if (!experimentCache.has(url)) {
+        const pending = fetch(url)
+            .then(response => response.json())
+            .catch(error => {
+                experimentCache.delete(url);
+                throw error;
+            });
+        experimentCache.set(url, pending);
+    }
+    return experimentCache.get(url);
+}
+
+// Largest difference between a requested probability and the stored one it uses
+const PROBABILITY_TOLERANCE = 0.005;
+
+/**
+ * Pick one experiment of the requested probability
+ * @param {Object} experimentSet - Loaded experiment set
+ * @param {number} probability - Requested probability (0-1)
+ * @param {number} [experimentIndex] - Experiment to use (default: a random one)
+ * @returns {Object|null} - { probability, simulations }, where each simulation is an array of
+ *     { trials, percentage } points; null if the set has no experiments for the probability
+ */
+export function pickExperiment(experimentSet, probability, experimentIndex = null) {
+    let closest = experimentSet.probabilities[0];
+    experimentSet.probabilities.forEach(key => {
+        if (Math.abs(+key - probability) < Math.abs(+closest - probability)) {
+            closest = key;
+        }
+    });
+    if (Math.abs(+closest - probability) > PROBABILITY_TOLERANCE) {
+        return null;
+    }
+
+    const experiments = experimentSet.experiments[closest];
+    const index = experimentIndex === null ? Math.floor(Math.random() * experiments.length) : experimentIndex % experiments.length;
+    const scale = experimentSet.scale / 100;
+    const simulations = experiments[index].simulations.map(shares =>
+        shares.map((share, i) => ({ trials: experimentSet.positions[i], percentage: share / scale }))
+    );
+    return { probability: +closest, simulations };
+}
+
+/**
+ * Plot the simulations of one experiment as converging lines
+ * @param {string} containerId - ID of the container element
+ * @param {Object} experiment - Output of pickExperiment
+ * @param {Object} options - Configuration options
+ */
+export function createConvergencePlot(containerId, experiment, options = {}) {
+    const {
+        title = 'Convergence of Repeated Simulations',
+        xLabel = 'Number of Flips',
+        yLabel = 'Heads %',
+        width = 600,
+        height = 320
+    } = options;
+
+    const points = experiment.simulations.flatMap((simulation, i) =>
+        simulation.map(point => ({ ...point, simulation: i + 1 }))
+    );
+
+    const plot = Plot.plot({
+        width,
+        height,
+        marginLeft: 50,
+        marginBottom: 45,
+        title: `${title} (${experiment.simulations.length} simulations)`,
+        x: { label: xLabel, grid: true },
+        y: { label: yLabel, domain: [0, 100], grid: true },
+        color: { type: "categorical", scheme: "Tableau10" },
+        marks: [
+            Plot.ruleY([experiment.probability * 100], {stroke: "#888", strokeWidth: 1, strokeDasharray: "4,4"}),
+            Plot.line(points, { x: "trials", y: "percentage", z: "simulation", stroke: "simulation", strokeWidth: 1.5 })
+        ]
+    });
+
+    const container = document.getElementById(containerId);
+    container.innerHTML = '';
+    container.appendChild(plot);
+}
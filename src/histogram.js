@@ -1,6 +1,8 @@
 /**
  * histogram.js - Unified histogram visualization module for election data
- * Supports unary, binary, and ternary color modes with Observable Plot
+ * Supports unary, binary, and ternary color modes with Observable Plot.
+ * Draws either per-tabulator data or the pre-binned counts of *_histograms.json
+ * (scripts/histograms.py)
  */
 import * as Plot from "https://cdn.jsdelivr.net/npm/@observablehq/plot@0.6/+esm";
 
@@ -33,10 +35,26 @@ export function processData(data, colorMode = 'binary') {
     }
 }
 
+// Turn pre-binned Urban/Rural counts into one weighted record per non-empty bin
+export function binnedData(histograms, binSize, field = 'trump_percentage') {
+    const histogram = histograms.histograms[field][binSize];
+    if (!histogram) {
+        throw new Error(`No ${field} histogram with bin width ${binSize}`);
+    }
+    const records = [];
+    ['Urban', 'Rural'].forEach(type => {
+        histogram.counts[type].forEach((count, bin) => {
+            if (count > 0) {
+                records.push({ [field]: bin * binSize, type, count });
+            }
+        });
+    });
+    return records;
+}
+
 // Create a normal curve that correctly predicts bin counts based on probability density function
-export function createPredictiveCurve(data, mean, stdDev, binSize) {
+export function createPredictiveCurve(data, mean, stdDev, binSize, totalCount = data.length) {
     const points = [];
-    const totalCount = data.length;
     
     for (let x = 0; x <= 100; x += 0.5) {
         // Calculate normal distribution density at this point
@@ -53,12 +71,12 @@ export function createPredictiveCurve(data, mean, stdDev, binSize) {
     return points;
 }
 
-// Count items in each bin manually for a dataset
-export function countBins(data, binSize) {
+// Count items in each bin manually for a dataset (weighted records from binnedData add their count)
+export function countBins(data, binSize, weighted = false) {
     const bins = {};
     data.forEach(d => {
         const binIndex = Math.floor(d.trump_percentage / binSize) * binSize;
-        bins[binIndex] = (bins[binIndex] || 0) + 1;
+        bins[binIndex] = (bins[binIndex] || 0) + (weighted ? d.count : 1);
     });
     return bins;
 }
@@ -75,20 +93,26 @@ export function calculateStdDev(data, mean) {
     );
 }
 
-// Create normal curve marks for visualization
-function createNormalCurveMarks(data, types, colors, binSize) {
+// Create normal curve marks for visualization (groupStats: precomputed statistics per type)
+function createNormalCurveMarks(data, types, colors, binSize, groupStats = null) {
     const marks = [];
     const stats = {};
     
     types.forEach((type, i) => {
-        const typeData = type === 'All' ? data : data.filter(d => d.type === type);
-        if (typeData.length === 0) return;
-        
-        const mean = calculateMean(typeData);
-        const stdDev = calculateStdDev(typeData, mean);
-        const curvePoints = createPredictiveCurve(typeData, mean, stdDev, binSize);
+        let mean, stdDev, count;
+        if (groupStats) {
+            if (!groupStats[type] || groupStats[type].count === 0) return;
+            ({ mean, std_dev: stdDev, count } = groupStats[type]);
+        } else {
+            const typeData = type === 'All' ? data : data.filter(d => d.type === type);
+            if (typeData.length === 0) return;
+            mean = calculateMean(typeData);
+            stdDev = calculateStdDev(typeData, mean);
+            count = typeData.length;
+        }
+        const curvePoints = createPredictiveCurve(data, mean, stdDev, binSize, count);
         
-        stats[type] = { mean, stdDev, count: typeData.length };
+        stats[type] = { mean, stdDev, count };
         
         marks.push(Plot.line(curvePoints, {
             x: "x",
@@ -138,16 +162,22 @@ export function createHistogram(
         displayMode = 'stacked', 
         colorMode = 'binary',
         title = 'Election Results Histogram',
-        referenceLines = null
+        referenceLines = null,
+        binSize = 2, // 2% bins
+        histograms = null
     } = {}
 ) {
-    console.log('Creating histogram with:', { displayMode, colorMode, dataLength: data.length });
+    // Pre-binned histograms (scripts/histograms.py) replace the per-tabulator data
+    const weighted = histograms !== null;
+    console.log('Creating histogram with:', { displayMode, colorMode, dataLength: weighted ? 'pre-binned' : data.length });
     
     // Process data based on color mode
-    const processedData = processData(data, colorMode);
+    const processedData = weighted ? binnedData(histograms, binSize) : processData(data, colorMode);
+    const groupStats = weighted ? histograms.stats.trump_percentage : null;
     
-    // For binning
-    const binSize = 2; // 2% bins
+    // Bin reducer: count tabulators, or sum the counts of pre-binned records
+    const binOutputs = weighted ? {y: "sum"} : {y: "count"};
+    const binWeight = weighted ? {y: "count"} : {};
     
     // Initialize marks array
     let marks = [];
@@ -157,11 +187,12 @@ export function createHistogram(
     // Configure based on color mode
     if (colorMode === 'unary' || colorMode === 'none') {
         // Single color mode (red)
-        const allBinCounts = countBins(processedData, binSize);
+        const allBinCounts = countBins(processedData, binSize, weighted);
         maxBinCount = Math.max(...Object.values(allBinCounts));
         
         marks.push(
-            Plot.rectY(processedData, Plot.binX({y: "count"}, {
+            Plot.rectY(processedData, Plot.binX(binOutputs, {
+                ...binWeight,
                 x: "trump_percentage",
                 fill: "red",
                 stroke: "#a00000",
@@ -171,7 +202,7 @@ export function createHistogram(
         
         // Add normal curve and stats
         const { marks: curveMarks, stats: curveStats } = createNormalCurveMarks(
-            processedData, ['All'], ['black'], binSize
+            processedData, ['All'], ['black'], binSize, groupStats
         );
         marks.push(...curveMarks);
         stats = curveStats;
@@ -191,7 +222,8 @@ export function createHistogram(
             marks.push(
                 Plot.rectY(stackData, 
                     Plot.stackY(
-                        Plot.binX({y: "count"}, {
+                        Plot.binX(binOutputs, {
+                            ...binWeight,
                             x: "trump_percentage",
                             fill: "category",
                             interval: binSize
@@ -202,13 +234,15 @@ export function createHistogram(
         } else {
             // Overlapping
             marks.push(
-                Plot.rectY(urbanData, Plot.binX({y: "count"}, {
+                Plot.rectY(urbanData, Plot.binX(binOutputs, {
+                    ...binWeight,
                     x: "trump_percentage",
                     fill: "steelblue",
                     opacity: 0.7,
                     interval: binSize
                 })),
-                Plot.rectY(ruralData, Plot.binX({y: "count"}, {
+                Plot.rectY(ruralData, Plot.binX(binOutputs, {
+                    ...binWeight,
                     x: "trump_percentage",
                     fill: "green",
                     opacity: 0.7,
@@ -218,8 +252,8 @@ export function createHistogram(
         }
         
         // Calculate max bin count for positioning
-        const urbanBinCounts = countBins(urbanData, binSize);
-        const ruralBinCounts = countBins(ruralData, binSize);
+        const urbanBinCounts = countBins(urbanData, binSize, weighted);
+        const ruralBinCounts = countBins(ruralData, binSize, weighted);
         maxBinCount = displayMode === 'stacked' 
             ? Math.max(...Object.keys({...urbanBinCounts, ...ruralBinCounts}).map(bin => 
                 (urbanBinCounts[bin] || 0) + (ruralBinCounts[bin] || 0)
@@ -228,7 +262,7 @@ export function createHistogram(
         
         // Add curves and stats
         const { marks: curveMarks, stats: curveStats } = createNormalCurveMarks(
-            processedData, ['Urban', 'Rural'], ['steelblue', 'green'], binSize
+            processedData, ['Urban', 'Rural'], ['steelblue', 'green'], binSize, groupStats
         );
         marks.push(...curveMarks);
         stats = curveStats;
@@ -255,7 +289,8 @@ export function createHistogram(
             marks.push(
                 Plot.rectY(stackData, 
                     Plot.stackY(
-                        Plot.binX({y: "count"}, {
+                        Plot.binX(binOutputs, {
+                            ...binWeight,
                             x: "trump_percentage",
                             fill: "category",
                             interval: binSize
@@ -266,19 +301,22 @@ export function createHistogram(
         } else {
             // Overlapping
             marks.push(
-                Plot.rectY(urbanData, Plot.binX({y: "count"}, {
+                Plot.rectY(urbanData, Plot.binX(binOutputs, {
+                    ...binWeight,
                     x: "trump_percentage",
                     fill: ternaryColors['Urban'],
                     opacity: 0.6,
                     interval: binSize
                 })),
-                Plot.rectY(suburbanData, Plot.binX({y: "count"}, {
+                Plot.rectY(suburbanData, Plot.binX(binOutputs, {
+                    ...binWeight,
                     x: "trump_percentage",
                     fill: ternaryColors['Suburban'],
                     opacity: 0.6,
                     interval: binSize
                 })),
-                Plot.rectY(ruralData, Plot.binX({y: "count"}, {
+                Plot.rectY(ruralData, Plot.binX(binOutputs, {
+                    ...binWeight,
                     x: "trump_percentage",
                     fill: ternaryColors['Rural'],
                     opacity: 0.6,
@@ -288,9 +326,9 @@ export function createHistogram(
         }
         
         // Calculate max bin count
-        const urbanBinCounts = countBins(urbanData, binSize);
-        const suburbanBinCounts = countBins(suburbanData, binSize);
-        const ruralBinCounts = countBins(ruralData, binSize);
+        const urbanBinCounts = countBins(urbanData, binSize, weighted);
+        const suburbanBinCounts = countBins(suburbanData, binSize, weighted);
+        const ruralBinCounts = countBins(ruralData, binSize, weighted);
         
         if (displayMode === 'stacked') {
             // For stacked, sum the counts per bin
@@ -311,7 +349,8 @@ export function createHistogram(
             processedData, 
             ['Urban', 'Suburban', 'Rural'], 
             [ternaryColors['Urban'], ternaryColors['Suburban'], ternaryColors['Rural']], 
-            binSize
+            binSize,
+            groupStats
         );
         marks.push(...curveMarks);
         stats = curveStats;
@@ -0,0 +1,76 @@
+/**
+ * parameter_sweep.js - Precomputed simulation statistics over a grid of slider settings
+ * (scripts/parameter_sweep.py). Cells are stored in row-major order of the axes, so a
+ * slider combination is found by snapping each slider to its axis and computing the offset
+ */
+
+// One pending or finished load per URL
+const sweepCache = new Map();
+
+/**
+ * Fetch a parameter sweep once
+ * @param {string} url - URL of the sweep, e.g. data/processed_data/parameter_sweep.json
+ * @returns {Promise<Object>} - Parsed sweep
+ */
+export function loadParameterSweep(url) {
+    if (!sweepCache.has(url)) {
+        const pending = fetch(url)
+            .then(response => response.json())
+            .catch(error => {
+                sweepCache.delete(url);
+                throw error;
+            });
+        sweepCache.set(url, pending);
+    }
+    return sweepCache.get(url);
+}
+
+/**
+ * Look up the grid cell closest to a set of parameters
+ * @param {Object} sweep - Loaded parameter sweep
+ * @param {Object} params - Parameter values keyed by simulation parameter name (e.g. rural_machines)
+ * @returns {Object|null} - { params, mean, std }: the cell's value of every given parameter
+ *     (snapped to its axis, or the sweep's fixed value) and the mean and standard deviation over
+ *     the replicates of each statistic; null if a parameter is outside the range of its axis or
+ *     is not swept and differs from the sweep's fixed value, or if an axis has no given value
+ */
+export function lookupSweep(sweep, params) {
+    const axes = new Map(sweep.axes.map(({ name, values }) => [name, values]));
+    const comparable = Object.entries(params).every(([name, value]) => {
+        const values = axes.get(name);
+        if (values) {
+            return value >= Math.min(...values) && value <= Math.max(...values);
+        }
+        return sweep.fixed[name] === value;
+    });
+    // An axis without a given value cannot be matched either
+    if (!comparable || sweep.axes.some(({ name }) => !(name in params))) {
+        return null;
+    }
+
+    const cellParams = {};
+    Object.keys(params).forEach(name => {
+        if (!axes.has(name)) {
+            cellParams[name] = sweep.fixed[name];
+        }
+    });
+    let cell = 0;
+    sweep.axes.forEach(({ name, values }) => {
+        let position = 0;
+        values.forEach((value, i) => {
+            if (Math.abs(value - params[name]) < Math.abs(values[position] - params[name])) {
+                position = i;
+            }
+        });
+        cellParams[name] = values[position];
+        cell = cell * values.length + position;
+    });
+
+    const mean = {};
+    const std = {};
+    sweep.stats.forEach(stat => {
+        mean[stat] = sweep.mean[stat][cell];
+        std[stat] = sweep.std[stat][cell];
+    });
+    return { params: cellParams, mean, std };
+}
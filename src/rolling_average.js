@@ -1,6 +1,8 @@
 /**
  * rolling_average.js - Functions for creating rolling average plots
- * Shows the rolling average of vote tallies for each tabulator
+ * Shows the rolling average of vote tallies for each tabulator.
+ * Window sizes precomputed by scripts/rolling_averages.py are drawn from the
+ * *_rolling_averages.json series; other sizes are computed from vote_history
  */
 import * as Plot from "https://cdn.jsdelivr.net/npm/@observablehq/plot@0.6/+esm";
 
@@ -132,11 +134,66 @@ export function processRollingAverageData(scatterData, windowSize) {
     return rollingAverageData;
 }
 
+/**
+ * Build rolling average data points from precomputed series
+ * @param {Object} rollingAverages - Decoded *_rolling_averages.json (see loadRollingAverages)
+ * @param {number} windowSize - Rolling window size
+ * @returns {Array|null} - Data points in the shape of processRollingAverageData, already
+ *     thinned to the points the plot draws, or null if the window size was not precomputed
+ */
+export function rollingAverageDataFromSeries(rollingAverages, windowSize) {
+    const series = rollingAverages && rollingAverages.windows[windowSize];
+    if (!series) {
+        return null;
+    }
+    
+    const rollingAverageData = [];
+    rollingAverages.tabulators.forEach((tabulator, t) => {
+        const isUrban = rollingAverages.is_urban[t];
+        const urbanPercentage = rollingAverages.urban_percentage[t] || 0;
+        for (let p = series.offsets[t]; p < series.offsets[t + 1]; p++) {
+            const voteIndex = series.vote_index[p];
+            const trumpVotesInWindow = series.window_trump_votes[p];
+            rollingAverageData.push({
+                tabulator,
+                vote_index: voteIndex,
+                total_votes: voteIndex,
+                window_trump_votes: trumpVotesInWindow,
+                window_size: windowSize,
+                rolling_average: (trumpVotesInWindow / windowSize) * 100,
+                is_urban: isUrban,
+                urban_percentage: urbanPercentage,
+                area_type: isUrban ? 'Urban' : 'Rural',
+                cumulative_urban_percentage: (series.cumulative_urban_votes[p] / voteIndex) * 100
+            });
+        }
+    });
+    return rollingAverageData;
+}
+
+/**
+ * Number of rolling average points the precomputed series of some tabulators stand for
+ * @param {Object} rollingAverages - Decoded *_rolling_averages.json
+ * @param {number} windowSize - Rolling window size
+ * @param {Set} tabulatorSet - Tabulators to count
+ * @returns {number} - Points before thinning
+ */
+function countSeriesPoints(rollingAverages, windowSize, tabulatorSet) {
+    let count = 0;
+    rollingAverages.tabulators.forEach((tabulator, t) => {
+        if (tabulatorSet.has(tabulator)) {
+            count += Math.max(0, rollingAverages.sequence_lengths[t] - windowSize + 1);
+        }
+    });
+    return count;
+}
+
 /**
  * Create a rolling average plot
  * @param {string} containerId - ID of the container element
- * @param {Array} scatterData - Scatter plot data with vote_history arrays
- * @param {Object} options - Configuration options
+ * @param {Array} scatterData - Scatter plot data with vote_history arrays (only used for
+ *     window sizes missing from options.rollingAverages)
+ * @param {Object} options - Configuration options; rollingAverages holds decoded precomputed series
  */
 export function createRollingAveragePlot(containerId, scatterData, options = {}) {
     
@@ -146,11 +203,13 @@ export function createRollingAveragePlot(containerId, scatterData, options = {})
         selectionMethod = 'longest',
         windowSize = 10,
         selectedRandomTabulators = null,
-        fakeDataMode = false
+        fakeDataMode = false,
+        rollingAverages = null
     } = options;
     
-    // Process the data using the vote_history arrays
-    const rollingAverageData = processRollingAverageData(scatterData, windowSize);
+    // Use the precomputed series when this window size has one, otherwise process vote_history
+    const precomputedData = rollingAverageDataFromSeries(rollingAverages, windowSize);
+    const rollingAverageData = precomputedData || processRollingAverageData(scatterData, windowSize);
     
     // Get a list of unique tabulators
     const uniqueTabulators = [...new Set(rollingAverageData.map(item => item.tabulator))];
@@ -264,6 +323,11 @@ export function createRollingAveragePlot(containerId, scatterData, options = {})
         filteredData = Object.values(tabulatorGroups).flat();
         }
     
+    // Precomputed series are already thinned to the points drawn
+    const pointCount = precomputedData ?
+        countSeriesPoints(rollingAverages, windowSize, tabulatorSet) :
+        filteredData.length;
+    
     // Data sampling optimization for large datasets
     let sampledData = filteredData;
     const maxPointsPerLine = 100; // Reasonable limit for smooth visualization
@@ -286,7 +350,7 @@ export function createRollingAveragePlot(containerId, scatterData, options = {})
         const tabulatorData = dataByTabulator[tabulator];
         totalOriginalPoints += tabulatorData.length;
         
-        if (tabulatorData.length <= maxPointsPerLine) {
+        if (precomputedData || tabulatorData.length <= maxPointsPerLine) {
             // Keep all data if under limit
             sampledDataByTabulator[tabulator] = tabulatorData;
             totalSampledPoints += tabulatorData.length;
@@ -387,8 +451,8 @@ export function createRollingAveragePlot(containerId, scatterData, options = {})
             `SIMULATED FRAUD SCENARIO - Rolling Average (Window Size: ${windowSize}) of Trump Votes` :
             `Rolling Average (Window Size: ${windowSize}) of Trump Votes by Tabulator`,
         subtitle: fakeDataMode ?
-            `FAKE DATA - NOT REAL - ${filteredData.length} points, ${tabulatorsToDisplay.length} machines` :
-            `${filteredData.length} points, ${tabulatorsToDisplay.length} machines`,
+            `FAKE DATA - NOT REAL - ${pointCount} points, ${tabulatorsToDisplay.length} machines` :
+            `${pointCount} points, ${tabulatorsToDisplay.length} machines`,
         color: colorConfig,
         x: {
             label: "Total Votes Counted",
@@ -0,0 +1,192 @@
+/**
+ * scatter_data.js - Loaders for the scatter data written by scripts/classify_precincts.py
+ * Decodes the bit-packed vote_history and urban_voter sequences (scripts/packed_bits.py)
+ * back into per-tabulator 0/1 arrays, and reads the summary index and sequence shards
+ * (scripts/scatter_shards.py) so pages fetch sequences only when they need them.
+ * Also reads the precomputed rolling-average series (scripts/rolling_averages.py) and
+ * pre-binned histograms (scripts/histograms.py)
+ */
+
+const PACKED_ENCODING = 'packed-bits';
+const PACKED_FIELDS = ['vote_history', 'urban_voter'];
+
+// One pending or finished load per URL, so pages that read the same file share it
+const scatterDataCache = new Map();
+
+/**
+ * Fetch a JSON file once and transform it, sharing the result between callers
+ * @param {string} url - URL of the file
+ * @param {Function} transform - Applied to the parsed JSON
+ * @returns {Promise<Object>} - Transformed data
+ */
+function loadCached(url, transform) {
+    if (!scatterDataCache.has(url)) {
+        const pending = fetch(url)
+            .then(response => response.json())
+            .then(transform)
+            .catch(error => {
+                // Let a later call retry a failed load
+                scatterDataCache.delete(url);
+                throw error;
+            });
+        scatterDataCache.set(url, pending);
+    }
+    return scatterDataCache.get(url);
+}
+
+/**
+ * Decode a base64 string into bytes
+ * @param {string} base64 - Base64-encoded data
+ * @returns {Uint8Array} - Decoded bytes
+ */
+function decodeBase64(base64) {
+    const binary = atob(base64);
+    const bytes = new Uint8Array(binary.length);
+    for (let i = 0; i < binary.length; i++) {
+        bytes[i] = binary.charCodeAt(i);
+    }
+    return bytes;
+}
+
+/**
+ * Unpack one bit sequence (most significant bit first)
+ * @param {Uint8Array} bytes - Packed bytes of all tabulators
+ * @param {number} offset - Byte offset of the sequence
+ * @param {number} length - Number of entries in the sequence
+ * @returns {Array} - Array of 0/1 values
+ */
+export function unpackBits(bytes, offset, length) {
+    const values = new Array(length);
+    for (let i = 0; i < length; i++) {
+        values[i] = (bytes[offset + (i >> 3)] >> (7 - (i & 7))) & 1;
+    }
+    return values;
+}
+
+/**
+ * Restore the vote_history and urban_voter arrays of packed scatter data.
+ * Data that is not packed is returned unchanged.
+ * @param {Object} scatterData - Parsed *_scatter_data.json
+ * @returns {Object} - Scatter data with vote_history and urban_voter arrays on each item
+ */
+export function decodeScatterData(scatterData) {
+    if (!scatterData || scatterData.encoding !== PACKED_ENCODING) {
+        return scatterData;
+    }
+    const fields = PACKED_FIELDS.map(field => [field, decodeBase64(scatterData[field])]);
+    const data = scatterData.data.map(item => {
+        const decoded = { ...item };
+        for (const [field, bytes] of fields) {
+            decoded[field] = unpackBits(bytes, item.sequence_offset, item.sequence_length);
+        }
+        delete decoded.sequence_offset;
+        delete decoded.sequence_length;
+        return decoded;
+    });
+    const { encoding, vote_history, urban_voter, ...rest } = scatterData;
+    return { ...rest, data };
+}
+
+/**
+ * Fetch and decode a scatter data file
+ * @param {string} url - URL of a *_scatter_data.json file
+ * @returns {Promise<Object>} - Decoded scatter data
+ */
+export function loadScatterData(url) {
+    return loadCached(url, decodeScatterData);
+}
+
+/**
+ * Fetch a scatter index: per-tabulator summary fields only
+ * (tabulator, total_votes, trump_votes, trump_percentage, is_urban, urban_percentage)
+ * @param {string} url - URL of a *_scatter_index.json file
+ * @returns {Promise<Object>} - Index with a data array of summary items
+ */
+export function loadScatterIndex(url) {
+    return loadCached(url, index => index);
+}
+
+/**
+ * Fetch the sequence shards of a scatter index and join them onto its summary items
+ * @param {string} indexUrl - URL of a *_scatter_index.json file
+ * @param {Array} [tabulators] - Tabulators whose shards are needed (default: all)
+ * @returns {Promise<Object>} - Scatter data in the *_scatter_data.json shape, with
+ *     precincts, vote_history and urban_voter on every item that was loaded
+ */
+export async function loadScatterSequences(indexUrl, tabulators = null) {
+    const index = await loadScatterIndex(indexUrl);
+    const wanted = tabulators ? new Set(tabulators) : null;
+    const items = index.data.filter(item => !wanted || wanted.has(item.tabulator));
+
+    // Shard paths are relative to the index file
+    const base = indexUrl.slice(0, indexUrl.lastIndexOf('/') + 1);
+    const shardNums = [...new Set(items.map(item => item.shard))];
+    const shards = await Promise.all(shardNums.map(num => loadScatterData(base + index.shards[num])));
+
+    const sequences = new Map();
+    for (const shard of shards) {
+        for (const item of shard.data) {
+            sequences.set(item.tabulator, item);
+        }
+    }
+    const { shards: shardPaths, ...rest } = index;
+    const data = items.map(({ shard, ...item }) => ({ ...item, ...sequences.get(item.tabulator) }));
+    return { ...rest, data };
+}
+
+// Typed array constructors of the dtypes written by scripts/rolling_averages.py
+const ROLLING_DTYPES = { uint8: Uint8Array, uint16: Uint16Array, uint32: Uint32Array };
+
+/**
+ * Decode a little-endian integer array
+ * @param {string} base64 - Base64-encoded array
+ * @param {string} dtype - Element type, e.g. 'uint16'
+ * @returns {Array} - Decoded integers
+ */
+function decodeIntegers(base64, dtype) {
+    const bytes = decodeBase64(base64);
+    const ArrayType = ROLLING_DTYPES[dtype];
+    const view = new DataView(bytes.buffer);
+    const values = new Array(bytes.length / ArrayType.BYTES_PER_ELEMENT);
+    for (let i = 0; i < values.length; i++) {
+        const at = i * ArrayType.BYTES_PER_ELEMENT;
+        values[i] = dtype === 'uint8' ? view.getUint8(at) :
+            dtype === 'uint16' ? view.getUint16(at, true) : view.getUint32(at, true);
+    }
+    return values;
+}
+
+/**
+ * Restore the point arrays of a rolling-averages file
+ * @param {Object} rollingAverages - Parsed *_rolling_averages.json
+ * @returns {Object} - The same data with each window's arrays decoded
+ */
+export function decodeRollingAverages(rollingAverages) {
+    const windows = {};
+    for (const [windowSize, series] of Object.entries(rollingAverages.windows)) {
+        const decoded = { offsets: series.offsets };
+        for (const [field, dtype] of Object.entries(rollingAverages.dtypes)) {
+            decoded[field] = decodeIntegers(series[field], dtype);
+        }
+        windows[windowSize] = decoded;
+    }
+    return { ...rollingAverages, windows };
+}
+
+/**
+ * Fetch and decode a rolling-averages file
+ * @param {string} url - URL of a *_rolling_averages.json file
+ * @returns {Promise<Object>} - Decoded rolling averages
+ */
+export function loadRollingAverages(url) {
+    return loadCached(url, decodeRollingAverages);
+}
+
+/**
+ * Fetch the pre-binned histograms of a vote type
+ * @param {string} url - URL of a *_histograms.json file
+ * @returns {Promise<Object>} - Bin counts and statistics per field, bin width and group
+ */
+export function loadHistograms(url) {
+    return loadCached(url, histograms => histograms);
+}